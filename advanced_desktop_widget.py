@@ -7,6 +7,7 @@ import time
 import threading
 from datetime import datetime
 import os
+from storage import read_live_status
 
 
 class AdvancedSnapAlertWidget:
@@ -230,6 +231,11 @@ class AdvancedSnapAlertWidget:
 
     def load_status_data(self):
         """Load current status from SnapAlert tracker"""
+        # Live channel first: no file read or JSON parse on every refresh
+        live = read_live_status("data")
+        if live:
+            return live
+
         try:
             if os.path.exists("data/status.json"):
                 with open("data/status.json", "r") as f:
@@ -271,13 +277,18 @@ class AdvancedSnapAlertWidget:
             self.current_app_card["value"].config(text=current_app)
 
             # Open apps
-            open_apps = status.get("open_apps", [])
-            self.apps_card["value"].config(text=str(len(open_apps)))
+            open_app_count = status.get(
+                "open_app_count", len(status.get("open_apps", []))
+            )
+            self.apps_card["value"].config(text=str(open_app_count))
 
             # Custom alerts
-            custom_alerts = status.get("custom_alerts", [])
-            enabled_alerts = [a for a in custom_alerts if a.get("enabled", True)]
-            self.alerts_card["value"].config(text=str(len(enabled_alerts)))
+            if "enabled_alert_count" in status:
+                alert_count = status["enabled_alert_count"]
+            else:
+                custom_alerts = status.get("custom_alerts", [])
+                alert_count = len([a for a in custom_alerts if a.get("enabled", True)])
+            self.alerts_card["value"].config(text=str(alert_count))
 
             # Status indicator
             if status:
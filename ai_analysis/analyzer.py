@@ -6,6 +6,15 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
+from storage import (
+    get_activity_log,
+    get_daily_archive,
+    get_insights_store,
+    get_session_store,
+    get_usage_rollups,
+    read_daily_summaries,
+)
+
 
 class ProductivityAnalyzer:
     def __init__(self, config: Dict[str, Any]):
@@ -28,31 +37,11 @@ class ProductivityAnalyzer:
             return "You are an AI productivity analyst. Analyze the provided data and give insights."
 
     def load_logs(self, hours_back: int = 24) -> List[Dict]:
-        """Load recent logs from logs.json"""
-        logs_file = self.data_dir / "logs.json"
-        if not logs_file.exists():
-            print(f"[AI Analysis] No logs file found at {logs_file}")
-            return []
-
+        """Load recent logs from the segmented activity log"""
         try:
-            all_logs = []
             cutoff_time = datetime.now() - timedelta(hours=hours_back)
-
-            with open(logs_file, "r", encoding="utf-8") as f:
-                for line in f:
-                    line = line.strip()
-                    if line:
-                        try:
-                            log_entry = json.loads(line)
-                            # Parse timestamp and filter recent logs
-                            if "timestamp" in log_entry:
-                                log_time = datetime.fromisoformat(
-                                    log_entry["timestamp"].replace("Z", "+00:00")
-                                )
-                                if log_time.replace(tzinfo=None) >= cutoff_time:
-                                    all_logs.append(log_entry)
-                        except json.JSONDecodeError:
-                            continue
+            activity_log = get_activity_log(self.data_dir)
+            all_logs = list(activity_log.read_range(start_ts=cutoff_time.timestamp()))
 
             print(
                 f"[AI Analysis] Loaded {len(all_logs)} log entries from last {hours_back} hours"
@@ -73,24 +62,57 @@ class ProductivityAnalyzer:
             print(f"[AI Analysis] Error loading status: {e}")
             return {}
 
-    def load_sessions_data(self) -> List[Dict]:
-        """Load sessions data"""
-        sessions_file = self.data_dir / "sessions.json"
+    def load_sessions_data(self, limit: Optional[int] = None) -> List[Dict]:
+        """Load sessions data (only the newest `limit` sessions when given)"""
         try:
-            with open(sessions_file, "r", encoding="utf-8") as f:
-                return json.load(f)
+            session_store = get_session_store(self.data_dir)
+            if limit:
+                return session_store.tail(limit)
+            return session_store.read_all()
         except Exception as e:
             print(f"[AI Analysis] Error loading sessions: {e}")
             return []
 
+    def load_history(self, days_back: int = 14) -> Dict:
+        """Summarise the last days_back days (closed days come from the daily archive)"""
+        try:
+            summaries = read_daily_summaries(
+                get_activity_log(self.data_dir),
+                get_daily_archive(self.data_dir),
+                days_back,
+            )
+        except Exception as e:
+            print(f"[AI Analysis] Error loading history: {e}")
+            return {"days": 0}
+
+        if not summaries:
+            return {"days": 0}
+
+        app_times = {}
+        for summary in summaries:
+            for app, seconds in summary["app_times"].items():
+                app_times[app] = app_times.get(app, 0) + seconds
+
+        return {
+            "days": len(summaries),
+            "daily_totals": {s["day"]: s["total_time"] for s in summaries},
+            "average_daily_time": sum(s["total_time"] for s in summaries)
+            / len(summaries),
+            "average_daily_switches": sum(s["switches"] for s in summaries)
+            / len(summaries),
+            "top_apps": sorted(app_times.items(), key=lambda x: x[1], reverse=True)[
+                :10
+            ],
+        }
+
     def prepare_analysis_data(self) -> Dict:
         """Prepare structured data for analysis"""
         logs = self.load_logs(hours_back=24)
         status = self.load_status_data()
-        sessions = self.load_sessions_data()
+        sessions = self.load_sessions_data(limit=50)
 
         # Analyze app usage patterns
-        app_usage = self._analyze_app_usage(logs)
+        app_usage = self._analyze_app_usage(logs, hours_back=24)
 
         # Analyze browser activity
         browser_data = self._analyze_browser_activity(logs, status)
@@ -101,6 +123,9 @@ class ProductivityAnalyzer:
         # Analyze switching patterns
         switching_patterns = self._analyze_switching_patterns(logs)
 
+        # Multi-day history
+        history = self.load_history(days_back=14)
+
         # Current status
         current_status = {
             "session_time": status.get("session_time", 0),
@@ -118,11 +143,25 @@ class ProductivityAnalyzer:
             "browser_data": browser_data,
             "session_patterns": session_patterns,
             "switching_patterns": switching_patterns,
+            "history": history,
             "current_status": current_status,
         }
 
-    def _analyze_app_usage(self, logs: List[Dict]) -> Dict:
-        """Analyze application usage patterns"""
+    def _analyze_app_usage(self, logs: List[Dict], hours_back: int = 24) -> Dict:
+        """Analyze application usage patterns (from the tracker's rollups when built)"""
+        rollups = get_usage_rollups(self.data_dir)
+        if rollups.built:
+            start_ts = (datetime.now() - timedelta(hours=hours_back)).timestamp()
+            app_times = rollups.app_usage(start_ts)
+            sorted_apps = sorted(
+                app_times.items(), key=lambda x: x[1]["total_time"], reverse=True
+            )
+            return {
+                "top_apps": sorted_apps[:10],
+                "total_apps": len(app_times),
+                "potentially_idle": rollups.long_runs(start_ts),
+            }
+
         app_times = {}
         app_idle_times = {}
 
@@ -267,6 +306,7 @@ class ProductivityAnalyzer:
 **Switches per Hour:** {data["switching_patterns"]["switches_per_hour"]:.1f}
 **High Switching Activity:** {"Yes" if data["switching_patterns"]["high_switching"] else "No"}
 
+{self._format_history(data.get("history", {}))}
 ### Current Status
 **Current Session Time:** {data["current_status"]["session_time"] / 60:.1f} minutes
 **Session Keystrokes:** {data["current_status"]["keystrokes"]}
@@ -279,6 +319,21 @@ Based on this data, provide your analysis in the specified JSON format. Focus on
 
         return prompt
 
+    def _format_history(self, history: Dict) -> str:
+        """Format the multi-day history section of the prompt"""
+        if not history.get("days"):
+            return ""
+
+        section = f"""
+### Recent History ({history["days"]} days)
+**Average Daily Time:** {history["average_daily_time"] / 3600:.1f}h
+**Average Daily Switches:** {history["average_daily_switches"]:.0f}
+**Top Applications:**
+"""
+        for app, seconds in history["top_apps"][:5]:
+            section += f"- {app}: {seconds / 3600:.1f}h\n"
+        return section
+
     def call_ollama(self, prompt: str) -> Optional[Dict]:
         """Call Ollama API to generate analysis"""
         try:
@@ -365,31 +420,12 @@ Based on this data, provide your analysis in the specified JSON format. Focus on
             return None
 
     def save_insights(self, insights: Dict) -> bool:
-        """Save insights to insights.json"""
+        """Save insights to insights.jsonl"""
         try:
-            insights_file = self.data_dir / "insights.json"
-
-            # Load existing insights
-            existing_insights = []
-            if insights_file.exists():
-                try:
-                    with open(insights_file, "r", encoding="utf-8") as f:
-                        existing_insights = json.load(f)
-                except:
-                    existing_insights = []
-
-            # Add new insight
-            existing_insights.append(insights)
-
-            # Keep only last 100 insights
-            if len(existing_insights) > 100:
-                existing_insights = existing_insights[-100:]
-
-            # Save back to file
-            with open(insights_file, "w", encoding="utf-8") as f:
-                json.dump(existing_insights, f, indent=2, ensure_ascii=False)
+            insights_store = get_insights_store(self.data_dir)
+            insights_store.append(insights)
 
-            print(f"[AI Analysis] Insights saved to {insights_file}")
+            print(f"[AI Analysis] Insights saved to {insights_store.path}")
             return True
 
         except Exception as e:
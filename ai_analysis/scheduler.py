@@ -8,8 +8,13 @@ from apscheduler.triggers.interval import IntervalTrigger
 from apscheduler.executors.pool import ThreadPoolExecutor
 import atexit
 
+from storage import get_activity_log, get_analysis_log, get_daily_archive, rotate
+
 from .analyzer import ProductivityAnalyzer, create_default_config
 
+# How often closed days are archived, compressed and pruned
+MAINTENANCE_INTERVAL_HOURS = 1
+
 
 class AIAnalysisScheduler:
     def __init__(self, config: Optional[Dict] = None):
@@ -26,6 +31,12 @@ class AIAnalysisScheduler:
         # Load configuration from file if it exists
         self.load_config()
 
+        # Move the flat ai_analysis_log.json into the day-partitioned log
+        try:
+            get_analysis_log(self.config.get("data_dir", "data")).migrate_legacy()
+        except Exception as e:
+            print(f"[AI Scheduler] Error migrating analysis log: {e}")
+
         # Set up scheduler
         self.setup_scheduler()
 
@@ -108,6 +119,49 @@ class AIAnalysisScheduler:
             print(f"[AI Scheduler] Error scheduling analysis: {e}")
             return False
 
+    def schedule_maintenance(self):
+        """Schedule the periodic storage maintenance job"""
+        if not self.scheduler:
+            return False
+
+        try:
+            self.scheduler.add_job(
+                func=self.run_maintenance_job,
+                trigger=IntervalTrigger(hours=MAINTENANCE_INTERVAL_HOURS),
+                id="storage_maintenance",
+                name="Storage Maintenance",
+                replace_existing=True,
+            )
+            return True
+
+        except Exception as e:
+            print(f"[AI Scheduler] Error scheduling maintenance: {e}")
+            return False
+
+    def run_maintenance_job(self):
+        """Job function that archives, compresses and prunes closed days"""
+        data_dir = self.config.get("data_dir", "data")
+        try:
+            # Archive before rotation so retention never drops unarchived days
+            archive = get_daily_archive(data_dir)
+            if archive.available:
+                days = archive.compact(get_activity_log(data_dir))
+                if days:
+                    print(f"[AI Scheduler] Archived {len(days)} day(s) of activity")
+        except Exception as e:
+            print(f"[AI Scheduler] Error archiving activity logs: {e}")
+
+        try:
+            for name, counts in rotate(data_dir).items():
+                if any(counts.values()):
+                    print(
+                        f"[AI Scheduler] {name}: compressed {counts['compressed']} "
+                        f"segment(s), removed {counts['removed']}, "
+                        f"merged {counts['merged']} event(s)"
+                    )
+        except Exception as e:
+            print(f"[AI Scheduler] Error rotating logs: {e}")
+
     def run_analysis_job(self):
         """Job function that runs the analysis"""
         try:
@@ -143,10 +197,6 @@ class AIAnalysisScheduler:
     def log_analysis_result(self, result: Dict):
         """Log analysis result for debugging"""
         try:
-            log_file = (
-                Path(self.config.get("data_dir", "data")) / "ai_analysis_log.json"
-            )
-
             log_entry = {
                 "timestamp": datetime.now().isoformat(),
                 "analysis_count": self.analysis_count,
@@ -157,9 +207,7 @@ class AIAnalysisScheduler:
                 ),
             }
 
-            # Append to log file
-            with open(log_file, "a", encoding="utf-8") as f:
-                f.write(json.dumps(log_entry) + "\n")
+            get_analysis_log(self.config.get("data_dir", "data")).append(log_entry)
 
         except Exception as e:
             print(f"[AI Scheduler] Error logging analysis result: {e}")
@@ -174,6 +222,7 @@ class AIAnalysisScheduler:
             if not self.is_running:
                 self.scheduler.start()
                 self.schedule_analysis()
+                self.schedule_maintenance()
                 self.is_running = True
                 print(f"[AI Scheduler] Scheduler started successfully")
                 return True
@@ -229,7 +229,7 @@ def create_sample_data():
         json.dump(sample_status, f, indent=2)
 
     # Create sample sessions
-    sessions_file = data_dir / "sessions.json"
+    sessions_file = data_dir / "sessions.jsonl"
     sample_sessions = [
         {
             "start": "2024-01-15T09:00:00",
@@ -244,7 +244,8 @@ def create_sample_data():
     ]
 
     with open(sessions_file, "w") as f:
-        json.dump(sample_sessions, f, indent=2)
+        for session in sample_sessions:
+            f.write(json.dumps(session) + "\n")
 
     print(f"✅ Created sample data in {data_dir}")
     return True
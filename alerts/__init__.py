@@ -0,0 +1,24 @@
+"""
+Alerts Package for SnapAlert
+
+This package holds the custom alert logic shared by the tracker and the
+Flask app.
+It includes:
+- RuleEngine: Custom alerts compiled once and indexed by type and app filter
+- AlertRule: One compiled custom alert
+- CompiledExpression: Composite alert expression compiled to closures
+"""
+
+from .expressions import CompiledExpression, ExpressionError, validate_expression
+from .rules import ALERT_TYPES, CONDITIONS, EXPRESSION_TYPE, AlertRule, RuleEngine
+
+__all__ = [
+    "ALERT_TYPES",
+    "CONDITIONS",
+    "EXPRESSION_TYPE",
+    "AlertRule",
+    "CompiledExpression",
+    "ExpressionError",
+    "RuleEngine",
+    "validate_expression",
+]
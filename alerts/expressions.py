@@ -0,0 +1,539 @@
+"""Composite alert expressions.
+
+A small language over the tracker's metrics, e.g.::
+
+    app_time(Code.exe) > 90 and keystrokes_per_min < 5 for 10m
+
+It is parsed once and compiled to closures (nothing is ever eval'd).
+Windowed aggregates and ``for`` holds keep their state incrementally and
+are shared between all rules that use the same one, so a tick costs a few
+microseconds per rule.
+
+Grammar (lowest precedence first)::
+
+    expr     := and ("or" and)*
+    and      := held ("and" held)*
+    held     := not ["for" DURATION]      # condition true for the whole duration
+    not      := "not" not | compare
+    compare  := sum [(">" | ">=" | "<" | "<=" | "==" | "!=") sum]
+    sum      := product (("+" | "-") product)*
+    product  := unary (("*" | "/") unary)*
+    unary    := "-" unary | NUMBER | METRIC | CALL | "(" expr ")"
+
+Durations are a number with a unit: ``90s``, ``10m``, ``2h``.
+"""
+
+import operator
+import re
+from collections import deque
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Longest expression text and window accepted
+MAX_EXPRESSION_LENGTH = 500
+MAX_WINDOW_SEC = 24 * 3600
+# Deepest nesting of parentheses, "not" and unary minus accepted
+MAX_NESTING_DEPTH = 32
+
+# Bare metrics: value of the tracker's metrics dict (minutes or counts)
+METRICS = {
+    "keystroke_count": "keystrokes typed this session",
+    "session_time": "minutes since the session started",
+    "app_time": "minutes the current app has been open",
+    "idle_time": "minutes since the current app was last used",
+    "switch_count": "app switches since the tracker started",
+}
+
+# Shorthands, expanded when parsed
+ALIASES = {
+    "keystrokes": "keystroke_count",
+    "keystrokes_per_min": "rate(keystroke_count, 1m)",
+    "switches_per_min": "rate(switch_count, 1m)",
+    "switch_rate": "rate(switch_count, 1m)",
+}
+
+# Per-app metrics: name(app) -> minutes, 0 when the app isn't open
+APP_METRICS = {
+    "app_time": "start_time",
+    "idle_time": "last_used_time",
+}
+
+AGGREGATES = ("avg", "min", "max", "rate")
+
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600}
+
+COMPARISONS = {
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+    "==": operator.eq,
+    "!=": operator.ne,
+}
+
+ARITHMETIC = {
+    "+": operator.add,
+    "-": operator.sub,
+    "*": operator.mul,
+    "/": operator.truediv,
+}
+
+KEYWORDS = ("and", "or", "not", "for")
+
+_TOKEN = re.compile(
+    r"""
+    (?P<space>\s+)
+  | (?P<duration>\d+(?:\.\d+)?[smh])(?![\w.])
+  | (?P<number>\d+(?:\.\d+)?)(?![\w.])
+  | (?P<string>"[^"]*"|'[^']*')
+  | (?P<name>[A-Za-z_][\w.]*)
+  | (?P<op>>=|<=|==|!=|[><+\-*/(),])
+    """,
+    re.VERBOSE,
+)
+
+
+class ExpressionError(ValueError):
+    """An expression that doesn't parse or doesn't make sense"""
+
+    def __init__(self, message: str, position: Optional[int] = None):
+        if position is not None:
+            message = f"{message} (at position {position})"
+        super().__init__(message)
+        self.position = position
+
+
+def _tokenize(text: str) -> List[Tuple[str, str, int]]:
+    tokens = []
+    position = 0
+    while position < len(text):
+        match = _TOKEN.match(text, position)
+        if match is None:
+            raise ExpressionError(f"unexpected {text[position]!r}", position)
+        kind = match.lastgroup
+        if kind != "space":
+            value = match.group()
+            if kind == "name" and value.lower() in KEYWORDS:
+                kind, value = "keyword", value.lower()
+            tokens.append((kind, value, position))
+        position = match.end()
+    tokens.append(("end", "", len(text)))
+    return tokens
+
+
+# ----------------------------------------------------------------------
+# Parsing (to nested tuples)
+# ----------------------------------------------------------------------
+
+
+class _Parser:
+    def __init__(self, text: str):
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.index = 0
+        self.depth = 0
+
+    def peek(self):
+        return self.tokens[self.index]
+
+    def take(self):
+        token = self.tokens[self.index]
+        self.index += 1
+        return token
+
+    def accept(self, kind: str, value: Optional[str] = None) -> bool:
+        token = self.peek()
+        if token[0] == kind and (value is None or token[1] == value):
+            self.index += 1
+            return True
+        return False
+
+    def expect(self, kind: str, value: Optional[str] = None):
+        token = self.peek()
+        if token[0] != kind or (value is not None and token[1] != value):
+            wanted = repr(value) if value else kind
+            found = repr(token[1]) if token[0] != "end" else "end of expression"
+            raise ExpressionError(f"expected {wanted}, found {found}", token[2])
+        return self.take()
+
+    def nested(self, parse, position: int):
+        """Run a parse method one nesting level deeper"""
+        if self.depth >= MAX_NESTING_DEPTH:
+            raise ExpressionError(
+                f"expression nested more than {MAX_NESTING_DEPTH} levels deep",
+                position,
+            )
+        self.depth += 1
+        try:
+            return parse()
+        finally:
+            self.depth -= 1
+
+    def parse(self):
+        node = self.parse_or()
+        self.expect("end")
+        return node
+
+    def parse_or(self):
+        nodes = [self.parse_and()]
+        while self.accept("keyword", "or"):
+            nodes.append(self.parse_and())
+        return nodes[0] if len(nodes) == 1 else ("or", tuple(nodes))
+
+    def parse_and(self):
+        nodes = [self.parse_held()]
+        while self.accept("keyword", "and"):
+            nodes.append(self.parse_held())
+        return nodes[0] if len(nodes) == 1 else ("and", tuple(nodes))
+
+    def parse_held(self):
+        node = self.parse_not()
+        if self.accept("keyword", "for"):
+            node = ("for", node, self.parse_duration())
+        return node
+
+    def parse_not(self):
+        token = self.peek()
+        if self.accept("keyword", "not"):
+            return ("not", self.nested(self.parse_not, token[2]))
+        return self.parse_compare()
+
+    def parse_compare(self):
+        left = self.parse_sum()
+        token = self.peek()
+        if token[0] == "op" and token[1] in COMPARISONS:
+            self.take()
+            return ("compare", token[1], left, self.parse_sum())
+        return left
+
+    def parse_sum(self):
+        node = self.parse_product()
+        while self.peek()[0] == "op" and self.peek()[1] in ("+", "-"):
+            node = ("arith", self.take()[1], node, self.parse_product())
+        return node
+
+    def parse_product(self):
+        node = self.parse_unary()
+        while self.peek()[0] == "op" and self.peek()[1] in ("*", "/"):
+            node = ("arith", self.take()[1], node, self.parse_unary())
+        return node
+
+    def parse_unary(self):
+        kind, value, position = self.take()
+        if kind == "op" and value == "-":
+            operand = self.nested(self.parse_unary, position)
+            return ("arith", "-", ("number", 0.0), operand)
+        if kind == "number":
+            return ("number", float(value))
+        if kind == "op" and value == "(":
+            node = self.nested(self.parse_or, position)
+            self.expect("op", ")")
+            return node
+        if kind == "duration":
+            raise ExpressionError(
+                f"a duration ({value}) can only follow 'for' or be a window", position
+            )
+        if kind == "name":
+            return self.parse_name(value, position)
+        found = repr(value) if kind != "end" else "end of expression"
+        raise ExpressionError(f"expected a value, found {found}", position)
+
+    def parse_name(self, name: str, position: int):
+        if not self.accept("op", "("):
+            if name in ALIASES:
+                return _Parser(ALIASES[name]).parse()
+            if name in METRICS:
+                return ("metric", name)
+            raise ExpressionError(f"unknown metric {name!r}", position)
+
+        if name in APP_METRICS:
+            kind, value, arg_position = self.take()
+            if kind == "string":
+                value = value[1:-1]
+            elif kind != "name":
+                raise ExpressionError(f"{name}() takes an app name", arg_position)
+            self.expect("op", ")")
+            return ("app_metric", name, value)
+
+        if name in AGGREGATES:
+            inner = self.parse_sum()
+            self.expect("op", ",")
+            seconds = self.parse_duration()
+            self.expect("op", ")")
+            return ("aggregate", name, inner, seconds)
+
+        raise ExpressionError(f"unknown function {name!r}", position)
+
+    def parse_duration(self) -> float:
+        kind, value, position = self.take()
+        if kind != "duration":
+            raise ExpressionError("expected a duration like 90s, 10m or 2h", position)
+        seconds = float(value[:-1]) * DURATION_UNITS[value[-1]]
+        if not 0 < seconds <= MAX_WINDOW_SEC:
+            raise ExpressionError("durations must be between 1s and 24h", position)
+        return seconds
+
+
+def parse_expression(text: str):
+    """Parse expression text into a syntax tree (raises ExpressionError)"""
+    if not isinstance(text, str) or not text.strip():
+        raise ExpressionError("expression is empty")
+    if len(text) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionError(
+            f"expression is longer than {MAX_EXPRESSION_LENGTH} characters"
+        )
+    return _Parser(text).parse()
+
+
+def _canonical(node) -> str:
+    """Normalized text of a tree; equal trees share state"""
+    kind = node[0]
+    if kind == "number":
+        return repr(node[1])
+    if kind == "metric":
+        return node[1]
+    if kind == "app_metric":
+        return f"{node[1]}({node[2]!r})"
+    if kind == "aggregate":
+        return f"{node[1]}({_canonical(node[2])},{node[3]!r}s)"
+    if kind in ("arith", "compare"):
+        return f"({_canonical(node[2])}{node[1]}{_canonical(node[3])})"
+    if kind in ("and", "or"):
+        return f"({f' {kind} '.join(_canonical(n) for n in node[1])})"
+    if kind == "not":
+        return f"(not {_canonical(node[1])})"
+    if kind == "for":
+        return f"({_canonical(node[1])} for {node[2]!r}s)"
+    raise ExpressionError(f"unknown node {kind}")
+
+
+# ----------------------------------------------------------------------
+# Stateful nodes (windows and holds), updated once per tick
+# ----------------------------------------------------------------------
+
+
+class _Window:
+    """Samples of a value over the last ``seconds``, aggregated incrementally"""
+
+    def __init__(self, kind: str, source: Callable, seconds: float):
+        self.kind = kind
+        self.source = source
+        self.seconds = seconds
+        self.samples = deque()  # (timestamp, value)
+        self.total = 0.0
+        self.extremes = deque()  # monotonic (timestamp, value) for min/max
+        self.value = None
+
+    def update(self, ctx: Dict, now: float) -> None:
+        value = self.source(ctx)
+        if value is not None:
+            self.samples.append((now, value))
+            self.total += value
+            if self.kind in ("min", "max"):
+                worse = operator.ge if self.kind == "min" else operator.le
+                while self.extremes and worse(self.extremes[-1][1], value):
+                    self.extremes.pop()
+                self.extremes.append((now, value))
+
+        cutoff = now - self.seconds
+        while self.samples and self.samples[0][0] < cutoff:
+            self.total -= self.samples.popleft()[1]
+        while self.extremes and self.extremes[0][0] < cutoff:
+            self.extremes.popleft()
+
+        if not self.samples:
+            self.value = None
+        elif self.kind == "avg":
+            self.value = self.total / len(self.samples)
+        elif self.kind in ("min", "max"):
+            self.value = self.extremes[0][1]
+        else:  # rate: change per minute across the window
+            (first_ts, first), (last_ts, last) = self.samples[0], self.samples[-1]
+            if last_ts <= first_ts:
+                self.value = None
+            else:
+                # Counters restart with a new session; never report a negative rate
+                self.value = max(0.0, (last - first) / ((last_ts - first_ts) / 60))
+
+
+class _Hold:
+    """Whether a condition has been true continuously for ``seconds``"""
+
+    def __init__(self, source: Callable, seconds: float):
+        self.source = source
+        self.seconds = seconds
+        self.since = None
+        self.value = False
+
+    def update(self, ctx: Dict, now: float) -> None:
+        if self.source(ctx):
+            if self.since is None:
+                self.since = now
+            self.value = now - self.since >= self.seconds
+        else:
+            self.since = None
+            self.value = False
+
+
+# ----------------------------------------------------------------------
+# Compiling (to closures)
+# ----------------------------------------------------------------------
+
+
+class StateRegistry:
+    """Windows and holds of a set of compiled expressions, keyed by their text.
+
+    Rules using the same window share it. Passing the registry of the
+    previous rule set keeps windows and holds running across a reload.
+    """
+
+    def __init__(self, previous: Optional["StateRegistry"] = None):
+        self.nodes: Dict[str, object] = {}
+        self._previous = previous.nodes if previous is not None else {}
+
+    def get(self, key: str, create: Callable[[], object]):
+        node = self.nodes.get(key)
+        if node is None:
+            node = self._previous.get(key) or create()
+            # Children are registered first, so they update before parents
+            self.nodes[key] = node
+        return node
+
+    def update(self, ctx: Dict, now: float) -> None:
+        for node in self.nodes.values():
+            node.update(ctx, now)
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+
+def _app_metric(field: str, app: str) -> Callable:
+    def value(ctx):
+        info = ctx["app_info"](app)
+        if info is None:
+            return 0
+        return int((ctx["now"] - info.get(field, ctx["now"])) / 60)
+
+    return value
+
+
+def _compile(node, registry: StateRegistry, values: List[Callable]):
+    """Returns (closure, is_boolean); values collects the value closures in order"""
+    kind = node[0]
+
+    if kind == "number":
+        constant = node[1]
+        return (lambda ctx: constant), False
+
+    if kind == "metric":
+        name = node[1]
+
+        def metric(ctx):
+            return ctx.get(name)
+
+        values.append(metric)
+        return metric, False
+
+    if kind == "app_metric":
+        fn = _app_metric(APP_METRICS[node[1]], node[2])
+        values.append(fn)
+        return fn, False
+
+    if kind == "aggregate":
+        source = _compile_number(node[2], registry, [])
+        window = registry.get(
+            _canonical(node), lambda: _Window(node[1], source, node[3])
+        )
+
+        def aggregate(ctx):
+            return window.value
+
+        values.append(aggregate)
+        return aggregate, False
+
+    if kind == "arith":
+        left = _compile_number(node[2], registry, values)
+        right = _compile_number(node[3], registry, values)
+        op = ARITHMETIC[node[1]]
+
+        def arith(ctx):
+            a, b = left(ctx), right(ctx)
+            if a is None or b is None:
+                return None
+            try:
+                return op(a, b)
+            except ZeroDivisionError:
+                return None
+
+        return arith, False
+
+    if kind == "compare":
+        left = _compile_number(node[2], registry, values)
+        right = _compile_number(node[3], registry, values)
+        op = COMPARISONS[node[1]]
+
+        def compare(ctx):
+            a, b = left(ctx), right(ctx)
+            # A metric that doesn't apply right now never matches
+            return a is not None and b is not None and op(a, b)
+
+        return compare, True
+
+    if kind in ("and", "or"):
+        parts = tuple(_compile_boolean(n, registry, values) for n in node[1])
+        if kind == "and":
+            return (lambda ctx: all(part(ctx) for part in parts)), True
+        return (lambda ctx: any(part(ctx) for part in parts)), True
+
+    if kind == "not":
+        inner = _compile_boolean(node[1], registry, values)
+        return (lambda ctx: not inner(ctx)), True
+
+    if kind == "for":
+        source = _compile_boolean(node[1], registry, values)
+        hold = registry.get(_canonical(node), lambda: _Hold(source, node[2]))
+        return (lambda ctx: hold.value), True
+
+    raise ExpressionError(f"unknown node {kind}")
+
+
+def _compile_number(node, registry, values) -> Callable:
+    fn, is_boolean = _compile(node, registry, values)
+    if is_boolean:
+        raise ExpressionError(f"expected a number, got a condition: {_canonical(node)}")
+    return fn
+
+
+def _compile_boolean(node, registry, values) -> Callable:
+    fn, is_boolean = _compile(node, registry, values)
+    if not is_boolean:
+        raise ExpressionError(
+            f"expected a condition, got a number: {_canonical(node)} "
+            "(compare it with >, <, == ...)"
+        )
+    return fn
+
+
+class CompiledExpression:
+    """An expression ready to evaluate against a tick's metrics.
+
+    ``test(ctx)`` says whether it holds and ``value(ctx)`` is its first
+    metric (for the {value} placeholder). Windows and holds live in the
+    registry, whose ``update(ctx, now)`` must run once per tick first.
+    """
+
+    def __init__(self, text: str, registry: Optional[StateRegistry] = None):
+        self.text = text
+        self.registry = registry if registry is not None else StateRegistry()
+        tree = parse_expression(text)
+        values: List[Callable] = []
+        self.test = _compile_boolean(tree, self.registry, values)
+        self.value = values[0] if values else (lambda ctx: None)
+
+
+def validate_expression(text: str) -> Optional[str]:
+    """Error message for an invalid expression, or None if it compiles"""
+    try:
+        CompiledExpression(text)
+    except ExpressionError as e:
+        return str(e)
+    return None
@@ -0,0 +1,208 @@
+import bisect
+import operator
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .expressions import CompiledExpression, StateRegistry
+
+# Alert types and the metric each one compares against its threshold
+ALERT_TYPES = ("keystroke_count", "session_time", "app_time", "idle_time")
+
+# Alerts of this type carry an "expression" instead of condition/threshold
+EXPRESSION_TYPE = "expression"
+
+CONDITIONS = {
+    "greater_than": operator.gt,
+    "less_than": operator.lt,
+    "equal_to": operator.eq,
+}
+
+# The same alert doesn't fire again within this many seconds
+ALERT_COOLDOWN_SEC = 300
+
+
+def _number(value, field: str) -> float:
+    if isinstance(value, bool):
+        raise ValueError(f"{field} must be a number")
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"{field} must be a number, got {value!r}")
+
+
+class AlertRule:
+    """One custom alert compiled for evaluation.
+
+    Keeps a reference to the alert's dict, so trigger statistics written
+    to it (last_triggered, trigger_count) are saved with the alert list.
+    """
+
+    __slots__ = (
+        "alert",
+        "position",
+        "type",
+        "condition",
+        "threshold",
+        "test",
+        "expression",
+    )
+
+    def __init__(
+        self, alert: Dict, position: int, registry: Optional[StateRegistry] = None
+    ):
+        self.alert = alert
+        self.position = position
+        self.type = alert.get("type", "")
+        self.expression = None
+        if self.type == EXPRESSION_TYPE:
+            self.expression = CompiledExpression(alert.get("expression"), registry)
+            self.condition = None
+            self.threshold = None
+            self.test = self.expression.test
+            return
+
+        alert_type = self.type
+        if alert_type not in ALERT_TYPES:
+            raise ValueError(f"unknown alert type: {alert_type!r}")
+        condition = alert.get("condition", "greater_than")
+        if condition not in CONDITIONS:
+            raise ValueError(f"unknown condition: {condition!r}")
+
+        self.condition = condition
+        self.threshold = _number(alert.get("threshold", 0), "threshold")
+        compare = CONDITIONS[condition]
+        threshold = self.threshold
+        # Expression rules test the tick's metrics, the others one value
+        self.test: Callable = lambda value: compare(value, threshold)
+
+    @property
+    def name(self) -> str:
+        return self.alert.get("name", "Custom Alert")
+
+    @property
+    def app_filter(self) -> str:
+        return self.alert.get("app_filter", "") or ""
+
+    def cooling_down(self, now: float) -> bool:
+        last_triggered = self.alert.get("last_triggered")
+        return bool(last_triggered) and now - last_triggered < ALERT_COOLDOWN_SEC
+
+    def format_message(self, value, current_app: Optional[str]) -> str:
+        """The alert's message with {threshold}, {app} and {value} filled in"""
+        message = self.alert.get("message", "Custom alert triggered")
+        message = message.replace("{threshold}", str(self.alert.get("threshold", 0)))
+        message = message.replace(
+            "{app}", self.app_filter or current_app or "application"
+        )
+        if isinstance(value, float):
+            value = int(value) if value.is_integer() else round(value, 1)
+        return message.replace("{value}", str(value))
+
+
+class _ThresholdIndex:
+    """Rules comparing one metric, sorted so a value finds its matches directly"""
+
+    def __init__(self, rules: List[AlertRule]):
+        greater = sorted(
+            (r for r in rules if r.condition == "greater_than"),
+            key=lambda r: r.threshold,
+        )
+        less = sorted(
+            (r for r in rules if r.condition == "less_than"),
+            key=lambda r: r.threshold,
+        )
+        self._greater = greater
+        self._greater_keys = [r.threshold for r in greater]
+        self._less = less
+        self._less_keys = [r.threshold for r in less]
+        self._equal: Dict[float, List[AlertRule]] = {}
+        for rule in rules:
+            if rule.condition == "equal_to":
+                self._equal.setdefault(rule.threshold, []).append(rule)
+
+    def matching(self, value) -> List[AlertRule]:
+        """Rules whose condition holds for value"""
+        # threshold < value
+        matches = self._greater[: bisect.bisect_left(self._greater_keys, value)]
+        # threshold > value
+        matches += self._less[bisect.bisect_right(self._less_keys, value) :]
+        matches += self._equal.get(value, [])
+        return matches
+
+
+class RuleEngine:
+    """Custom alerts compiled once and indexed by type and app filter.
+
+    Each tick gets the metrics once (``evaluate(metrics, now)``) and only
+    looks at the rules of each metric whose threshold the value has
+    crossed: keystroke and session rules in one index per type, app_time
+    rules only for the current app. Expression rules are tested every
+    tick, after their shared windows and holds have taken the tick's
+    sample. Alerts that don't compile are left out and listed in
+    ``errors``. Pass the engine being replaced as ``previous`` to keep
+    windows and holds running across a reload.
+    """
+
+    def __init__(self, alerts: List[Dict], previous: Optional["RuleEngine"] = None):
+        self.source = alerts
+        self.enabled_count = 0
+        self.errors: List[Tuple[str, str]] = []
+        self.rules: List[AlertRule] = []
+        self.registry = StateRegistry(previous.registry if previous else None)
+        self._expressions: List[AlertRule] = []
+
+        by_type: Dict[str, List[AlertRule]] = {t: [] for t in ALERT_TYPES}
+        by_app: Dict[str, List[AlertRule]] = {}
+        for position, alert in enumerate(alerts):
+            if not alert.get("enabled", True):
+                continue
+            self.enabled_count += 1
+            try:
+                rule = AlertRule(alert, position, self.registry)
+            except ValueError as e:
+                self.errors.append((alert.get("name", "Custom Alert"), str(e)))
+                continue
+            self.rules.append(rule)
+            if rule.expression is not None:
+                self._expressions.append(rule)
+            elif rule.type == "app_time":
+                # Only fires for the app it names
+                if rule.app_filter:
+                    by_app.setdefault(rule.app_filter, []).append(rule)
+            else:
+                by_type[rule.type].append(rule)
+
+        self._by_type = {t: _ThresholdIndex(rules) for t, rules in by_type.items()}
+        self._by_app = {app: _ThresholdIndex(rules) for app, rules in by_app.items()}
+
+    def __len__(self) -> int:
+        return len(self.rules)
+
+    def evaluate(self, metrics: Dict, now: float) -> List[Tuple[AlertRule, float]]:
+        """(rule, value) for every rule that fires, in the alert list's order.
+
+        metrics holds "app" (the current app) and a value per alert type;
+        None means the metric doesn't apply right now (e.g. app_time when
+        the current app isn't tracked). Expressions also use "switch_count"
+        and "app_info" (app name -> the tracker's open-app entry or None).
+        """
+        fired = []
+        if self._expressions:
+            metrics["now"] = now
+            self.registry.update(metrics, now)
+            for rule in self._expressions:
+                if rule.test(metrics):
+                    fired.append((rule, rule.expression.value(metrics)))
+
+        for alert_type, index in self._by_type.items():
+            value = metrics.get(alert_type)
+            if value is not None:
+                fired.extend((rule, value) for rule in index.matching(value))
+
+        app_index = self._by_app.get(metrics.get("app"))
+        value = metrics.get("app_time")
+        if app_index is not None and value is not None:
+            fired.extend((rule, value) for rule in app_index.matching(value))
+
+        fired = [(rule, value) for rule, value in fired if not rule.cooling_down(now)]
+        fired.sort(key=lambda item: item[0].position)
+        return fired
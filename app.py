@@ -1,12 +1,34 @@
-from flask import Flask, render_template, jsonify, request
+from flask import Flask, Response, render_template, jsonify, request
+import copy
+import hashlib
 import json
 import os
 import time
-from datetime import datetime
+from datetime import datetime, timezone
 import subprocess
-import winreg
+
+try:
+    import winreg
+except ImportError:  # Windows-only; ensure_app_id_registered then reports failure
+    winreg = None
 from pathlib import Path
 from ai_analysis import get_scheduler, init_scheduler, start_scheduler, stop_scheduler
+from alerts import EXPRESSION_TYPE, AlertRule
+from storage import (
+    get_activity_log,
+    get_alert_events_store,
+    export_chunks,
+    get_daily_archive,
+    get_insights_store,
+    get_read_cache,
+    get_session_insights_store,
+    get_session_store,
+    get_usage_rollups,
+    file_version,
+    read_daily_summaries,
+    read_live_status,
+    signal_config_change,
+)
 
 app = Flask(__name__)
 
@@ -14,14 +36,24 @@ app = Flask(__name__)
 SNAPALERT_APP_ID = "SnapAlert.ProductivityMonitor"
 
 # File paths
-LOG_FILE = "data/logs.json"
 STATUS_FILE = "data/status.json"
-SESSIONS_FILE = "data/sessions.json"
 ALERT_CONFIG_FILE = "data/alert_config.json"
 CUSTOM_ALERTS_FILE = "data/custom_alerts.json"
 AI_ANALYSIS_CONFIG_FILE = "data/ai_analysis_config.json"
-INSIGHTS_FILE = "data/insights.json"
-SESSION_INSIGHTS_FILE = "data/session_insights.json"
+
+# Live event stream (/api/stream)
+STREAM_CHECK_INTERVAL = 1  # seconds between change checks
+STREAM_KEEPALIVE_INTERVAL = 15  # seconds of silence before a keepalive comment
+STREAM_RETRY_MS = 5000  # how long browsers wait before reconnecting
+
+LOG_QUERY_DEFAULT_LIMIT = 100
+LOG_QUERY_MAX_LIMIT = 1000
+
+EXPORT_MIMETYPES = {"ndjson": "application/x-ndjson", "csv": "text/csv"}
+
+# Parsed data files and stores, re-read only when they change on disk.
+# Readers below return shared objects; copy before modifying.
+read_cache = get_read_cache()
 
 
 def ensure_app_id_registered():
@@ -64,21 +96,23 @@ def ensure_app_id_registered():
 
 
 def read_status():
-    """Read current status from status.json"""
+    """Read current status from status.json, overlaid with live tracker counters"""
     try:
-        if os.path.exists(STATUS_FILE):
-            with open(STATUS_FILE, "r") as f:
-                return json.load(f)
-        return {
-            "session_time": 0,
-            "keystrokes": 0,
-            "last_updated": datetime.now().isoformat(),
-            "open_apps": [],
-            "sessions": [],
-        }
+        status = read_cache.read_json(STATUS_FILE)
+        if status is not None:
+            # Shallow copy: only top-level keys are overlaid below
+            status = dict(status)
+        else:
+            status = {
+                "session_time": 0,
+                "keystrokes": 0,
+                "last_updated": datetime.now().isoformat(),
+                "open_apps": [],
+                "sessions": [],
+            }
     except Exception as e:
         print(f"Error reading status: {e}")
-        return {
+        status = {
             "session_time": 0,
             "keystrokes": 0,
             "last_updated": datetime.now().isoformat(),
@@ -86,14 +120,71 @@ def read_status():
             "sessions": [],
         }
 
+    # status.json is only rewritten every 30 seconds; the shared-memory
+    # channel carries the live counters between those writes.
+    live = read_live_status("data")
+    if live:
+        status["session_time"] = live["session_time"]
+        status["session_start_time"] = datetime.fromtimestamp(
+            live["session_start_time"]
+        ).isoformat()
+        status["keystrokes"] = live["keystrokes"]
+        status["current_app"] = live["current_app"]
+        status["last_updated"] = datetime.fromtimestamp(
+            live["last_updated"]
+        ).isoformat()
+
+    return status
+
 
 def read_sessions():
-    """Read all sessions from sessions.json"""
+    """Read all sessions from the session store"""
     try:
-        if os.path.exists(SESSIONS_FILE):
-            with open(SESSIONS_FILE, "r") as f:
-                return json.load(f)
+        store = get_session_store("data")
+        return read_cache.get("sessions", store.version(), store.read_all)
+    except Exception as e:
+        print(f"Error reading sessions: {e}")
         return []
+
+
+def read_session_totals():
+    """Completed session count/time overall and for today.
+
+    Comes from the tracker's per-day rollups; only before those exist are
+    the sessions themselves summed.
+    """
+    rollups = get_usage_rollups("data")
+    if rollups.built:
+        day_totals = rollups.day_totals()
+        today = day_totals.get(datetime.now().strftime("%Y%m%d"), {})
+        return {
+            "total_sessions": sum(t["sessions"] for t in day_totals.values()),
+            "total_time": sum(t["session_time"] for t in day_totals.values()),
+            "today_sessions": today.get("sessions", 0),
+            "today_time": today.get("session_time", 0),
+        }
+
+    sessions = read_sessions()
+    today = datetime.now().date()
+    today_sessions = [
+        session
+        for session in sessions
+        if datetime.fromisoformat(session.get("start", "")).date() == today
+    ]
+    return {
+        "total_sessions": len(sessions),
+        "total_time": sum(session.get("duration_sec", 0) for session in sessions),
+        "today_sessions": len(today_sessions),
+        "today_time": sum(
+            session.get("duration_sec", 0) for session in today_sessions
+        ),
+    }
+
+
+def read_recent_sessions(n=10):
+    """Read the newest n sessions"""
+    try:
+        return get_session_store("data").tail(n)
     except Exception as e:
         print(f"Error reading sessions: {e}")
         return []
@@ -102,17 +193,71 @@ def read_sessions():
 def read_recent_logs(n=10):
     """Read recent log entries"""
     try:
-        if os.path.exists(LOG_FILE):
-            with open(LOG_FILE, "r") as f:
-                lines = f.readlines()
-            logs = [json.loads(line.strip()) for line in lines[-n:] if line.strip()]
-            return logs
-        return []
+        return get_activity_log("data").tail(n)
     except Exception as e:
         print(f"Error reading logs: {e}")
         return []
 
 
+# endpoint -> (etag, time the data was first seen at that version)
+_endpoint_versions = {}
+
+
+def conditional_json(endpoint, version, build):
+    """Answer a poll with 304 when the data hasn't changed since the client's copy.
+
+    ``version`` is a cheap fingerprint of everything the response is built
+    from (file stats, store sequence numbers). ``build`` is only called to
+    produce the full JSON response when that fingerprint has changed or the
+    client doesn't hold the current version.
+    """
+    etag = hashlib.sha1(repr(version).encode("utf-8")).hexdigest()
+
+    known = _endpoint_versions.get(endpoint)
+    if known and known[0] == etag:
+        last_modified = known[1]
+    else:
+        last_modified = datetime.now(timezone.utc).replace(microsecond=0)
+        _endpoint_versions[endpoint] = (etag, last_modified)
+
+    not_modified = False
+    if request.if_none_match:
+        not_modified = request.if_none_match.contains_weak(etag)
+    elif request.if_modified_since:
+        not_modified = last_modified <= request.if_modified_since
+
+    if not_modified:
+        response = app.response_class(status=304)
+    else:
+        response = build()
+
+    response.set_etag(etag)
+    response.last_modified = last_modified
+    # Let browsers keep the body but revalidate on every poll
+    response.cache_control.no_cache = True
+    return response
+
+
+def stats_version():
+    """Data version of everything /api/stats is built from.
+
+    The live counters (session time, keystrokes, current app) change every
+    few seconds and are left out: /api/stream pushes them as session_tick
+    events, so they would only keep the ETag from ever matching.
+    """
+    return (
+        datetime.now().date().isoformat(),
+        file_version(STATUS_FILE),
+        get_session_store("data").version(),
+        get_activity_log("data").version(),
+        file_version(CUSTOM_ALERTS_FILE),
+        file_version(AI_ANALYSIS_CONFIG_FILE),
+        get_insights_store("data").version(),
+        get_session_insights_store("data").version(),
+        get_usage_rollups("data").version(),
+    )
+
+
 @app.route("/")
 def dashboard():
     """Main dashboard page"""
@@ -122,30 +267,24 @@ def dashboard():
 @app.route("/api/stats")
 def get_stats():
     """API endpoint for current stats"""
+    return conditional_json("stats", stats_version(), build_stats)
+
+
+def build_stats():
+    """Build the full /api/stats response"""
     status = read_status()
-    sessions = read_sessions()
+    session_totals = read_session_totals()
     recent_logs = read_recent_logs(5)
 
     # Get current session time
     current_session_time = status.get("session_time", 0)
 
     # Calculate total time from all completed sessions + current session
-    completed_sessions_time = sum(
-        session.get("duration_sec", 0) for session in sessions
-    )
+    completed_sessions_time = session_totals["total_time"]
     total_time = completed_sessions_time + current_session_time
 
-    # Get today's sessions
-    today = datetime.now().date()
-    today_sessions = [
-        session
-        for session in sessions
-        if datetime.fromisoformat(session.get("start", "")).date() == today
-    ]
-    today_completed_time = sum(
-        session.get("duration_sec", 0) for session in today_sessions
-    )
-    today_time = today_completed_time + current_session_time
+    # Today's completed sessions + current session
+    today_time = session_totals["today_time"] + current_session_time
 
     # Debug logging
     print(
@@ -164,18 +303,20 @@ def get_stats():
             "open_apps": status.get("open_apps", []),
             "open_apps_details": status.get("open_apps_details", {}),
             "current_app": status.get("current_app", ""),
-            "total_sessions": len(sessions),
+            "total_sessions": session_totals["total_sessions"],
             "total_time": total_time,
-            "today_sessions": len(today_sessions),
+            "today_sessions": session_totals["today_sessions"],
             "today_time": today_time,
             "recent_logs": recent_logs,
             "last_updated": status.get("last_updated", ""),
-            "sessions": sessions[-10:],  # Last 10 sessions
+            "sessions": read_recent_sessions(10),  # Last 10 sessions
             "browser_data": status.get("browser_data", {}),
             "alert_config": status.get("alert_config", {}),
             "custom_alerts": read_custom_alerts(),
-            "ai_insights": read_insights()[-1],  # Last 10 insights
-            "ai_session_insights": read_session_insights()[-1],
+            "ai_insights": read_latest_insight(get_insights_store("data")),
+            "ai_session_insights": read_latest_insight(
+                get_session_insights_store("data")
+            ),
             "ai_analysis_config": read_ai_analysis_config(),
         }
     )
@@ -184,23 +325,248 @@ def get_stats():
 @app.route("/api/sessions")
 def get_sessions():
     """API endpoint for all sessions"""
-    sessions = read_sessions()
-    return jsonify(sessions)
+    return conditional_json(
+        "sessions",
+        get_session_store("data").version(),
+        lambda: jsonify(read_sessions()),
+    )
+
+
+def parse_time_arg(value):
+    """Parse an epoch timestamp or ISO datetime query argument"""
+    if value is None or value == "":
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        return datetime.fromisoformat(value.replace("Z", "+00:00")).timestamp()
 
 
 @app.route("/api/logs")
 def get_logs():
-    """API endpoint for recent logs"""
-    logs = read_recent_logs(20)
-    return jsonify(logs)
+    """API endpoint for recent logs, or a page of a time/app query.
+
+    Without arguments the last 20 entries are returned. With any of
+    from, to, app, limit or cursor, a page of matching entries is
+    returned oldest first along with the cursor for the next page.
+    """
+    query_args = ("from", "to", "app", "limit", "cursor")
+    if not any(arg in request.args for arg in query_args):
+        return conditional_json(
+            "logs",
+            get_activity_log("data").version(),
+            lambda: jsonify(read_recent_logs(20)),
+        )
+
+    try:
+        start_ts = parse_time_arg(request.args.get("from"))
+        end_ts = parse_time_arg(request.args.get("to"))
+        limit = request.args.get("limit", LOG_QUERY_DEFAULT_LIMIT, type=int)
+        limit = max(1, min(limit, LOG_QUERY_MAX_LIMIT))
+        logs, next_cursor = get_activity_log("data").query(
+            start_ts,
+            end_ts,
+            request.args.get("app") or None,
+            limit,
+            request.args.get("cursor") or None,
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    return jsonify(
+        {"success": True, "logs": logs, "count": len(logs), "next_cursor": next_cursor}
+    )
+
+
+@app.route("/api/export")
+def export_data():
+    """Stream logs, sessions or browser events for a time range as NDJSON or CSV.
+
+    Query arguments: kind (logs, sessions or browser), format (ndjson or
+    csv), from and to (epoch seconds or ISO dates). The body is gzipped
+    when the client accepts it, unless gzip=0 is passed.
+    """
+    kind = request.args.get("kind", "logs")
+    export_format = request.args.get("format", "ndjson")
+    use_gzip = (
+        "gzip" in request.headers.get("Accept-Encoding", "")
+        and request.args.get("gzip", "1") != "0"
+    )
+
+    try:
+        chunks = export_chunks(
+            kind,
+            export_format,
+            "data",
+            parse_time_arg(request.args.get("from")),
+            parse_time_arg(request.args.get("to")),
+            gzip=use_gzip,
+        )
+    except ValueError as e:
+        return jsonify({"success": False, "message": str(e)}), 400
+
+    headers = {
+        "Content-Disposition": f'attachment; filename="snapalert-{kind}.{export_format}"',
+        "Vary": "Accept-Encoding",
+    }
+    if use_gzip:
+        headers["Content-Encoding"] = "gzip"
+    return Response(chunks, mimetype=EXPORT_MIMETYPES[export_format], headers=headers)
+
+
+@app.route("/api/history")
+def get_history():
+    """API endpoint for per-day totals (closed days come from the daily archive)"""
+    days_back = min(request.args.get("days", 7, type=int), 90)
+    activity_log = get_activity_log("data")
+    archive = get_daily_archive("data")
+
+    def build():
+        try:
+            summaries = read_daily_summaries(activity_log, archive, days_back)
+        except Exception as e:
+            print(f"Error reading history: {e}")
+            summaries = []
+        return jsonify({"days": summaries})
+
+    return conditional_json(
+        f"history:{days_back}",
+        (
+            datetime.now().date().isoformat(),
+            activity_log.version(),
+            tuple(archive.days()),
+        ),
+        build,
+    )
+
+
+def sse_event(event, data):
+    """Format one Server-Sent Event"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def stream_events():
+    """Yield small typed events as the tracker's data changes.
+
+    Each check only looks at cheap data versions (the live status sequence
+    and file stats); records are read only when something actually changed.
+    """
+    alert_store = get_alert_events_store("data")
+    insight_stores = {
+        "analysis": get_insights_store("data"),
+        "session": get_session_insights_store("data"),
+    }
+    config_readers = {
+        ALERT_CONFIG_FILE: ("alert_config", read_alert_config),
+        CUSTOM_ALERTS_FILE: ("custom_alerts", read_custom_alerts),
+        AI_ANALYSIS_CONFIG_FILE: ("ai_analysis_config", read_ai_analysis_config),
+    }
+
+    last_sequence = None
+    last_app = None
+    alerts_version = alert_store.version()
+    latest_alert = alert_store.latest()
+    last_alert_time = latest_alert.get("timestamp", "") if latest_alert else ""
+    insight_versions = {kind: store.version() for kind, store in insight_stores.items()}
+    config_versions = {path: file_version(path) for path in config_readers}
+    last_sent = time.time()
+
+    yield f"retry: {STREAM_RETRY_MS}\n\n"
+
+    while True:
+        events = []
+
+        live = read_live_status("data")
+        if live and live["sequence"] != last_sequence:
+            last_sequence = live["sequence"]
+            events.append(
+                (
+                    "session_tick",
+                    {
+                        "session_time": live["session_time"],
+                        "session_start_time": datetime.fromtimestamp(
+                            live["session_start_time"]
+                        ).isoformat(),
+                        "keystrokes": live["keystrokes"],
+                        "current_app": live["current_app"],
+                        "open_app_count": live["open_app_count"],
+                        "browser_tab_count": live["browser_tab_count"],
+                    },
+                )
+            )
+            current_app = live["current_app"] or ""
+            if last_app is not None and current_app != last_app:
+                events.append(("app_switch", {"from": last_app, "to": current_app}))
+            last_app = current_app
+
+        version = alert_store.version()
+        if version != alerts_version:
+            alerts_version = version
+            for alert in alert_store.tail(20):
+                if alert.get("timestamp", "") > last_alert_time:
+                    last_alert_time = alert.get("timestamp", "")
+                    events.append(("alert_fired", alert))
+
+        for kind, store in insight_stores.items():
+            version = store.version()
+            if version != insight_versions[kind]:
+                insight_versions[kind] = version
+                events.append(
+                    ("new_insight", {"kind": kind, "insight": store.latest()})
+                )
+
+        for path, (name, read_config) in config_readers.items():
+            version = file_version(path)
+            if version != config_versions[path]:
+                config_versions[path] = version
+                events.append(
+                    ("config_changed", {"name": name, "config": read_config()})
+                )
+
+        if events:
+            yield "".join(sse_event(event, data) for event, data in events)
+            last_sent = time.time()
+        elif time.time() - last_sent >= STREAM_KEEPALIVE_INTERVAL:
+            yield ": keepalive\n\n"
+            last_sent = time.time()
+
+        time.sleep(STREAM_CHECK_INTERVAL)
+
+
+@app.route("/api/stream")
+def stream():
+    """Server-Sent Events stream of live dashboard updates"""
+    return Response(
+        stream_events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.route("/api/cache/stats")
+def get_cache_stats():
+    """Hit/miss counters of the data file read cache"""
+    return jsonify(read_cache.stats())
+
+
+@app.route("/api/persistence/stats")
+def get_persistence_stats():
+    """Queue depth and write latency of the tracker's background writer"""
+    return jsonify(read_status().get("persistence", {}))
+
+
+@app.route("/api/duties/stats")
+def get_duty_stats():
+    """Run counts, run time and lateness of the tracker's periodic duties"""
+    return jsonify(read_status().get("duties", {}))
 
 
 def read_alert_config():
     """Read alert configuration"""
     try:
-        if os.path.exists(ALERT_CONFIG_FILE):
-            with open(ALERT_CONFIG_FILE, "r") as f:
-                return json.load(f)
+        config = read_cache.read_json(ALERT_CONFIG_FILE)
+        if config is not None:
+            return config
         return {
             "enabled": True,
             "whitelist": [],
@@ -221,6 +587,8 @@ def save_alert_config(config):
     try:
         with open(ALERT_CONFIG_FILE, "w") as f:
             json.dump(config, f, indent=2)
+        # The tracker keeps these in memory
+        signal_config_change("data", "alert_config")
         return True
     except Exception as e:
         print(f"Error saving alert config: {e}")
@@ -230,20 +598,27 @@ def save_alert_config(config):
 def read_custom_alerts():
     """Read custom alerts from file"""
     try:
-        if os.path.exists(CUSTOM_ALERTS_FILE):
-            with open(CUSTOM_ALERTS_FILE, "r") as f:
-                return json.load(f)
-        return []
+        return read_cache.read_json(CUSTOM_ALERTS_FILE, default=[])
     except Exception as e:
         print(f"Error reading custom alerts: {e}")
         return []
 
 
+def validate_custom_alert(alert):
+    """Why the tracker couldn't compile an alert, or None if it can"""
+    try:
+        AlertRule(alert, 0)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
 def save_custom_alerts(alerts):
     """Save custom alerts to file"""
     try:
         with open(CUSTOM_ALERTS_FILE, "w") as f:
             json.dump(alerts, f, indent=2)
+        signal_config_change("data", "custom_alerts")
         return True
     except Exception as e:
         print(f"Error saving custom alerts: {e}")
@@ -253,9 +628,9 @@ def save_custom_alerts(alerts):
 def read_ai_analysis_config():
     """Read AI analysis configuration"""
     try:
-        if os.path.exists(AI_ANALYSIS_CONFIG_FILE):
-            with open(AI_ANALYSIS_CONFIG_FILE, "r") as f:
-                return json.load(f)
+        config = read_cache.read_json(AI_ANALYSIS_CONFIG_FILE)
+        if config is not None:
+            return config
         return {
             "enabled": True,
             "analysis_interval_minutes": 20,
@@ -280,23 +655,29 @@ def save_ai_analysis_config(config):
 
 
 def read_insights():
-    """Read AI insights from file"""
+    """Read AI insights from the insights store"""
     try:
-        if os.path.exists(INSIGHTS_FILE):
-            with open(INSIGHTS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return []
+        store = get_insights_store("data")
+        return read_cache.get("insights", store.version(), store.read_all)
     except Exception as e:
         print(f"Error reading insights: {e}")
         return []
-    
+
+
+def read_latest_insight(store):
+    """Read the newest record of an insights store without loading the rest"""
+    try:
+        return store.latest()
+    except Exception as e:
+        print(f"Error reading latest insight: {e}")
+        return None
+
+
 def read_session_insights():
-    """Read AI session insights from file"""
+    """Read AI session insights from the session insights store"""
     try:
-        if os.path.exists(SESSION_INSIGHTS_FILE):
-            with open(SESSION_INSIGHTS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        return []
+        store = get_session_insights_store("data")
+        return read_cache.get("session_insights", store.version(), store.read_all)
     except Exception as e:
         print(f"Error reading session insights: {e}")
         return []
@@ -335,7 +716,7 @@ def snooze_app():
         if not app_name:
             return jsonify({"success": False, "message": "App name is required"}), 400
 
-        config = read_alert_config()
+        config = copy.deepcopy(read_alert_config())
         snooze_until = time.time() + (minutes * 60)
         config["snooze_until"][app_name] = snooze_until
 
@@ -365,7 +746,7 @@ def manage_whitelist():
         if not app_name:
             return jsonify({"success": False, "message": "App name is required"}), 400
 
-        config = read_alert_config()
+        config = copy.deepcopy(read_alert_config())
         whitelist = config.get("whitelist", [])
 
         if action == "add" and app_name not in whitelist:
@@ -406,7 +787,7 @@ def update_break_reminder():
                 }
             ), 400
 
-        config = read_alert_config()
+        config = copy.deepcopy(read_alert_config())
         config["break_reminders_enabled"] = enabled
         config["break_reminder_interval"] = interval
 
@@ -439,7 +820,10 @@ def create_custom_alert():
         data = request.get_json()
 
         # Validate required fields
-        required_fields = ["name", "type", "condition", "threshold", "message"]
+        if data.get("type") == EXPRESSION_TYPE:
+            required_fields = ["name", "type", "expression", "message"]
+        else:
+            required_fields = ["name", "type", "condition", "threshold", "message"]
         for field in required_fields:
             if field not in data:
                 return jsonify(
@@ -450,11 +834,12 @@ def create_custom_alert():
         new_alert = {
             "id": str(int(time.time() * 1000)),  # Use timestamp as ID
             "name": data["name"],
-            "type": data[
-                "type"
-            ],  # "session_time", "app_time", "keystroke_count", "break_reminder"
-            "condition": data["condition"],  # "greater_than", "less_than", "equal_to"
-            "threshold": data["threshold"],  # numeric value
+            # "session_time", "app_time", "keystroke_count", "idle_time", "expression"
+            "type": data["type"],
+            "condition": data.get(
+                "condition", "greater_than"
+            ),  # "greater_than", "less_than", "equal_to"
+            "threshold": data.get("threshold", 0),  # numeric value
             "message": data["message"],
             "enabled": data.get("enabled", True),
             "app_filter": data.get("app_filter", ""),  # Optional app name filter
@@ -462,9 +847,18 @@ def create_custom_alert():
             "last_triggered": None,
             "trigger_count": 0,
         }
+        if new_alert["type"] == EXPRESSION_TYPE:
+            # e.g. "app_time(Code.exe) > 90 and keystrokes_per_min < 5 for 10m"
+            new_alert["expression"] = data["expression"]
+
+        error = validate_custom_alert(new_alert)
+        if error:
+            return jsonify(
+                {"success": False, "message": f"Invalid alert: {error}"}
+            ), 400
 
         # Load existing alerts and add new one
-        alerts = read_custom_alerts()
+        alerts = copy.deepcopy(read_custom_alerts())
         alerts.append(new_alert)
 
         if save_custom_alerts(alerts):
@@ -483,7 +877,7 @@ def update_custom_alert(alert_id):
     """API endpoint to update a custom alert"""
     try:
         data = request.get_json()
-        alerts = read_custom_alerts()
+        alerts = copy.deepcopy(read_custom_alerts())
 
         # Find the alert to update
         alert_index = None
@@ -504,11 +898,18 @@ def update_custom_alert(alert_id):
             "message",
             "enabled",
             "app_filter",
+            "expression",
         ]
         for field in updatable_fields:
             if field in data:
                 alerts[alert_index][field] = data[field]
 
+        error = validate_custom_alert(alerts[alert_index])
+        if error:
+            return jsonify(
+                {"success": False, "message": f"Invalid alert: {error}"}
+            ), 400
+
         if save_custom_alerts(alerts):
             return jsonify(
                 {
@@ -524,6 +925,16 @@ def update_custom_alert(alert_id):
         return jsonify({"success": False, "message": str(e)}), 400
 
 
+@app.route("/api/custom-alerts/validate", methods=["POST"])
+def validate_custom_alert_endpoint():
+    """API endpoint to check an alert (or an expression) without saving it"""
+    data = request.get_json(silent=True) or {}
+    if "type" not in data and "expression" in data:
+        data = {"type": EXPRESSION_TYPE, **data}
+    error = validate_custom_alert(data)
+    return jsonify({"valid": error is None, "message": error or "OK"})
+
+
 @app.route("/api/custom-alerts/<alert_id>", methods=["DELETE"])
 def delete_custom_alert(alert_id):
     """API endpoint to delete a custom alert"""
@@ -550,7 +961,7 @@ def delete_custom_alert(alert_id):
 def toggle_custom_alert(alert_id):
     """API endpoint to toggle a custom alert on/off"""
     try:
-        alerts = read_custom_alerts()
+        alerts = copy.deepcopy(read_custom_alerts())
 
         # Find the alert to toggle
         alert_index = None
@@ -952,15 +1363,19 @@ def test_ollama_connection():
 def get_ai_insights():
     """Get AI insights"""
     try:
-        insights = read_insights()
+        version = get_insights_store("data").version()
+    except Exception as e:
+        return jsonify({"success": False, "message": str(e)}), 400
 
+    def build():
+        insights = read_insights()
         return jsonify(
             {"success": True, "insights": insights, "total_count": len(insights)}
         )
 
-    except Exception as e:
-        return jsonify({"success": False, "message": str(e)}), 400
-    
+    return conditional_json("ai_insights", version, build)
+
+
 @app.route("/api/ai-analysis/session_insights")
 def get_ai_insights_sessions():
     """Get AI session insights"""
@@ -979,14 +1394,14 @@ def get_ai_insights_sessions():
 def get_ai_insights_limited(limit):
     """Get limited number of recent AI insights"""
     try:
-        insights = read_insights()
-        limited_insights = insights[-limit:] if limit > 0 else insights
+        store = get_insights_store("data")
+        limited_insights = store.tail(limit) if limit > 0 else store.read_all()
 
         return jsonify(
             {
                 "success": True,
                 "insights": limited_insights,
-                "total_count": len(insights),
+                "total_count": store.count(),
                 "returned_count": len(limited_insights),
             }
         )
@@ -1006,7 +1421,7 @@ if __name__ == "__main__":
     # Initialize AI analysis scheduler
     try:
         print("🤖 Initializing AI analysis scheduler...")
-        config = read_ai_analysis_config()
+        config = copy.deepcopy(read_ai_analysis_config())
         scheduler = init_scheduler(config)
 
         if config.get("enabled", True):
@@ -0,0 +1,315 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the storage and API read paths
+
+Builds data directories of 10k, 1M and 10M activity log events (kept
+under benchmarks/.data and reused while the parameters match), then times
+the dashboard and analysis read paths against each one:
+
+- read_recent_logs: the dashboard's recent activity (app.read_recent_logs)
+- get_stats: GET /api/stats through the Flask test client
+- get_sessions: GET /api/sessions
+- prepare_analysis_data: ProductivityAnalyzer.prepare_analysis_data
+- get_browser_stats: BrowserTracker.get_browser_stats on the latest tabs
+
+Each benchmark records its first call, p50/p99 of the following calls and
+the peak Python memory of one call (tracemalloc). Timings only compare on
+the same machine, so no baseline is shipped: the first run writes
+benchmarks/baseline.json, and later runs are compared against it and exit
+with 1 on a regression:
+
+    python benchmarks/read_paths.py --scales 10k,1m
+    python benchmarks/read_paths.py --update-baseline
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import math
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the project modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+SCALES = {"10k": 10_000, "1m": 1_000_000, "10m": 10_000_000}
+
+BENCHMARK_DIR = Path(__file__).parent
+DEFAULT_DATA_ROOT = BENCHMARK_DIR / ".data"
+DEFAULT_BASELINE = BENCHMARK_DIR / "baseline.json"
+
+# Bumped when build_dataset changes, so cached data directories are rebuilt
+DATASET_VERSION = 2
+DATASET_MARKER = "benchmark_dataset.json"
+
+# A result is a regression when it is this much worse than the baseline...
+DEFAULT_THRESHOLD = 0.25
+# ...and worse by more than this (timer and allocator noise on tiny values)
+MIN_REGRESSION_MS = 1.0
+MIN_REGRESSION_KB = 64
+
+# Days of history in a dataset: one per 1,000 events, at most a year
+EVENTS_PER_DAY = 1000
+MAX_DAYS = 365
+
+
+def build_dataset(data_dir, events, seed=0):
+    """Generate about `events` activity log entries plus sessions, browser
+    events, status and insights in data_dir, ending now so recent reads
+    find data (see workload.py)"""
+    from workload import expected_entries_per_day, generate, load_profile
+
+    days = min(MAX_DAYS, max(1, events // EVENTS_PER_DAY))
+    profile = load_profile(overrides={"days": days})
+    # Scale the switch rate so the period holds about `events` entries
+    profile["switches_per_hour"] *= events / days / expected_entries_per_day(profile)
+    return generate(data_dir, profile, seed)
+
+
+def ensure_dataset(data_root, scale, seed):
+    """Directory holding the dataset for a scale, built if not cached"""
+    events = SCALES[scale]
+    root = Path(data_root) / f"{scale}-seed{seed}"
+    marker = root / DATASET_MARKER
+    wanted = {"version": DATASET_VERSION, "events": events, "seed": seed}
+    if marker.exists():
+        with open(marker, "r", encoding="utf-8") as f:
+            if {k: v for k, v in json.load(f).items() if k in wanted} == wanted:
+                return root
+
+    if root.exists():
+        import shutil
+
+        shutil.rmtree(root)
+    print(f"Building {scale} dataset ({events:,} events) in {root}...")
+    started = time.perf_counter()
+    counts = build_dataset(root / "data", events, seed)
+    with open(marker, "w", encoding="utf-8") as f:
+        json.dump({**wanted, **counts}, f)
+    print(f"  built in {time.perf_counter() - started:.1f}s")
+    return root
+
+
+def percentile(samples, q):
+    """Nearest-rank percentile"""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(q / 100 * len(ordered)) - 1)]
+
+
+def measure(fn, repeat, max_seconds):
+    """First-call latency, p50/p99 of the warm calls and peak memory of one call"""
+    started = time.perf_counter()
+    fn()
+    first_ms = (time.perf_counter() - started) * 1000
+
+    samples = []
+    deadline = time.perf_counter() + max_seconds
+    while len(samples) < repeat and (not samples or time.perf_counter() < deadline):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "first_ms": round(first_ms, 3),
+        "p50_ms": round(percentile(samples, 50), 3),
+        "p99_ms": round(percentile(samples, 99), 3),
+        "peak_kb": round(peak / 1024, 1),
+        "samples": len(samples),
+    }
+
+
+def benchmark_cases():
+    """name -> zero-argument callable, run from inside a dataset directory"""
+    import app as dashboard
+    from ai_analysis import ProductivityAnalyzer
+    from browser_tracker import browser_tracker
+
+    client = dashboard.app.test_client()
+
+    def get(path):
+        def call():
+            response = client.get(path)
+            assert response.status_code == 200, (path, response.status_code)
+            return response
+
+        return call
+
+    analyzer = ProductivityAnalyzer({"data_dir": "data"})
+
+    # The tracker holds its open tabs in memory; load the newest ones
+    for event in browser_tracker.browser_log.tail(200):
+        tab = event.get("tab_data") or {}
+        if not tab.get("window_title"):
+            continue
+        browser_tracker.active_tabs[(tab["browser"], tab["window_title"])] = dict(tab)
+
+    return {
+        "read_recent_logs": lambda: dashboard.read_recent_logs(10),
+        "get_stats": get("/api/stats"),
+        "get_sessions": get("/api/sessions"),
+        "prepare_analysis_data": analyzer.prepare_analysis_data,
+        "get_browser_stats": browser_tracker.get_browser_stats,
+    }
+
+
+def run_worker(dataset_dir, repeat, max_seconds):
+    """Run every benchmark against one dataset; prints the results as JSON"""
+    os.chdir(dataset_dir)
+    results = {}
+    # The modules under test log to stdout; keep it for the JSON result
+    with contextlib.redirect_stdout(io.StringIO()):
+        cases = benchmark_cases()
+        for name, fn in cases.items():
+            results[name] = measure(fn, repeat, max_seconds)
+    try:
+        import resource
+
+        max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # kilobytes on Linux, bytes on macOS
+        results["max_rss_mb"] = round(
+            max_rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1
+        )
+    except ImportError:
+        pass
+    print(json.dumps(results))
+
+
+def run_scale(data_root, scale, seed, repeat, max_seconds):
+    """Benchmark one scale in a fresh interpreter (module caches start empty)"""
+    dataset = ensure_dataset(data_root, scale, seed)
+    print(f"Running {scale} benchmarks...")
+    completed = subprocess.run(
+        [
+            sys.executable,
+            str(Path(__file__).resolve()),
+            "--worker",
+            str(dataset),
+            "--repeat",
+            str(repeat),
+            "--max-seconds",
+            str(max_seconds),
+        ],
+        capture_output=True,
+        text=True,
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"{scale} benchmarks failed:\n{completed.stderr}")
+    results = json.loads(completed.stdout.strip().splitlines()[-1])
+    max_rss_mb = results.pop("max_rss_mb", None)
+    return {"events": SCALES[scale], "max_rss_mb": max_rss_mb, "benchmarks": results}
+
+
+def compare(baseline, current, threshold):
+    """Print current vs baseline; returns the regressions found"""
+    regressions = []
+    print(
+        f"\n{'scale':<6} {'benchmark':<22} {'p50 ms':>10} {'p99 ms':>10} "
+        f"{'peak KB':>10}  vs baseline (p50 / p99 / peak)"
+    )
+    for scale, result in current["results"].items():
+        before = baseline.get("results", {}).get(scale, {}).get("benchmarks", {})
+        for name, now in result["benchmarks"].items():
+            line = (
+                f"{scale:<6} {name:<22} {now['p50_ms']:>10.2f} "
+                f"{now['p99_ms']:>10.2f} {now['peak_kb']:>10.1f}"
+            )
+            old = before.get(name)
+            if not old:
+                print(line + "  (new)")
+                continue
+            ratios = []
+            for key, floor in (
+                ("p50_ms", MIN_REGRESSION_MS),
+                ("p99_ms", MIN_REGRESSION_MS),
+                ("peak_kb", MIN_REGRESSION_KB),
+            ):
+                ratio = now[key] / old[key] if old[key] else 1.0
+                ratios.append(f"{ratio:.2f}x")
+                if ratio > 1 + threshold and now[key] - old[key] > floor:
+                    regressions.append((scale, name, key, old[key], now[key]))
+            print(f"{line}  {' / '.join(ratios)}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="SnapAlert read path benchmarks")
+    parser.add_argument(
+        "--scales",
+        default=",".join(SCALES),
+        help=f"comma-separated dataset sizes ({', '.join(SCALES)})",
+    )
+    parser.add_argument("--data-root", default=str(DEFAULT_DATA_ROOT))
+    parser.add_argument("--baseline", default=str(DEFAULT_BASELINE))
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="write this run's results as the new baseline",
+    )
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--repeat", type=int, default=50, help="warm calls per case")
+    parser.add_argument(
+        "--max-seconds", type=float, default=30, help="time limit per case"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        run_worker(args.worker, args.repeat, args.max_seconds)
+        return 0
+
+    scales = [scale.strip().lower() for scale in args.scales.split(",") if scale]
+    unknown = [scale for scale in scales if scale not in SCALES]
+    if unknown:
+        parser.error(f"unknown scale(s): {', '.join(unknown)}")
+
+    current = {
+        "created": datetime.now().isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": {
+            scale: run_scale(
+                args.data_root, scale, args.seed, args.repeat, args.max_seconds
+            )
+            for scale in scales
+        },
+    }
+
+    baseline_path = Path(args.baseline)
+    if baseline_path.exists() and not args.update_baseline:
+        with open(baseline_path, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, current, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for scale, name, key, old, new in regressions:
+                print(f"  {scale} {name} {key}: {old} -> {new}")
+            return 1
+        print("\nNo regressions against the baseline")
+        return 0
+
+    if not baseline_path.exists():
+        print(f"\nNo baseline at {baseline_path} yet; this run becomes it")
+    compare({}, current, args.threshold)
+    with open(baseline_path, "w", encoding="utf-8") as f:
+        json.dump(current, f, indent=2)
+    print(f"\nBaseline written to {baseline_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,700 @@
+#!/usr/bin/env python3
+"""
+Synthetic workload generator for SnapAlert data directories
+
+Writes months or years of realistic tracker output: the activity log,
+sessions, browser events, status.json, session insights and AI analysis
+insights. Days are built from sessions separated by breaks, sessions from
+app runs whose length follows the switch rate, and each app keeps a
+working set of window titles that churns at a configurable rate. The same
+profile and seed always produce the same data, and everything is written
+as it is generated, so multi-GB directories are built in bounded memory:
+
+    python benchmarks/workload.py out/data --days 365 --seed 7
+    python benchmarks/workload.py out/data --profile heavy.json --format legacy
+
+A profile is a JSON object overriding DEFAULT_PROFILE. ``--format
+storage`` (the default) writes the layout the tracker writes today (data/
+logs/, sessions.jsonl, ...) through the storage package; ``--format
+legacy`` writes the flat logs.json, sessions.json, browser_logs.json and
+insights.json files that the storage package migrates on first start.
+"""
+
+import argparse
+import bisect
+import copy
+import json
+import math
+import os
+import random
+import sys
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Add the parent directory to the path so we can import the project modules
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+DEFAULT_PROFILE = {
+    # Generated period: `days` days up to `end` (ISO datetime, default now)
+    "days": 90,
+    "end": None,
+    # Chance that a weekend day has any activity
+    "weekend_activity": 0.25,
+    # First session starts around this hour, +/- the jitter
+    "day_start_hour": 8.5,
+    "day_start_jitter_hours": 1.0,
+    # Sessions per active day (inclusive range), mean length and mean break.
+    # Breaks are at least 10 minutes: the tracker ends a session after that.
+    "sessions_per_day": [2, 5],
+    "session_minutes": 70,
+    "session_gap_minutes": 30,
+    # Mean app switches per active hour
+    "switches_per_hour": 45,
+    # Chance that a run is in a window title not seen before, and how many
+    # recent titles each app keeps reusing
+    "title_churn": 0.08,
+    "titles_per_app": 30,
+    "keystrokes_per_minute": 40,
+    # Sessions followed by the LLM's timer suggestions, AI analyses per day
+    "session_insight_rate": 0.5,
+    "insights_per_day": 1,
+    # Relative app weights and title templates ({n} numbers new titles)
+    "apps": {
+        "Code.exe": {
+            "weight": 30,
+            "titles": [
+                "module_{n}.py - project - Visual Studio Code",
+                "test_{n}.py - project - Visual Studio Code",
+            ],
+        },
+        "chrome.exe": {"weight": 20, "titles": []},
+        "msedge.exe": {"weight": 6, "titles": []},
+        "slack.exe": {
+            "weight": 12,
+            "titles": ["channel-{n} | Workspace - Slack", "DM {n} | Workspace - Slack"],
+        },
+        "OUTLOOK.EXE": {
+            "weight": 8,
+            "titles": ["Inbox - Outlook", "Re: thread {n} - Message (HTML)"],
+        },
+        "Teams.exe": {"weight": 6, "titles": ["Meeting {n} | Microsoft Teams"]},
+        "WindowsTerminal.exe": {
+            "weight": 8,
+            "titles": ["PowerShell", "Ubuntu - job {n}"],
+        },
+        "explorer.exe": {"weight": 4, "titles": ["Folder {n} - File Explorer"]},
+        "Notepad.exe": {"weight": 3, "titles": ["notes_{n}.txt - Notepad"]},
+        "EXCEL.EXE": {"weight": 3, "titles": ["report_{n}.xlsx - Excel"]},
+    },
+    # Browser processes and their names; their runs also log browser tabs
+    "browsers": {"chrome.exe": "Chrome", "msedge.exe": "Edge"},
+    "sites": [
+        {
+            "url": "https://github.com/org/repo/pull/{n}",
+            "title": "Pull request #{n} - org/repo",
+            "category": "development",
+            "weight": 8,
+        },
+        {
+            "url": "https://stackoverflow.com/questions/{n}",
+            "title": "Question {n} - Stack Overflow",
+            "category": "development",
+            "weight": 6,
+        },
+        {
+            "url": "https://www.google.com/search?q={query}",
+            "title": "{query} - Google Search",
+            "category": "search",
+            "weight": 6,
+        },
+        {
+            "url": "https://mail.google.com/mail/u/0/#inbox/{n}",
+            "title": "Inbox ({n}) - Gmail",
+            "category": "communication",
+            "weight": 4,
+        },
+        {
+            "url": "https://docs.python.org/3/library/{word}.html",
+            "title": "{word} - Python documentation",
+            "category": "development",
+            "weight": 4,
+        },
+        {
+            "url": "https://www.youtube.com/watch?v={n}",
+            "title": "Video {n} - YouTube",
+            "category": "entertainment",
+            "weight": 2,
+        },
+    ],
+    "search_words": [
+        "python",
+        "flask",
+        "etag",
+        "sqlite",
+        "wal",
+        "mmap",
+        "asyncio",
+        "numpy",
+        "regex",
+        "timeout",
+        "windows",
+        "hook",
+    ],
+}
+
+# Records are handed to the stores in batches of this many
+BATCH_SIZE = 5000
+
+# Progress is printed every this many log entries
+PROGRESS_INTERVAL = 1_000_000
+
+# The tracker ends a session after this much inactivity
+MIN_SESSION_GAP_SEC = 600
+
+# Browser name as it appears in window titles
+BROWSER_TITLE_SUFFIX = {"Chrome": "Google Chrome", "Edge": "Microsoft Edge"}
+
+
+def load_profile(path=None, overrides=None):
+    """DEFAULT_PROFILE updated with a JSON profile file and then overrides"""
+    profile = copy.deepcopy(DEFAULT_PROFILE)
+    if path:
+        with open(path, "r", encoding="utf-8") as f:
+            profile.update(json.load(f))
+    profile.update({k: v for k, v in (overrides or {}).items() if v is not None})
+    return profile
+
+
+def expected_entries_per_day(profile):
+    """Average log entries per calendar day the profile produces"""
+    active_share = (5 + 2 * profile["weekend_activity"]) / 7
+    sessions = sum(profile["sessions_per_day"]) / 2
+    hours = sessions * profile["session_minutes"] / 60
+    return active_share * hours * profile["switches_per_hour"]
+
+
+class _Weighted:
+    """Weighted choice over a fixed list"""
+
+    def __init__(self, items, weights):
+        self.items = list(items)
+        self._cumulative = []
+        total = 0.0
+        for weight in weights:
+            total += weight
+            self._cumulative.append(total)
+        self._total = total
+
+    def pick(self, rng):
+        index = bisect.bisect_right(self._cumulative, rng.random() * self._total)
+        return self.items[min(index, len(self.items) - 1)]
+
+
+class _TitleSet:
+    """Recently used window titles of one app, most recent last.
+
+    New titles come from the app's templates at the churn rate; otherwise
+    a recent title is picked again, favouring the most recent ones.
+    """
+
+    def __init__(self, templates, size, churn):
+        self._templates = templates
+        self._churn = churn
+        self._recent = deque(maxlen=size)
+        self._counter = 0
+
+    def pick(self, rng, make=None):
+        if not self._recent or rng.random() < self._churn:
+            self._counter += 1
+            title = (make or self._make)(rng, self._counter)
+        else:
+            back = min(len(self._recent) - 1, int(rng.expovariate(1 / 3)))
+            title = self._recent[-1 - back]
+            self._recent.remove(title)
+        self._recent.append(title)
+        return title
+
+    def _make(self, rng, n):
+        if not self._templates:
+            return ""
+        return rng.choice(self._templates).format(n=n)
+
+
+class StorageSink:
+    """Writes the current data layout through the storage package"""
+
+    def __init__(self, data_dir, rollups=True):
+        from storage import (
+            get_activity_log,
+            get_browser_log,
+            get_insights_store,
+            get_session_insights_store,
+            get_session_store,
+            get_usage_rollups,
+        )
+
+        self.data_dir = Path(data_dir)
+        self.activity_log = get_activity_log(self.data_dir)
+        self.browser_log = get_browser_log(self.data_dir)
+        self.sessions = get_session_store(self.data_dir)
+        self.session_insights = get_session_insights_store(self.data_dir)
+        self.insights = get_insights_store(self.data_dir)
+        # Kept up to date as the tracker would, instead of a rebuild at the end
+        self.rollups = get_usage_rollups(self.data_dir) if rollups else None
+        self._entries = []
+        self._browser_events = []
+
+    def entry(self, entry, app, start_ts, end_ts):
+        self._entries.append(entry)
+        if self.rollups:
+            self.rollups.add_activity(app, start_ts, end_ts)
+        if len(self._entries) >= BATCH_SIZE:
+            self.activity_log.append_many(self._entries)
+            self._entries = []
+
+    def browser_event(self, event):
+        self._browser_events.append(event)
+        if len(self._browser_events) >= BATCH_SIZE:
+            self.browser_log.append_many(self._browser_events)
+            self._browser_events = []
+
+    def session(self, session):
+        self.sessions.append(session)
+        if self.rollups:
+            self.rollups.add_session(session)
+
+    def session_insight(self, insight):
+        self.session_insights.append(insight)
+
+    def insight(self, insight):
+        self.insights.append(insight)
+
+    def end_of_day(self):
+        if self.rollups:
+            self.rollups.flush()
+
+    def status(self, status):
+        with open(self.data_dir / "status.json", "w", encoding="utf-8") as f:
+            json.dump(status, f, indent=2)
+
+    def close(self):
+        self.activity_log.append_many(self._entries)
+        self.browser_log.append_many(self._browser_events)
+        self._entries, self._browser_events = [], []
+        for log in (self.activity_log, getattr(self.browser_log, "log", None)):
+            if hasattr(log, "close"):
+                log.close()
+        if self.rollups:
+            self.rollups.flush()
+
+
+class _JSONArrayFile:
+    """A JSON array written one element at a time"""
+
+    def __init__(self, path):
+        self._file = open(path, "w", encoding="utf-8")
+        self._file.write("[")
+        self._first = True
+
+    def append(self, record):
+        self._file.write("\n  " if self._first else ",\n  ")
+        self._file.write(json.dumps(record))
+        self._first = False
+
+    def close(self):
+        self._file.write("\n]\n" if not self._first else "]\n")
+        self._file.close()
+
+
+class LegacySink:
+    """Writes the flat files used before the storage package.
+
+    logs.json and browser_logs.json hold one JSON record per line;
+    sessions.json, session_insights.json and insights.json are arrays.
+    """
+
+    def __init__(self, data_dir):
+        self.data_dir = Path(data_dir)
+        self._logs = open(self.data_dir / "logs.json", "w", encoding="utf-8")
+        self._browser_logs = open(
+            self.data_dir / "browser_logs.json", "w", encoding="utf-8"
+        )
+        self._sessions = _JSONArrayFile(self.data_dir / "sessions.json")
+        self._session_insights = _JSONArrayFile(
+            self.data_dir / "session_insights.json"
+        )
+        self._insights = _JSONArrayFile(self.data_dir / "insights.json")
+
+    def entry(self, entry, app, start_ts, end_ts):
+        self._logs.write(json.dumps(entry) + "\n")
+
+    def browser_event(self, event):
+        self._browser_logs.write(json.dumps(event) + "\n")
+
+    def session(self, session):
+        self._sessions.append(session)
+
+    def session_insight(self, insight):
+        self._session_insights.append(insight)
+
+    def insight(self, insight):
+        self._insights.append(insight)
+
+    def end_of_day(self):
+        pass
+
+    def status(self, status):
+        with open(self.data_dir / "status.json", "w", encoding="utf-8") as f:
+            json.dump(status, f, indent=2)
+
+    def close(self):
+        self._logs.close()
+        self._browser_logs.close()
+        self._sessions.close()
+        self._session_insights.close()
+        self._insights.close()
+
+
+class WorkloadGenerator:
+    """Produces the tracker's records for a profile, oldest first"""
+
+    def __init__(self, profile, seed=0):
+        self.profile = profile
+        self.rng = random.Random(seed)
+        apps = profile["apps"]
+        self.apps = _Weighted(apps, [apps[app]["weight"] for app in apps])
+        self.titles = {
+            app: _TitleSet(
+                apps[app].get("titles", []),
+                profile["titles_per_app"],
+                profile["title_churn"],
+            )
+            for app in apps
+        }
+        self.browsers = profile["browsers"]
+        sites = profile["sites"]
+        self.sites = _Weighted(sites, [site.get("weight", 1) for site in sites])
+        self.mean_run = 3600 / profile["switches_per_hour"]
+
+        self.counts = {
+            "entries": 0,
+            "sessions": 0,
+            "browser_events": 0,
+            "session_insights": 0,
+            "insights": 0,
+            "days": 0,
+            "active_days": 0,
+        }
+        self._last_sessions = deque(maxlen=5)
+        self._open_apps = {}  # app -> (title, first seen, last used)
+        self._tabs = {}  # tab name -> tab_data of the latest tabs
+        self._app = None
+
+    # ------------------------------------------------------------------
+    # Browser tabs
+    # ------------------------------------------------------------------
+
+    def _make_tab(self, rng, n):
+        site = self.sites.pick(rng)
+        query = "+".join(rng.sample(self.profile["search_words"], 2))
+        word = rng.choice(self.profile["search_words"])
+        fields = {"n": n, "query": query, "word": word}
+        title = site["title"].format(**fields)
+        return json.dumps(
+            {
+                "title": title.replace("+", " "),
+                "url": site["url"].format(**fields),
+                "category": site.get("category", "general"),
+                "search_query": query.replace("+", " ")
+                if site.get("category") == "search"
+                else None,
+            }
+        )
+
+    def _browser_run(self, app, start_ts, end_ts, sink):
+        """Window title of a browser run; logs the tab it was on"""
+        browser = self.browsers[app]
+        tab = json.loads(self.titles[app].pick(self.rng, self._make_tab))
+        window_title = f"{tab['title']} - {BROWSER_TITLE_SUFFIX.get(browser, browser)}"
+        tab_data = {
+            "browser": browser,
+            "title": tab["title"],
+            "window_title": window_title,
+            "url": tab["url"],
+            "category": tab["category"],
+            "start_time": start_ts,
+            "last_active": end_ts,
+            "total_time": round(end_ts - start_ts, 2),
+            "search_query": tab["search_query"],
+            "is_active": False,
+            "visit_count": 1 + int(self.rng.expovariate(1 / 2)),
+        }
+        sink.browser_event(
+            {
+                "action": "tab_closed",
+                "timestamp": datetime.fromtimestamp(end_ts).isoformat(),
+                "tab_data": tab_data,
+            }
+        )
+        self.counts["browser_events"] += 1
+        name = f"{browser} - {tab['title']}"
+        self._tabs.pop(name, None)
+        self._tabs[name] = tab_data
+        if len(self._tabs) > 20:
+            self._tabs.pop(next(iter(self._tabs)))
+        return window_title
+
+    # ------------------------------------------------------------------
+    # Sessions and days
+    # ------------------------------------------------------------------
+
+    def _session(self, start_ts, end_ts, sink, max_entries):
+        """App runs from start_ts to end_ts; returns the keystrokes typed"""
+        rng = self.rng
+        ts = start_ts
+        while ts < end_ts and self.counts["entries"] < max_entries:
+            app = self.apps.pick(rng)
+            if app == self._app and len(self.apps.items) > 1:
+                continue
+            self._app = app
+            run_end = min(end_ts, ts + max(1.0, rng.expovariate(1 / self.mean_run)))
+            if app in self.browsers:
+                title = self._browser_run(app, ts, run_end, sink)
+            else:
+                title = self.titles[app].pick(rng)
+            sink.entry(
+                {
+                    "app": app,
+                    "title": title,
+                    "start": datetime.fromtimestamp(ts).isoformat(),
+                    "end": datetime.fromtimestamp(run_end).isoformat(),
+                    "duration_sec": round(run_end - ts, 2),
+                },
+                app,
+                ts,
+                run_end,
+            )
+            first_seen = self._open_apps.get(app, (None, ts))[1]
+            self._open_apps[app] = (title, first_seen, run_end)
+            self.counts["entries"] += 1
+            if self.counts["entries"] % PROGRESS_INTERVAL == 0:
+                print(
+                    f"[Workload] {self.counts['entries']:,} log entries "
+                    f"(up to {datetime.fromtimestamp(run_end):%Y-%m-%d})"
+                )
+            ts = run_end
+
+        minutes = (ts - start_ts) / 60
+        return int(minutes * self.profile["keystrokes_per_minute"] * rng.uniform(0.5, 1.5))
+
+    def _session_insight(self, session_end):
+        rng = self.rng
+        levels = sorted(rng.randint(5, 60) for _ in range(3))
+        return {
+            "break_threshold": rng.choice([25, 30, 45, 60, 90]),
+            "idle_app_threshold_1": levels[0],
+            "idle_app_threshold_2": levels[1],
+            "idle_app_threshold_3": levels[2],
+            "feedback": "Focused work with frequent short context switches.",
+            "improvements": [
+                "Batch messaging into fixed slots",
+                "Close idle apps after a task",
+                "Take a short break every hour",
+            ],
+            "timestamp": datetime.fromtimestamp(session_end).isoformat(),
+        }
+
+    def _insight(self, ts):
+        rng = self.rng
+        return {
+            "summary": [f"{self.counts['sessions']} sessions tracked so far."],
+            "insights": {
+                "productivity_score": rng.choice(["High", "Medium", "Low"]),
+                "focus_quality": "Long focused blocks in the morning.",
+                "top_distraction": rng.choice(["Browser tabs", "Chat", "Email"]),
+                "recommended_action": "Group communication into set times.",
+            },
+            "anomalies": [],
+            "trends": {
+                "improving": ["Session length"],
+                "concerning": ["App switching"],
+                "stable": ["Break rhythm"],
+            },
+            "timestamp": datetime.fromtimestamp(ts).isoformat(),
+        }
+
+    def _day(self, day, end_ts, sink, max_entries):
+        profile = self.profile
+        rng = self.rng
+        if day.weekday() >= 5 and rng.random() >= profile["weekend_activity"]:
+            return None
+        start_hour = profile["day_start_hour"] + rng.uniform(
+            -profile["day_start_jitter_hours"], profile["day_start_jitter_hours"]
+        )
+        ts = day.timestamp() + start_hour * 3600
+        midnight = (day + timedelta(days=1)).timestamp()
+        low, high = profile["sessions_per_day"]
+        last = None
+        for _ in range(rng.randint(low, high)):
+            session_end = ts + rng.expovariate(1 / (profile["session_minutes"] * 60))
+            session_end = min(max(session_end, ts + 300), midnight, end_ts)
+            if session_end <= ts or self.counts["entries"] >= max_entries:
+                break
+            keystrokes = self._session(ts, session_end, sink, max_entries)
+            session = {
+                "start": datetime.fromtimestamp(ts).isoformat(),
+                "end": datetime.fromtimestamp(session_end).isoformat(),
+                "duration_sec": round(session_end - ts, 2),
+            }
+            sink.session(session)
+            self.counts["sessions"] += 1
+            self._last_sessions.append(session)
+            last = (ts, session_end, keystrokes)
+            if rng.random() < profile["session_insight_rate"]:
+                sink.session_insight(self._session_insight(session_end))
+                self.counts["session_insights"] += 1
+            ts = session_end + max(
+                MIN_SESSION_GAP_SEC,
+                rng.expovariate(1 / (profile["session_gap_minutes"] * 60)),
+            )
+        if last:
+            for _ in range(profile["insights_per_day"]):
+                sink.insight(self._insight(last[1]))
+                self.counts["insights"] += 1
+        return last
+
+    def status(self, last):
+        """status.json as the tracker would have left it after the last session"""
+        start_ts, end_ts, keystrokes = last or (time.time(), time.time(), 0)
+        details = {}
+        for app, (title, first_seen, last_used) in self._open_apps.items():
+            details[app] = {
+                "title": title,
+                "start_time": datetime.fromtimestamp(first_seen).isoformat(),
+                "duration_open_sec": round(end_ts - first_seen, 2),
+                "last_used_time": datetime.fromtimestamp(last_used).isoformat(),
+                "duration_since_used_sec": round(end_ts - last_used, 2),
+                "alert_history": [],
+                "is_current": app == self._app,
+                "instance_count": 1,
+                "instances": [{"title": title}],
+                "resource_usage": None,
+            }
+        return {
+            "session_time": round(end_ts - start_ts, 2),
+            "session_start_time": datetime.fromtimestamp(start_ts).isoformat(),
+            "keystrokes": keystrokes,
+            "last_updated": datetime.fromtimestamp(end_ts).isoformat(),
+            "open_apps": list(details),
+            "open_apps_details": details,
+            "current_app": self._app,
+            "sessions": list(self._last_sessions),
+            "browser_data": {
+                "timestamp": datetime.fromtimestamp(end_ts).isoformat(),
+                "active_tabs": dict(self._tabs),
+            },
+        }
+
+    def run(self, sink, end=None, max_entries=None):
+        """Generate `days` days up to end into sink; returns the counts"""
+        end = end or datetime.now()
+        end_ts = end.timestamp()
+        first = (end - timedelta(days=self.profile["days"])).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        max_entries = max_entries or math.inf
+        last = None
+        day = first
+        while day.timestamp() < end_ts and self.counts["entries"] < max_entries:
+            self.counts["days"] += 1
+            result = self._day(day, end_ts, sink, max_entries)
+            if result:
+                self.counts["active_days"] += 1
+                last = result
+            sink.end_of_day()
+            day += timedelta(days=1)
+        sink.status(self.status(last))
+        return self.counts
+
+
+def generate(data_dir, profile=None, seed=0, fmt="storage", max_entries=None):
+    """Write a generated data directory; returns the record counts"""
+    profile = profile or load_profile()
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    end = datetime.fromisoformat(profile["end"]) if profile.get("end") else None
+    sink = LegacySink(data_dir) if fmt == "legacy" else StorageSink(data_dir)
+    try:
+        return WorkloadGenerator(profile, seed).run(sink, end, max_entries)
+    finally:
+        sink.close()
+
+
+def _directory_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                pass
+    return total
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic SnapAlert data directory"
+    )
+    parser.add_argument("data_dir", help="directory to write (e.g. out/data)")
+    parser.add_argument("--profile", help="JSON file overriding DEFAULT_PROFILE")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--days", type=int, help="days of history")
+    parser.add_argument("--end", help="last generated moment (ISO, default now)")
+    parser.add_argument("--switches-per-hour", type=float)
+    parser.add_argument("--title-churn", type=float)
+    parser.add_argument("--session-minutes", type=float)
+    parser.add_argument("--session-gap-minutes", type=float)
+    parser.add_argument(
+        "--max-entries", type=int, help="stop after this many log entries"
+    )
+    parser.add_argument("--format", choices=("storage", "legacy"), default="storage")
+    parser.add_argument(
+        "--force", action="store_true", help="write into a non-empty directory"
+    )
+    args = parser.parse_args(argv)
+
+    data_dir = Path(args.data_dir)
+    if data_dir.exists() and any(data_dir.iterdir()) and not args.force:
+        parser.error(f"{data_dir} is not empty (use --force to add to it)")
+
+    profile = load_profile(
+        args.profile,
+        {
+            "days": args.days,
+            "end": args.end,
+            "switches_per_hour": args.switches_per_hour,
+            "title_churn": args.title_churn,
+            "session_minutes": args.session_minutes,
+            "session_gap_minutes": args.session_gap_minutes,
+        },
+    )
+    print(
+        f"[Workload] {profile['days']} days, seed {args.seed}, about "
+        f"{expected_entries_per_day(profile) * profile['days']:,.0f} log entries"
+    )
+    started = time.perf_counter()
+    counts = generate(data_dir, profile, args.seed, args.format, args.max_entries)
+    elapsed = time.perf_counter() - started
+    print(
+        f"[Workload] Wrote {counts['entries']:,} log entries, "
+        f"{counts['sessions']:,} sessions, {counts['browser_events']:,} browser "
+        f"events over {counts['active_days']} active days to {data_dir} "
+        f"({_directory_size(data_dir) / 1e6:,.1f} MB in {elapsed:.1f}s)"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
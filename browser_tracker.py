@@ -6,13 +6,19 @@ import sqlite3
 import shutil
 from datetime import datetime, timedelta
 from urllib.parse import urlparse, parse_qs
-import win32gui
-import win32process
+try:
+    import win32gui
+    import win32process
+except ImportError:  # pywin32 is Windows-only; without it no browser windows are seen
+    win32gui = win32process = None
 import psutil
 import tempfile
 from pathlib import Path
+from storage import (
+    get_background_writer,
+    get_browser_log,
+)
 
-BROWSER_LOG_FILE = "data/browser_logs.json"
 BROWSER_STATUS_FILE = "data/browser_status.json"
 
 # Browser process names to track
@@ -33,20 +39,34 @@ SEARCH_ENGINES = {
     "yandex.com": "text",
 }
 
-
 class BrowserTracker:
-    def __init__(self):
+    def __init__(self, clock=time.time):
+        # Where the time comes from (a simulated clock when replaying)
+        self.clock = clock
+        # Keyed by (browser, window title). Titles and URLs stay plain strings:
+        # interning every title seen would grow strings.jsonl without bound,
+        # so only the logged tab_closed events go through the intern table.
         self.active_tabs = {}
         self.browser_sessions = {}
         self.current_browser = None
-        self.current_tab_start = time.time()
+        self.current_tab_start = clock()
         self.browser_logs = []
+        # Events of a failed write, retried with the next batch; only the
+        # writer thread touches this list
+        self._unsaved_browser_logs = []
         self.last_history_check = 0
         self.recent_urls = {}
 
         # Ensure data directory exists
         os.makedirs("data", exist_ok=True)
 
+        # Day-partitioned browser log (replaces the flat data/browser_logs.json),
+        # or the SQLite table when that backend is configured
+        self.browser_log = get_browser_log("data")
+        self.browser_log.migrate_legacy()
+        # Status and log writes run off the tracking loop
+        self.writer = get_background_writer()
+
         # Run startup diagnostics
         self.run_startup_diagnostics()
 
@@ -119,7 +139,7 @@ class BrowserTracker:
 
                 # Chrome stores time as microseconds since Windows epoch (1601)
                 # Convert to Unix timestamp
-                hours_ago = int((time.time() - 3600) * 1000000) + 11644473600000000
+                hours_ago = int((self.clock() - 3600) * 1000000) + 11644473600000000
 
                 cursor.execute(query, (hours_ago, limit))
                 results = cursor.fetchall()
@@ -191,7 +211,7 @@ class BrowserTracker:
                 """
 
                 # Firefox stores time as microseconds since Unix epoch
-                hours_ago = int((time.time() - 3600) * 1000000)
+                hours_ago = int((self.clock() - 3600) * 1000000)
 
                 cursor.execute(query, (hours_ago, limit))
                 results = cursor.fetchall()
@@ -245,7 +265,7 @@ class BrowserTracker:
                 LIMIT ?
                 """
 
-                hours_ago = int((time.time() - 3600) * 1000000) + 11644473600000000
+                hours_ago = int((self.clock() - 3600) * 1000000) + 11644473600000000
 
                 cursor.execute(query, (hours_ago, limit))
                 results = cursor.fetchall()
@@ -350,7 +370,7 @@ class BrowserTracker:
                 return {
                     "title": title,
                     "url": self.extract_url_from_title(title),
-                    "timestamp": time.time(),
+                    "timestamp": self.clock(),
                 }
         except:
             pass
@@ -397,7 +417,7 @@ class BrowserTracker:
 
     def update_browser_history_data(self):
         """Update browser data from history files"""
-        current_time = time.time()
+        current_time = self.clock()
 
         # Only check history every 30 seconds to avoid performance issues
         if current_time - self.last_history_check < 30:
@@ -435,10 +455,21 @@ class BrowserTracker:
             url_key = f"{url_data['browser']}_{url_data['url']}"
             self.recent_urls[url_key] = url_data
 
+    def _tab_name(self, tab_key):
+        browser_name, title = tab_key
+        return f"{browser_name}_{title}"
+
+    def decoded_tabs(self):
+        """Active tabs by name (copies, safe to hand to another thread)"""
+        return {
+            self._tab_name(tab_key): dict(tab_data)
+            for tab_key, tab_data in self.active_tabs.items()
+        }
+
     def track_browser_activity(self):
         """Main browser tracking function"""
         browser_windows = self.get_browser_windows()
-        current_time = time.time()
+        current_time = self.clock()
 
         # Update browser history data periodically
         self.update_browser_history_data()
@@ -478,7 +509,7 @@ class BrowserTracker:
             category = self.categorize_website(url)
 
             # Track tab activity
-            tab_key = f"{browser_name}_{title}"
+            tab_key = (browser_name, title)
             is_active = browser["hwnd"] == hwnd
 
             if tab_key not in self.active_tabs:
@@ -529,20 +560,25 @@ class BrowserTracker:
             self.browser_logs.append(
                 {
                     "action": "tab_closed",
-                    "timestamp": datetime.now().isoformat(),
-                    "tab_data": self.active_tabs[tab_key],
+                    "timestamp": datetime.fromtimestamp(self.clock()).isoformat(),
+                    "tab_data": dict(self.active_tabs[tab_key]),
                 }
             )
             del self.active_tabs[tab_key]
 
         return {
-            "active_tabs": self.active_tabs,
+            "active_tabs": self.decoded_tabs(),
             "browser_windows": browser_windows,
-            "current_browser": self.current_browser,
+            "current_browser": self.current_browser_name(),
             "total_tabs": len(self.active_tabs),
             "recent_urls_count": len(self.recent_urls),
         }
 
+    def current_browser_name(self):
+        if self.current_browser is None:
+            return None
+        return self._tab_name(self.current_browser)
+
     def get_browser_stats(self):
         """Get browser statistics"""
         stats = {
@@ -573,7 +609,7 @@ class BrowserTracker:
 
             # Most active tab
             most_active = max(self.active_tabs.values(), key=lambda x: x["total_time"])
-            stats["most_active_tab"] = most_active
+            stats["most_active_tab"] = dict(most_active)
 
             # Browser distribution
             for tab in self.active_tabs.values():
@@ -585,24 +621,40 @@ class BrowserTracker:
         return stats
 
     def save_browser_status(self):
-        """Save current browser status to file"""
+        """Queue a write of the current browser status (changes are coalesced)"""
         status = {
-            "timestamp": datetime.now().isoformat(),
-            "active_tabs": self.active_tabs,
-            "current_browser": self.current_browser,
+            "timestamp": datetime.fromtimestamp(self.clock()).isoformat(),
+            "active_tabs": self.decoded_tabs(),
+            "current_browser": self.current_browser_name(),
             "stats": self.get_browser_stats(),
         }
-
-        with open(BROWSER_STATUS_FILE, "w") as f:
-            json.dump(status, f, indent=2)
+        self.writer.submit("browser_status", _write_browser_status, status)
 
     def save_browser_logs(self):
-        """Save browser logs to file"""
-        if self.browser_logs:
-            with open(BROWSER_LOG_FILE, "a") as f:
-                for log in self.browser_logs:
-                    f.write(json.dumps(log) + "\n")
-            self.browser_logs.clear()
+        """Queue browser logs for the browser log"""
+        if not self.browser_logs:
+            return
+
+        batch = self.browser_logs
+        self.browser_logs = []
+        self.writer.submit(None, self._append_browser_events, batch)
+
+    def _append_browser_events(self, events):
+        # Runs on the writer thread: self.browser_logs belongs to the
+        # tracker thread, so failed events are kept on this side instead
+        events = self._unsaved_browser_logs + events
+        try:
+            self.browser_log.append_many(events)
+            self._unsaved_browser_logs = []
+        except Exception as e:
+            print(f"Error saving browser logs: {e}")
+            # Keep them for the next save
+            self._unsaved_browser_logs = events
+
+
+def _write_browser_status(status):
+    with open(BROWSER_STATUS_FILE, "w") as f:
+        json.dump(status, f, indent=2)
 
 
 # Global browser tracker instance
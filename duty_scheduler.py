@@ -0,0 +1,203 @@
+import heapq
+import itertools
+import random
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+
+class Duty:
+    """A periodic job of the tracker loop and its execution stats"""
+
+    def __init__(
+        self, name: str, fn: Callable, period: float, jitter: float, order: int
+    ):
+        self.name = name
+        self.fn = fn
+        self.period = float(period)
+        self.jitter = float(jitter)
+        self.order = order  # runs before later duties due at the same time
+        self.deadline = 0.0
+        self.entry = None  # sequence number of its live heap entry
+        self.triggered = False  # trigger() came while it was due or running
+
+        self.runs = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.total_cpu_ms = 0.0
+        self.max_ms = 0.0
+        self.last_ms = 0.0
+        self.total_late_ms = 0.0
+        self.max_late_ms = 0.0
+
+    def stats(self, now: float) -> Dict:
+        runs = self.runs or 1
+        return {
+            "period_sec": self.period,
+            "jitter_sec": self.jitter,
+            "runs": self.runs,
+            "errors": self.errors,
+            "last_ms": round(self.last_ms, 3),
+            "avg_ms": round(self.total_ms / runs, 3),
+            "max_ms": round(self.max_ms, 3),
+            "total_ms": round(self.total_ms, 3),
+            "avg_cpu_ms": round(self.total_cpu_ms / runs, 3),
+            "total_cpu_ms": round(self.total_cpu_ms, 3),
+            "avg_late_ms": round(self.total_late_ms / runs, 3),
+            "max_late_ms": round(self.max_late_ms, 3),
+            "next_in_sec": round(max(0.0, self.deadline - now), 3),
+        }
+
+
+class DutyScheduler:
+    """Deadline heap that runs the tracker's periodic duties.
+
+    Each duty has its own period and jitter, and the loop sleeps exactly
+    until the earliest deadline instead of waking on a fixed tick. The next
+    deadline follows from the previous one (so a duty doesn't drift by its
+    own run time) plus a random offset within +/- jitter; a duty that has
+    fallen more than a period behind is not run repeatedly to catch up.
+    ``trigger(name)`` makes a duty due now and wakes the loop, for events
+    that shouldn't wait for the next poll.
+    """
+
+    def __init__(
+        self,
+        clock: Callable[[], float] = time.time,
+        rng: Optional[random.Random] = None,
+    ):
+        self.clock = clock
+        self.rng = rng or random.Random()
+        self.duties: Dict[str, Duty] = {}
+        self._heap: List[tuple] = []  # (deadline, order, sequence, duty)
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopped = False
+
+    def add(
+        self,
+        name: str,
+        fn: Callable[[float], None],
+        period: float,
+        jitter: float = 0.0,
+        delay: float = 0.0,
+    ) -> Duty:
+        """Run fn(now) every period seconds, the first time after delay"""
+        if period <= 0:
+            raise ValueError(f"period of duty {name!r} must be positive")
+        with self._lock:
+            if name in self.duties:
+                raise ValueError(f"duplicate duty {name!r}")
+            duty = Duty(name, fn, period, min(jitter, period / 2), len(self.duties))
+            self.duties[name] = duty
+            self._push_locked(duty, self.clock() + delay)
+        return duty
+
+    def _push_locked(self, duty: Duty, deadline: float) -> None:
+        duty.deadline = deadline
+        duty.entry = next(self._sequence)
+        heapq.heappush(self._heap, (deadline, duty.order, duty.entry, duty))
+
+    def trigger(self, name: str) -> None:
+        """Make a duty due now (callable from any thread)"""
+        with self._lock:
+            duty = self.duties[name]
+            now = self.clock()
+            if duty.deadline > now:
+                self._push_locked(duty, now)
+            else:
+                # Already due, or running right now: run it once more
+                duty.triggered = True
+        self._wake.set()
+
+    def next_deadline(self) -> Optional[float]:
+        with self._lock:
+            self._drop_stale_locked()
+            return self._heap[0][0] if self._heap else None
+
+    def _drop_stale_locked(self) -> None:
+        # trigger() leaves the duty's old entry behind; skip it
+        while self._heap and self._heap[0][2] != self._heap[0][3].entry:
+            heapq.heappop(self._heap)
+
+    def _next_due_locked(self, now: float) -> Optional[Duty]:
+        self._drop_stale_locked()
+        if not self._heap or self._heap[0][0] > now:
+            return None
+        return heapq.heappop(self._heap)[3]
+
+    def _reschedule_locked(self, duty: Duty, now: float) -> None:
+        deadline = duty.deadline + duty.period
+        if duty.triggered:
+            duty.triggered = False
+            deadline = now
+        else:
+            if deadline <= now:
+                # Fell behind (slow duty, sleep/hibernate): resume from now
+                deadline = now + duty.period
+            if duty.jitter:
+                deadline += self.rng.uniform(-duty.jitter, duty.jitter)
+        self._push_locked(duty, deadline)
+
+    def run_pending(self) -> int:
+        """Run every duty that is due; returns how many ran"""
+        ran = 0
+        while True:
+            now = self.clock()
+            with self._lock:
+                duty = self._next_due_locked(now)
+            if duty is None:
+                return ran
+
+            started = time.perf_counter()
+            started_cpu = time.thread_time()
+            try:
+                duty.fn(now)
+            except Exception as e:
+                duty.errors += 1
+                print(f"[Tracker] Duty '{duty.name}' failed: {e}")
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            duty.total_cpu_ms += (time.thread_time() - started_cpu) * 1000
+
+            late_ms = max(0.0, (now - duty.deadline) * 1000)
+            duty.runs += 1
+            duty.last_ms = elapsed_ms
+            duty.total_ms += elapsed_ms
+            duty.max_ms = max(duty.max_ms, elapsed_ms)
+            duty.total_late_ms += late_ms
+            duty.max_late_ms = max(duty.max_late_ms, late_ms)
+            if elapsed_ms > duty.period * 1000:
+                print(
+                    f"[Performance Warning] Duty '{duty.name}' took "
+                    f"{elapsed_ms / 1000:.2f}s (period: {duty.period}s)"
+                )
+
+            with self._lock:
+                self._reschedule_locked(duty, self.clock())
+            ran += 1
+
+    def wait(self, timeout: float) -> None:
+        """Sleep up to timeout seconds, or until trigger() wakes the loop"""
+        if timeout > 0:
+            self._wake.wait(timeout)
+        self._wake.clear()
+
+    def run_forever(self) -> None:
+        """Run duties as they come due until stop()"""
+        self._stopped = False
+        while not self._stopped:
+            self.run_pending()
+            deadline = self.next_deadline()
+            if deadline is None:
+                return
+            self.wait(deadline - self.clock())
+
+    def stop(self) -> None:
+        self._stopped = True
+        self._wake.set()
+
+    def stats(self) -> Dict[str, Dict]:
+        """Per-duty run counts, run time, CPU time and lateness in milliseconds"""
+        now = self.clock()
+        return {name: duty.stats(now) for name, duty in self.duties.items()}
@@ -1,17 +1,14 @@
 import requests
 import json
-from app import read_sessions, read_recent_logs
+from app import read_sessions
+from storage import get_activity_log
  
 OLLAMA_URL = "http://localhost:11434/api/generate"
 MODEL = "mistral"
-LOG_FILE = "data/logs.json"
  
  
 def read_recent_logs(n=20):
-    with open(LOG_FILE, "r") as f:
-        lines = f.readlines()
-    logs = [json.loads(line) for line in lines[-n:]]
-    return logs
+    return get_activity_log("data").tail(n)
  
 def generate_prompt(log_data):
     return f"""You are an AI productivity assistant. The following is the user's recent app usage data:
@@ -0,0 +1,109 @@
+"""
+Storage Package for SnapAlert
+
+This package holds the on-disk formats shared by the tracker, the Flask app
+and the AI analysis system.
+It includes:
+- SegmentedLog: Append-only, time-indexed log split into day partitions
+- rotate: Compression of closed days and retention for the day-partitioned logs
+- DailyArchive: Columnar, memory-mapped .npz archive of closed days
+- UsageRollups: Per-app/hour, per-app/day and per-day totals kept up to date by the tracker
+- tail_records: Constant-time reads of the last N records of a JSON-lines file
+- LogWriter: Group-commit activity log writer with a configurable fsync policy
+- BackgroundWriter: Single writer thread with a bounded, coalescing job queue
+- SQLiteStore: Optional SQLite (WAL) backend for logs, sessions and browser logs
+- BrowserEventLog: Browser events stored as tab references plus deltas
+- InternTable: Persistent string table mapping repeated names and titles to ids
+- ReadCache: Parsed-file cache keyed on (path, mtime_ns, size)
+- WatchedJSONFile: In-memory copy of a config file, re-read only when it changes
+- RecordStore: Append-only JSON-lines store for sessions and insights
+- StatusChannel: Memory-mapped live status shared by the tracker and readers
+- export_chunks: Streaming NDJSON/CSV export of logs, sessions and browser events
+- file_version: stat-based data versions used for HTTP conditional requests
+"""
+
+from .archive import DailyArchive, read_daily_summaries, summarize_entries
+from .background_writer import BackgroundWriter, get_background_writer
+from .backend import (
+    create_default_storage_config,
+    get_activity_log,
+    get_alert_events_store,
+    get_analysis_log,
+    get_browser_log,
+    get_daily_archive,
+    get_insights_store,
+    get_intern_table,
+    get_log_writer,
+    get_session_insights_store,
+    get_session_store,
+    get_sqlite_store,
+    get_usage_rollups,
+    load_storage_config,
+)
+from .browser_events import BrowserEventLog, TabTable
+from .compression import PresetDictionary
+from .export import export_chunks
+from .intern import InternTable
+from .log_writer import LogWriter
+from .read_cache import ReadCache, get_read_cache
+from .record_store import RecordStore
+from .rollups import UsageRollups
+from .rotation import rotate
+from .segmented_log import SegmentedLog, entry_timestamp
+from .sqlite_store import (
+    SQLiteActivityLog,
+    SQLiteBrowserLog,
+    SQLiteSessionLog,
+    SQLiteStore,
+)
+from .status_channel import StatusChannel, get_status_channel, read_live_status
+from .tail import iter_lines_reversed, tail_records
+from .versions import file_version
+from .watched_file import WatchedJSONFile, signal_config_change
+
+__all__ = [
+    "BackgroundWriter",
+    "BrowserEventLog",
+    "DailyArchive",
+    "InternTable",
+    "LogWriter",
+    "PresetDictionary",
+    "ReadCache",
+    "RecordStore",
+    "SegmentedLog",
+    "SQLiteStore",
+    "SQLiteActivityLog",
+    "SQLiteBrowserLog",
+    "SQLiteSessionLog",
+    "StatusChannel",
+    "TabTable",
+    "UsageRollups",
+    "WatchedJSONFile",
+    "create_default_storage_config",
+    "entry_timestamp",
+    "export_chunks",
+    "file_version",
+    "get_activity_log",
+    "get_alert_events_store",
+    "get_analysis_log",
+    "get_background_writer",
+    "get_browser_log",
+    "get_daily_archive",
+    "get_insights_store",
+    "get_intern_table",
+    "get_log_writer",
+    "get_read_cache",
+    "get_session_insights_store",
+    "get_session_store",
+    "get_sqlite_store",
+    "get_status_channel",
+    "get_usage_rollups",
+    "iter_lines_reversed",
+    "load_storage_config",
+    "read_daily_summaries",
+    "read_live_status",
+    "rotate",
+    "signal_config_change",
+    "summarize_entries",
+    "tail_records",
+]
@@ -0,0 +1,301 @@
+import argparse
+import os
+import struct
+import threading
+import time
+import zipfile
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; without it days stay in the JSON log
+    np = None
+
+from .segmented_log import entry_timestamp
+
+ARCHIVE_SUFFIX = ".npz"
+
+# Column names stored in each daily archive
+COLUMNS = ("start", "end", "duration", "app_codes", "title_codes", "apps", "titles")
+
+# A day is only compacted once this long after midnight, so records buffered
+# by the tracker just before midnight have been flushed to the log.
+CLOSE_GRACE_SECONDS = 3600
+
+# Size of a zip local file header before the name and extra fields
+ZIP_LOCAL_HEADER_SIZE = 30
+
+
+def _day_bounds(day: str):
+    start = datetime.strptime(day, "%Y%m%d")
+    return start.timestamp(), (start + timedelta(days=1)).timestamp()
+
+
+def _encode(values: List[str]):
+    """Dictionary-encode a list of strings into (codes, vocabulary)"""
+    vocabulary = {}
+    codes = np.empty(len(values), dtype=np.int32)
+    for i, value in enumerate(values):
+        codes[i] = vocabulary.setdefault(value, len(vocabulary))
+    return codes, np.array(list(vocabulary), dtype=str)
+
+
+def _memmap_member(path: Path, archive: zipfile.ZipFile, name: str):
+    """Memory-map one array of an uncompressed .npz without reading it"""
+    info = archive.getinfo(name)
+    if info.compress_type != zipfile.ZIP_STORED:
+        with archive.open(name) as f:
+            return np.lib.format.read_array(f)
+
+    with open(path, "rb") as f:
+        f.seek(info.header_offset)
+        header = f.read(ZIP_LOCAL_HEADER_SIZE)
+        name_len, extra_len = struct.unpack("<HH", header[26:30])
+        f.seek(info.header_offset + ZIP_LOCAL_HEADER_SIZE + name_len + extra_len)
+
+        version = np.lib.format.read_magic(f)
+        if version == (1, 0):
+            shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(f)
+        else:
+            shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(f)
+        offset = f.tell()
+
+    if 0 in shape:
+        return np.empty(shape, dtype=dtype)
+    return np.memmap(
+        path,
+        dtype=dtype,
+        mode="r",
+        offset=offset,
+        shape=shape,
+        order="F" if fortran_order else "C",
+    )
+
+
+class DailyArchive:
+    """Columnar archive of closed days of the activity log.
+
+    Each day ``YYYYMMDD.npz`` holds start/end epoch and duration arrays plus
+    dictionary-encoded app and title codes. Archives are written
+    uncompressed so the loader can memory-map just the columns a caller
+    asks for instead of parsing JSON records.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+
+    @property
+    def available(self) -> bool:
+        """Whether numpy is installed"""
+        return np is not None
+
+    def path_for(self, day: str) -> Path:
+        return self.directory / f"{day}{ARCHIVE_SUFFIX}"
+
+    def days(self) -> List[str]:
+        """List archived days (YYYYMMDD), oldest first"""
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return []
+        return sorted(
+            name[: -len(ARCHIVE_SUFFIX)]
+            for name in names
+            if name.endswith(ARCHIVE_SUFFIX)
+        )
+
+    def has_day(self, day: str) -> bool:
+        return self.path_for(day).exists()
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def write_day(self, day: str, entries: Iterable[Dict]) -> int:
+        """Write one day of log entries as a columnar archive"""
+        if np is None:
+            raise RuntimeError("numpy is required for the daily archive")
+
+        starts, ends, durations, apps, titles = [], [], [], [], []
+        for entry in entries:
+            start = entry_timestamp(entry, "start")
+            if start is None:
+                continue
+            end = entry_timestamp(entry, "end")
+            duration = entry.get("duration_sec")
+            if duration is None:
+                duration = (end - start) if end is not None else 0.0
+            starts.append(start)
+            ends.append(end if end is not None else start + duration)
+            durations.append(duration)
+            apps.append(entry.get("app") or "Unknown")
+            titles.append(entry.get("title") or "")
+
+        app_codes, app_names = _encode(apps)
+        title_codes, title_names = _encode(titles)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path_for(day)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with self._lock:
+            with open(tmp_path, "wb") as f:
+                np.savez(
+                    f,
+                    start=np.array(starts, dtype=np.float64),
+                    end=np.array(ends, dtype=np.float64),
+                    duration=np.array(durations, dtype=np.float64),
+                    app_codes=app_codes,
+                    title_codes=title_codes,
+                    apps=app_names,
+                    titles=title_names,
+                )
+            os.replace(tmp_path, path)
+        return len(starts)
+
+    def compact(
+        self, activity_log, now: Optional[float] = None, force: bool = False
+    ) -> List[str]:
+        """Archive every closed day of the activity log that isn't archived yet"""
+        if np is None:
+            return []
+
+        now = now or time.time()
+        compacted = []
+        for day in activity_log.days():
+            day_start, day_end = _day_bounds(day)
+            if day_end + CLOSE_GRACE_SECONDS > now:
+                continue
+            if self.has_day(day) and not force:
+                continue
+            count = self.write_day(day, activity_log.read_range(day_start, day_end))
+            compacted.append(day)
+            print(f"[Storage] Archived {count} log entries for {day}")
+        return compacted
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def load_day(self, day: str, columns: Optional[Iterable[str]] = None) -> Dict:
+        """Memory-map the requested columns of one archived day"""
+        if np is None:
+            raise RuntimeError("numpy is required for the daily archive")
+
+        path = self.path_for(day)
+        columns = list(columns or COLUMNS)
+        with zipfile.ZipFile(path) as archive:
+            return {
+                column: _memmap_member(path, archive, f"{column}.npy")
+                for column in columns
+            }
+
+    def day_summary(self, day: str) -> Dict:
+        """Total time, switches and per-app time for one archived day"""
+        data = self.load_day(day, ("duration", "app_codes", "apps"))
+        app_codes = data["app_codes"]
+        app_times = np.bincount(
+            app_codes, weights=data["duration"], minlength=len(data["apps"])
+        )
+        return {
+            "day": day,
+            "entries": int(len(app_codes)),
+            "total_time": float(data["duration"].sum()),
+            "switches": int(np.count_nonzero(app_codes[1:] != app_codes[:-1])),
+            "app_times": {
+                str(app): float(seconds)
+                for app, seconds in zip(data["apps"], app_times)
+            },
+        }
+
+    def summaries(self, days_back: int = 7, now: Optional[float] = None) -> List[Dict]:
+        """Summaries of the archived days within the last days_back days"""
+        now = now or time.time()
+        first_day = (datetime.fromtimestamp(now) - timedelta(days=days_back)).strftime(
+            "%Y%m%d"
+        )
+        return [self.day_summary(day) for day in self.days() if day >= first_day]
+
+
+def summarize_entries(day: str, entries: Iterable[Dict]) -> Dict:
+    """Build the same summary as DailyArchive.day_summary from raw log entries"""
+    total_time = 0.0
+    switches = 0
+    count = 0
+    last_app = None
+    app_times = {}
+    for entry in entries:
+        app = entry.get("app") or "Unknown"
+        duration = entry.get("duration_sec", 0) or 0
+        total_time += duration
+        app_times[app] = app_times.get(app, 0.0) + duration
+        if last_app is not None and app != last_app:
+            switches += 1
+        last_app = app
+        count += 1
+    return {
+        "day": day,
+        "entries": count,
+        "total_time": total_time,
+        "switches": switches,
+        "app_times": app_times,
+    }
+
+
+def read_daily_summaries(
+    activity_log, archive: DailyArchive, days_back: int = 7, now: Optional[float] = None
+) -> List[Dict]:
+    """Per-day summaries for the last days_back days, oldest first.
+
+    Archived days come from the memory-mapped columns; today and any day not
+    archived yet are summarised from the activity log.
+    """
+    now = now or time.time()
+    first_day = (datetime.fromtimestamp(now) - timedelta(days=days_back)).strftime(
+        "%Y%m%d"
+    )
+
+    summaries = {}
+    if archive.available:
+        for summary in archive.summaries(days_back, now):
+            summaries[summary["day"]] = summary
+
+    for day in activity_log.days():
+        if day < first_day or day in summaries:
+            continue
+        day_start, day_end = _day_bounds(day)
+        summaries[day] = summarize_entries(
+            day, activity_log.read_range(day_start, day_end)
+        )
+
+    return [summaries[day] for day in sorted(summaries)]
+
+
+def main():
+    from .backend import get_activity_log, get_daily_archive
+
+    parser = argparse.ArgumentParser(description="SnapAlert daily archive tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compact_parser = subparsers.add_parser(
+        "compact", help="Archive closed days of the activity log"
+    )
+    compact_parser.add_argument("--data-dir", default="data")
+    compact_parser.add_argument(
+        "--force", action="store_true", help="Rewrite days that are already archived"
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "compact":
+        archive = get_daily_archive(args.data_dir)
+        if not archive.available:
+            parser.error("numpy is required for the daily archive")
+        days = archive.compact(get_activity_log(args.data_dir), force=args.force)
+        print(f"[Storage] Archived {len(days)} day(s)")
+
+
+if __name__ == "__main__":
+    main()
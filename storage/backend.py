@@ -0,0 +1,255 @@
+import copy
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+from .archive import DailyArchive
+from .browser_events import BrowserEventLog, TabTable
+from .intern import InternTable
+from .log_writer import DEFAULT_WRITER_CONFIG, LogWriter
+from .read_cache import get_read_cache
+from .record_store import RecordStore
+from .rollups import UsageRollups
+from .segmented_log import SegmentedLog
+from .sqlite_store import (
+    SQLiteActivityLog,
+    SQLiteBrowserLog,
+    SQLiteSessionLog,
+    SQLiteStore,
+)
+from .versions import file_version
+
+STORAGE_CONFIG_FILE = "storage_config.json"
+
+_lock = threading.Lock()
+_segmented_logs = {}
+_sqlite_stores = {}
+_record_stores = {}
+_archives = {}
+_browser_logs = {}
+_intern_tables = {}
+_rollups = {}
+_log_writers = {}
+
+# Activity log fields stored as ids in the intern table
+ACTIVITY_INTERNED_FIELDS = ("app", "title")
+
+# Insight stores keep the same history limit the JSON array files had
+MAX_INSIGHTS = 100
+
+# Recently fired alerts, kept for the dashboard's live stream
+MAX_ALERT_EVENTS = 100
+
+
+def create_default_storage_config() -> Dict:
+    """Create default storage configuration"""
+    return {
+        "backend": "files",  # "files" or "sqlite"
+        "sqlite_path": "snapalert.db",  # relative to the data directory
+        "compress_closed_days": True,  # zlib with a shared preset dictionary
+        # Days of history to keep per log; None (null) keeps everything, so
+        # nothing is deleted unless storage_config.json asks for it
+        "retention_days": {
+            "logs": None,
+            "browser_logs": None,
+            "ai_analysis_log": None,
+        },
+        # Group commit for the tracker's activity log writes
+        "log_writer": dict(DEFAULT_WRITER_CONFIG),
+    }
+
+
+def _read_storage_config(config_file: Path) -> Dict:
+    config = create_default_storage_config()
+    try:
+        if config_file.exists():
+            with open(config_file, "r", encoding="utf-8") as f:
+                file_config = json.load(f)
+            retention = dict(config["retention_days"])
+            retention.update(file_config.get("retention_days") or {})
+            log_writer = dict(config["log_writer"])
+            log_writer.update(file_config.get("log_writer") or {})
+            config.update(file_config)
+            config["retention_days"] = retention
+            config["log_writer"] = log_writer
+    except Exception as e:
+        print(f"[Storage] Error loading storage config: {e}")
+    return config
+
+
+def _storage_config(data_dir) -> Dict:
+    """Shared, read-only storage config, re-read only when the file changes.
+
+    The backend factories run on every API request; this keeps them to one
+    stat of storage_config.json instead of a parse each time.
+    """
+    config_file = Path(data_dir) / STORAGE_CONFIG_FILE
+    return get_read_cache().get(
+        ("storage_config", str(config_file)),
+        file_version(config_file),
+        lambda: _read_storage_config(config_file),
+    )
+
+
+def load_storage_config(data_dir="data") -> Dict:
+    """Load storage configuration from <data_dir>/storage_config.json"""
+    return copy.deepcopy(_storage_config(data_dir))
+
+
+def get_sqlite_store(data_dir="data") -> Optional[SQLiteStore]:
+    """Get the shared SQLite store, or None when the files backend is in use"""
+    config = _storage_config(data_dir)
+    if config.get("backend") != "sqlite":
+        return None
+
+    db_path = Path(data_dir) / config.get("sqlite_path", "snapalert.db")
+    key = str(db_path)
+    with _lock:
+        if key not in _sqlite_stores:
+            _sqlite_stores[key] = SQLiteStore(db_path)
+        return _sqlite_stores[key]
+
+
+def get_intern_table(data_dir="data") -> InternTable:
+    """Get the shared string intern table (data/strings.jsonl)"""
+    path = Path(data_dir) / "strings.jsonl"
+    key = str(path)
+    with _lock:
+        if key not in _intern_tables:
+            _intern_tables[key] = InternTable(path)
+        return _intern_tables[key]
+
+
+def _get_segmented_log(
+    data_dir,
+    name: str,
+    time_field: str,
+    interned_fields: Tuple[str, ...] = (),
+    posting_field: Optional[str] = None,
+) -> SegmentedLog:
+    """Day-partitioned log in <data_dir>/<name>/, replacing <data_dir>/<name>.json"""
+    directory = Path(data_dir) / name
+    key = str(directory)
+    strings = get_intern_table(data_dir) if interned_fields else None
+    with _lock:
+        if key not in _segmented_logs:
+            _segmented_logs[key] = SegmentedLog(
+                directory,
+                time_field=time_field,
+                legacy_file=Path(data_dir) / f"{name}.json",
+                strings=strings,
+                interned_fields=interned_fields,
+                posting_field=posting_field,
+            )
+        return _segmented_logs[key]
+
+
+def _segmented_activity_log(data_dir) -> SegmentedLog:
+    """The file-backed activity log, whichever backend is configured"""
+    return _get_segmented_log(
+        data_dir, "logs", "start", ACTIVITY_INTERNED_FIELDS, posting_field="app"
+    )
+
+
+def _segmented_browser_log(data_dir) -> BrowserEventLog:
+    """The file-backed browser event log, whichever backend is configured"""
+    key = str(Path(data_dir))
+    with _lock:
+        if key in _browser_logs:
+            return _browser_logs[key]
+    log = BrowserEventLog(
+        _get_segmented_log(data_dir, "browser_logs", "timestamp"),
+        TabTable(Path(data_dir) / "browser_tabs.jsonl"),
+        get_intern_table(data_dir),
+    )
+    with _lock:
+        return _browser_logs.setdefault(key, log)
+
+
+def get_activity_log(data_dir="data"):
+    """Get the shared activity log for a data directory"""
+    store = get_sqlite_store(data_dir)
+    if store is not None:
+        return SQLiteActivityLog(store, get_intern_table(data_dir))
+    return _segmented_activity_log(data_dir)
+
+
+def get_browser_log(data_dir="data"):
+    """Get the browser event log (day-partitioned and compactly encoded, or SQLite)"""
+    store = get_sqlite_store(data_dir)
+    if store is not None:
+        return SQLiteBrowserLog(store)
+    return _segmented_browser_log(data_dir)
+
+
+def get_log_writer(data_dir="data") -> LogWriter:
+    """Get the group-commit writer for the activity log (tracker only)"""
+    key = str(Path(data_dir))
+    with _lock:
+        if key in _log_writers:
+            return _log_writers[key]
+    writer = LogWriter(
+        get_activity_log(data_dir), load_storage_config(data_dir)["log_writer"]
+    )
+    with _lock:
+        return _log_writers.setdefault(key, writer)
+
+
+def get_analysis_log(data_dir="data") -> SegmentedLog:
+    """Get the day-partitioned AI analysis run log (data/ai_analysis_log/)"""
+    return _get_segmented_log(data_dir, "ai_analysis_log", "timestamp")
+
+
+def get_daily_archive(data_dir="data") -> DailyArchive:
+    """Get the columnar archive of closed days (data/archive/YYYYMMDD.npz)"""
+    key = str(Path(data_dir))
+    with _lock:
+        if key not in _archives:
+            _archives[key] = DailyArchive(Path(data_dir) / "archive")
+        return _archives[key]
+
+
+def get_usage_rollups(data_dir="data") -> UsageRollups:
+    """Get the incrementally maintained usage rollups (data/rollups/)"""
+    key = str(Path(data_dir))
+    with _lock:
+        if key not in _rollups:
+            _rollups[key] = UsageRollups(Path(data_dir) / "rollups")
+        return _rollups[key]
+
+
+def _get_record_store(data_dir, name: str, max_records=None) -> RecordStore:
+    path = Path(data_dir) / f"{name}.jsonl"
+    key = str(path)
+    with _lock:
+        if key not in _record_stores:
+            _record_stores[key] = RecordStore(
+                path,
+                legacy_file=Path(data_dir) / f"{name}.json",
+                max_records=max_records,
+            )
+        return _record_stores[key]
+
+
+def get_session_store(data_dir="data"):
+    """Get the shared session store (sessions.jsonl or SQLite)"""
+    store = get_sqlite_store(data_dir)
+    if store is not None:
+        return SQLiteSessionLog(store)
+    return _get_record_store(data_dir, "sessions")
+
+
+def get_insights_store(data_dir="data") -> RecordStore:
+    """Get the store for AI analysis insights (insights.jsonl)"""
+    return _get_record_store(data_dir, "insights", max_records=MAX_INSIGHTS)
+
+
+def get_session_insights_store(data_dir="data") -> RecordStore:
+    """Get the store for end-of-session insights (session_insights.jsonl)"""
+    return _get_record_store(data_dir, "session_insights", max_records=MAX_INSIGHTS)
+
+
+def get_alert_events_store(data_dir="data") -> RecordStore:
+    """Get the store of recently fired alerts (alert_events.jsonl)"""
+    return _get_record_store(data_dir, "alert_events", max_records=MAX_ALERT_EVENTS)
@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import deque
+from typing import Callable, Deque, Dict, Hashable, List, Optional
+
+# Jobs waiting at most; submit() waits for room once the queue is full
+DEFAULT_QUEUE_SIZE = 256
+
+# Recent jobs kept for the latency percentiles
+LATENCY_SAMPLES = 512
+
+
+class _Job:
+    __slots__ = ("key", "fn", "args", "enqueued_at")
+
+    def __init__(self, key, fn, args, enqueued_at):
+        self.key = key
+        self.fn = fn
+        self.args = args
+        self.enqueued_at = enqueued_at
+
+
+def _percentiles(samples) -> Dict:
+    if not samples:
+        return {"last": 0.0, "avg": 0.0, "p50": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    count = len(ordered)
+    return {
+        "last": round(samples[-1], 3),
+        "avg": round(sum(ordered) / count, 3),
+        "p50": round(ordered[(count - 1) // 2], 3),
+        "p99": round(ordered[min(count - 1, int(count * 0.99))], 3),
+        "max": round(ordered[-1], 3),
+    }
+
+
+class BackgroundWriter:
+    """Single thread that runs the tracker's disk writes off its loop.
+
+    ``submit(key, fn, *args)`` queues ``fn(*args)`` and returns at once.
+    Jobs run one at a time in submission order. A job with a key replaces
+    a still-queued job with the same key (its place in the queue is kept),
+    so snapshots like the alert config are written once however often they
+    change; jobs with key None (appends) are never merged. The queue is
+    bounded: when it's full, submit() waits for the thread to catch up.
+
+    Job arguments are used by the thread after submit() returns, so pass
+    snapshots rather than objects the caller keeps changing.
+
+    Queue waits are measured on ``clock`` (the tracker's, simulated during
+    a replay); write times are always real time.
+    """
+
+    def __init__(
+        self,
+        max_size: int = DEFAULT_QUEUE_SIZE,
+        name="snapalert-writer",
+        clock: Callable[[], float] = time.time,
+    ):
+        self.max_size = max(1, int(max_size))
+        self.name = name
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+        self._idle = threading.Condition(self._lock)
+        self._queue: Deque[_Job] = deque()
+        self._pending: Dict[Hashable, _Job] = {}
+        self._running: Optional[_Job] = None  # job being run
+        self._closed = False
+        self._thread: Optional[threading.Thread] = None
+
+        self._submitted = 0
+        self._coalesced = 0
+        self._completed = 0
+        self._failed = 0
+        self._full_waits = 0
+        self._max_depth = 0
+        self._write_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self._wait_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+
+    def _start_locked(self) -> None:
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name=self.name)
+            self._thread.daemon = True
+            self._thread.start()
+
+    def submit(self, key: Optional[Hashable], fn: Callable, *args) -> None:
+        """Queue fn(*args); a queued job with the same (non-None) key is replaced"""
+        with self._lock:
+            closed = self._closed
+            if not closed:
+                self._submitted += 1
+                self._enqueue_locked(key, fn, args)
+        if closed:
+            # Shutting down: nothing will drain the queue any more
+            self._run_inline(fn, args)
+
+    def _enqueue_locked(self, key, fn: Callable, args) -> None:
+        while True:
+            if key is not None and key in self._pending:
+                job = self._pending[key]
+                job.fn, job.args = fn, args
+                self._coalesced += 1
+                return
+            if len(self._queue) < self.max_size:
+                break
+            self._full_waits += 1
+            self._not_full.wait()
+
+        job = _Job(key, fn, args, self.clock())
+        self._queue.append(job)
+        if key is not None:
+            self._pending[key] = job
+        self._max_depth = max(self._max_depth, len(self._queue))
+        self._start_locked()
+        self._not_empty.notify()
+
+    def pending(self, key: Hashable):
+        """Arguments of the newest unfinished job with this key, or None"""
+        with self._lock:
+            job = self._pending.get(key)
+            if job is None and self._running is not None:
+                if self._running.key == key:
+                    job = self._running
+            return job.args if job is not None else None
+
+    def _run_inline(self, fn: Callable, args) -> None:
+        try:
+            fn(*args)
+        except Exception as e:
+            with self._lock:
+                self._failed += 1
+            print(f"[Storage] Background write failed: {e}")
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while not self._queue:
+                    if self._closed:
+                        return
+                    self._not_empty.wait()
+                job = self._queue.popleft()
+                if job.key is not None and self._pending.get(job.key) is job:
+                    del self._pending[job.key]
+                self._running = job
+                self._not_full.notify()
+
+            waited = self.clock() - job.enqueued_at
+            started = time.perf_counter()
+            try:
+                job.fn(*job.args)
+                failed = False
+            except Exception as e:
+                failed = True
+                print(f"[Storage] Background write {job.key or ''} failed: {e}")
+            finished = time.perf_counter()
+
+            with self._lock:
+                self._running = None
+                self._completed += 1
+                if failed:
+                    self._failed += 1
+                self._wait_ms.append(waited * 1000)
+                self._write_ms.append((finished - started) * 1000)
+                if not self._queue:
+                    self._idle.notify_all()
+
+    def drain(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every queued job has run; False if timeout passed first"""
+        deadline = None if timeout is None else time.time() + timeout
+        with self._lock:
+            while self._queue or self._running is not None:
+                if self._thread is None or not self._thread.is_alive():
+                    return False
+                remaining = None if deadline is None else deadline - time.time()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._idle.wait(remaining)
+        return True
+
+    def close(self, timeout: Optional[float] = 10.0) -> bool:
+        """Run what's queued and stop the thread; later submits run inline"""
+        drained = self.drain(timeout)
+        with self._lock:
+            self._closed = True
+            self._not_empty.notify_all()
+            left: List[_Job] = list(self._queue) if not drained else []
+        if left:
+            print(f"[Storage] Background writer stopped with {len(left)} jobs queued")
+        return drained
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._queue)
+
+    def stats(self) -> Dict:
+        """Queue depth, counters and write/queue-wait latency in milliseconds"""
+        with self._lock:
+            return {
+                "depth": len(self._queue),
+                "max_depth": self._max_depth,
+                "capacity": self.max_size,
+                "submitted": self._submitted,
+                "coalesced": self._coalesced,
+                "completed": self._completed,
+                "failed": self._failed,
+                "full_waits": self._full_waits,
+                "write_ms": _percentiles(self._write_ms),
+                "wait_ms": _percentiles(self._wait_ms),
+            }
+
+
+_background_writer: Optional[BackgroundWriter] = None
+_background_writer_lock = threading.Lock()
+
+
+def get_background_writer() -> BackgroundWriter:
+    """Get the process-wide background writer"""
+    global _background_writer
+    with _background_writer_lock:
+        if _background_writer is None:
+            _background_writer = BackgroundWriter()
+        return _background_writer
@@ -0,0 +1,307 @@
+import hashlib
+import json
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .intern import InternTable
+from .segmented_log import SegmentedLog
+
+# Fields that make up a tab's identity; they are stored once in the tab table
+TAB_FIELDS = ("browser", "url", "title", "category", "search_query")
+
+# Delta fields whose string values go through the intern table
+INTERNED_DELTA_FIELDS = ("url", "title", "window_title")
+
+# Two closes of the same tab are merged when the second one was first seen
+# within this many seconds of the first one's last sighting
+MERGE_GAP_SECONDS = 60
+
+TAB_ID_LENGTH = 12
+
+_DIGITS = re.compile(r"\d+")
+
+
+def _identity_key(tab_data: Dict) -> str:
+    url = tab_data.get("url") or ""
+    # Titles often carry live counters or timers ("(3) Inbox", "12:04 left");
+    # ignore their digits so a changing title stays one tab.
+    title = _DIGITS.sub("0", tab_data.get("title") or "")
+    if not url.startswith(("http://", "https://")):
+        # Without a real URL the placeholder may be derived from the title too
+        url = _DIGITS.sub("0", url)
+    return "\0".join((tab_data.get("browser") or "", url, title))
+
+
+def tab_id(tab_data: Dict) -> str:
+    """Stable id of a tab identity (the same in every process)"""
+    return hashlib.sha1(_identity_key(tab_data).encode("utf-8")).hexdigest()[
+        :TAB_ID_LENGTH
+    ]
+
+
+class TabTable:
+    """Persistent table of interned tab identities (data/browser_tabs.jsonl).
+
+    Ids are derived from the identity itself, so the tracker and the
+    compactor can both add tabs without coordinating; a duplicate line
+    is harmless.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._tabs: Dict[str, Dict] = {}
+        self._read_offset = 0
+
+    def _refresh_locked(self):
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._read_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        # Leave a torn trailing line for the next refresh
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            self._tabs[record.pop("id")] = record
+        self._read_offset += end
+
+    def get(self, tab: str) -> Optional[Dict]:
+        with self._lock:
+            if tab not in self._tabs:
+                self._refresh_locked()
+            return self._tabs.get(tab)
+
+    def intern(self, tab_data: Dict) -> str:
+        """Return the id for a tab, adding its identity to the table if new"""
+        tab = tab_id(tab_data)
+        with self._lock:
+            if tab not in self._tabs:
+                self._refresh_locked()
+            if tab not in self._tabs:
+                identity = {field: tab_data.get(field) for field in TAB_FIELDS}
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write(json.dumps({"id": tab, **identity}) + "\n")
+                self._tabs[tab] = identity
+        return tab
+
+
+def encode_event(
+    event: Dict, tabs: TabTable, strings: Optional[InternTable] = None
+) -> Dict:
+    """Encode a browser event as a tab reference plus what differs from it"""
+    tab_data = event.get("tab_data")
+    if not isinstance(tab_data, dict):
+        return event
+
+    tab = tabs.intern(tab_data)
+    identity = tabs.get(tab) or {}
+    start = tab_data.get("start_time") or 0
+
+    encoded = {
+        "timestamp": event.get("timestamp"),
+        "action": event.get("action"),
+        "tab": tab,
+        "start": round(start, 3),
+        "total": round(tab_data.get("total_time") or 0, 3),
+    }
+    if tab_data.get("last_active") is not None:
+        encoded["last"] = round(tab_data["last_active"] - start, 3)
+
+    delta = {}
+    for key, value in tab_data.items():
+        if key in ("start_time", "total_time", "last_active"):
+            continue
+        if key in TAB_FIELDS and identity.get(key) == value:
+            continue
+        if key == "window_title" and value == tab_data.get("title"):
+            continue
+        if key == "is_active" and not value:
+            continue
+        if key == "visit_count" and value == 1:
+            continue
+        delta[key] = value
+    if delta:
+        if strings is not None:
+            delta = strings.encode_fields(delta, INTERNED_DELTA_FIELDS)
+        encoded["delta"] = delta
+
+    for key, value in event.items():
+        if key not in ("timestamp", "action", "tab_data"):
+            encoded[key] = value
+    return encoded
+
+
+def decode_event(
+    record: Dict, tabs: TabTable, strings: Optional[InternTable] = None
+) -> Dict:
+    """Turn an encoded record back into the original event shape"""
+    if "tab" not in record:
+        return record  # already in the full format
+
+    tab_data = dict(tabs.get(record["tab"]) or {})
+    start = record.get("start", 0)
+    tab_data["start_time"] = start
+    tab_data["total_time"] = record.get("total", 0)
+    if "last" in record:
+        tab_data["last_active"] = start + record["last"]
+    tab_data.setdefault("is_active", False)
+    tab_data.setdefault("visit_count", 1)
+    delta = record.get("delta", {})
+    if strings is not None:
+        delta = strings.decode_fields(delta, INTERNED_DELTA_FIELDS)
+    tab_data.update(delta)
+    tab_data.setdefault("window_title", tab_data.get("title"))
+
+    event = {
+        key: value
+        for key, value in record.items()
+        if key not in ("tab", "start", "total", "last", "delta")
+    }
+    event["tab_data"] = tab_data
+    return event
+
+
+def merge_tab_closed_runs(events: Iterable[Dict]) -> List[Dict]:
+    """Merge tab_closed events of the same tab whose lifetimes overlap.
+
+    A title change (e.g. a live timer) makes the tracker see a new tab and
+    later log a close for the old one; those runs collapse into a single
+    event spanning the whole run. Other events pass through untouched.
+    """
+    runs: Dict[str, List[Dict]] = {}
+    merged = []
+    for event in events:
+        tab_data = event.get("tab_data")
+        if event.get("action") != "tab_closed" or not isinstance(tab_data, dict):
+            merged.append(event)
+            continue
+        runs.setdefault(tab_id(tab_data), []).append(event)
+
+    for run in runs.values():
+        run.sort(key=lambda e: e["tab_data"].get("start_time") or 0)
+        current = None
+        current_end = 0
+        for event in run:
+            tab_data = event["tab_data"]
+            start = tab_data.get("start_time") or 0
+            end = start + (tab_data.get("total_time") or 0)
+
+            if current is not None and start <= current_end + MERGE_GAP_SECONDS:
+                current_data = current["tab_data"]
+                current_end = max(current_end, end)
+                first_start = current_data["start_time"]
+                # The latest sighting wins for title, URL etc.
+                current_data.update(
+                    {
+                        key: value
+                        for key, value in tab_data.items()
+                        if key not in ("start_time", "visit_count")
+                    }
+                )
+                current_data["start_time"] = first_start
+                current_data["total_time"] = current_end - first_start
+                current_data["last_active"] = max(
+                    current_data.get("last_active") or 0,
+                    tab_data.get("last_active") or 0,
+                )
+                current_data["visit_count"] = max(
+                    current_data.get("visit_count") or 1,
+                    tab_data.get("visit_count") or 1,
+                )
+                current["timestamp"] = max(current["timestamp"], event["timestamp"])
+                current["merged_events"] = current.get("merged_events", 1) + 1
+                continue
+
+            if current is not None:
+                merged.append(current)
+            current = {**event, "tab_data": dict(tab_data)}
+            current_end = end
+        if current is not None:
+            merged.append(current)
+
+    merged.sort(key=lambda e: e.get("timestamp") or "")
+    return merged
+
+
+class BrowserEventLog:
+    """Day-partitioned browser event log with compact tab_closed encoding.
+
+    Events are written as references into the tab table plus the fields that
+    differ from it, and read back in their original shape. Closed days are
+    compacted by merging redundant tab_closed runs. With an intern table,
+    the titles and URLs left in a record's delta are stored as string ids.
+    """
+
+    def __init__(
+        self, log: SegmentedLog, tabs: TabTable, strings: Optional[InternTable] = None
+    ):
+        self.log = log
+        self.tabs = tabs
+        self.strings = strings
+
+    def append(self, event: Dict) -> None:
+        self.append_many([event])
+
+    def append_many(self, events: List[Dict]) -> None:
+        self.log.append_many(
+            [encode_event(event, self.tabs, self.strings) for event in events]
+        )
+
+    def _decode(self, records: Iterable[Dict]) -> Iterator[Dict]:
+        for record in records:
+            yield decode_event(record, self.tabs, self.strings)
+
+    def iter_all(self) -> Iterator[Dict]:
+        return self._decode(self.log.iter_all())
+
+    def read_range(
+        self, start_ts: Optional[float] = None, end_ts: Optional[float] = None
+    ) -> Iterator[Dict]:
+        return self._decode(self.log.read_range(start_ts, end_ts))
+
+    def tail(self, n: int = 10) -> List[Dict]:
+        return list(self._decode(self.log.tail(n)))
+
+    def compact_closed(self, now: Optional[float] = None) -> int:
+        """Merge tab_closed runs in closed, uncompressed days.
+
+        Returns how many events were removed.
+        """
+        now = now or time.time()
+        removed = 0
+        for segment in self.log.closed_segments(now):
+            events = list(self._decode(self.log.iter_segment(segment)))
+            compacted = merge_tab_closed_runs(events)
+            records = [
+                encode_event(event, self.tabs, self.strings) for event in compacted
+            ]
+            self.log.rewrite_segment(segment, records)
+            removed += len(events) - len(compacted)
+        return removed
+
+    # Rotation and bookkeeping go straight to the underlying log
+
+    def migrate_legacy(self) -> int:
+        return self.log.migrate_legacy()
+
+    def days(self) -> List[str]:
+        return self.log.days()
+
+    def version(self):
+        return self.log.version()
+
+    def compress_closed(self, now: Optional[float] = None):
+        return self.log.compress_closed(now)
+
+    def apply_retention(self, keep_days: int, now: Optional[float] = None) -> int:
+        return self.log.apply_retention(keep_days, now)
@@ -0,0 +1,117 @@
+import hashlib
+import os
+import threading
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable, Optional
+
+# Compressed files start with MAGIC followed by the id of the preset
+# dictionary they were compressed with
+MAGIC = b"SNZ1"
+DICT_ID_LENGTH = 16
+DICT_SUFFIX = ".zdict"
+
+# zlib only looks back 32KB, so a larger dictionary wouldn't help
+MAX_DICT_BYTES = 32 * 1024
+
+COMPRESSION_LEVEL = 9
+
+
+def build_dictionary(samples: Iterable[bytes], size: int = MAX_DICT_BYTES) -> bytes:
+    """Build a preset dictionary from sample records.
+
+    Log records share most of their bytes (field names, app names, common
+    titles), so a dictionary made of distinct recent records lets even a
+    small segment compress as well as a large one. zlib favours the end of
+    the dictionary, so later samples are kept when trimming.
+    """
+    seen = set()
+    parts = []
+    for sample in samples:
+        sample = sample.strip()
+        if sample and sample not in seen:
+            seen.add(sample)
+            parts.append(sample + b"\n")
+    return b"".join(parts)[-size:]
+
+
+class PresetDictionary:
+    """Shared zlib preset dictionaries stored next to the files they compress.
+
+    A dictionary is never rewritten once created; each compressed file names
+    the dictionary it needs, so older files stay readable.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._cache: Dict[str, bytes] = {}
+
+    @staticmethod
+    def dictionary_id(data: bytes) -> str:
+        return hashlib.sha1(data).hexdigest()[:DICT_ID_LENGTH]
+
+    def path_for(self, dict_id: str) -> Path:
+        return self.directory / f"{dict_id}{DICT_SUFFIX}"
+
+    def load(self, dict_id: str) -> bytes:
+        with self._lock:
+            if dict_id not in self._cache:
+                with open(self.path_for(dict_id), "rb") as f:
+                    self._cache[dict_id] = f.read()
+            return self._cache[dict_id]
+
+    def current(self) -> Optional[str]:
+        """Id of the dictionary new files are compressed with, if one exists"""
+        try:
+            names = sorted(
+                name for name in os.listdir(self.directory) if name.endswith(DICT_SUFFIX)
+            )
+        except FileNotFoundError:
+            return None
+        return names[0][: -len(DICT_SUFFIX)] if names else None
+
+    def ensure(self, samples: Iterable[bytes]) -> str:
+        """Return the current dictionary id, creating it from samples if needed"""
+        dict_id = self.current()
+        if dict_id is not None:
+            return dict_id
+
+        data = build_dictionary(samples)
+        dict_id = self.dictionary_id(data)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path_for(dict_id).with_suffix(".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path_for(dict_id))
+        return dict_id
+
+    def compress(self, data: bytes, dict_id: str) -> bytes:
+        compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=self.load(dict_id))
+        return (
+            MAGIC
+            + dict_id.encode("ascii")
+            + compressor.compress(data)
+            + compressor.flush()
+        )
+
+    def decompress(self, blob: bytes) -> bytes:
+        if not blob.startswith(MAGIC):
+            raise ValueError("not a compressed log file")
+        header_size = len(MAGIC) + DICT_ID_LENGTH
+        dict_id = blob[len(MAGIC) : header_size].decode("ascii")
+        decompressor = zlib.decompressobj(zdict=self.load(dict_id))
+        return decompressor.decompress(blob[header_size:]) + decompressor.flush()
+
+    def compress_file(self, source: Path, target: Path, dict_id: str) -> None:
+        """Compress source into target atomically (source is left in place)"""
+        with open(source, "rb") as f:
+            blob = self.compress(f.read(), dict_id)
+        tmp_path = target.with_name(target.name + ".tmp")
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+        os.replace(tmp_path, target)
+
+    def read_file(self, path: Path) -> bytes:
+        with open(path, "rb") as f:
+            return self.decompress(f.read())
@@ -0,0 +1,130 @@
+import csv
+import io
+import json
+import zlib
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from .backend import (
+    get_activity_log,
+    get_browser_log,
+    get_session_store,
+)
+
+# Bytes collected before a chunk is handed to the response
+EXPORT_CHUNK_BYTES = 64 * 1024
+
+EXPORT_FORMATS = ("ndjson", "csv")
+
+# CSV columns per export kind; browser columns are taken from tab_data
+CSV_COLUMNS = {
+    "logs": ["app", "title", "start", "end", "duration_sec"],
+    "sessions": ["start", "end", "duration_sec"],
+    "browser": [
+        "timestamp",
+        "action",
+        "browser",
+        "title",
+        "url",
+        "category",
+        "search_query",
+        "start_time",
+        "total_time",
+        "visit_count",
+    ],
+}
+
+EXPORT_KINDS = tuple(CSV_COLUMNS)
+
+
+def iter_export_records(
+    kind: str,
+    data_dir="data",
+    start_ts: Optional[float] = None,
+    end_ts: Optional[float] = None,
+) -> Iterator[Dict]:
+    """Stream the records of one kind in a time range, oldest first"""
+    if kind == "logs":
+        return get_activity_log(data_dir).read_range(start_ts, end_ts)
+    if kind == "sessions":
+        return get_session_store(data_dir).read_range(start_ts, end_ts)
+    if kind == "browser":
+        return get_browser_log(data_dir).read_range(start_ts, end_ts)
+    raise ValueError(f"unknown export kind: {kind}")
+
+
+def _flatten_browser_event(event: Dict) -> Dict:
+    row = dict(event.get("tab_data") or {})
+    row["timestamp"] = event.get("timestamp")
+    row["action"] = event.get("action")
+    return row
+
+
+def _chunked(lines: Iterable[str]) -> Iterator[bytes]:
+    buffer: List[str] = []
+    size = 0
+    for line in lines:
+        buffer.append(line)
+        size += len(line)
+        if size >= EXPORT_CHUNK_BYTES:
+            yield "".join(buffer).encode("utf-8")
+            buffer = []
+            size = 0
+    if buffer:
+        yield "".join(buffer).encode("utf-8")
+
+
+def ndjson_chunks(records: Iterable[Dict]) -> Iterator[bytes]:
+    """Encode records as newline-delimited JSON in ~64KB chunks"""
+    return _chunked(json.dumps(record) + "\n" for record in records)
+
+
+def csv_chunks(kind: str, records: Iterable[Dict]) -> Iterator[bytes]:
+    """Encode records as CSV (with a header row) in ~64KB chunks"""
+    columns = CSV_COLUMNS[kind]
+
+    def lines():
+        out = io.StringIO()
+        writer = csv.DictWriter(out, fieldnames=columns, extrasaction="ignore")
+        writer.writeheader()
+        for record in records:
+            if kind == "browser":
+                record = _flatten_browser_event(record)
+            writer.writerow(record)
+            yield out.getvalue()
+            out.seek(0)
+            out.truncate()
+        yield out.getvalue()
+
+    return _chunked(lines())
+
+
+def gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Gzip a stream of chunks without holding more than one in memory"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: gzip container
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_chunks(
+    kind: str,
+    export_format: str = "ndjson",
+    data_dir="data",
+    start_ts: Optional[float] = None,
+    end_ts: Optional[float] = None,
+    gzip: bool = False,
+) -> Iterator[bytes]:
+    """Byte chunks of an export, ready to stream as a response body"""
+    if kind not in EXPORT_KINDS:
+        raise ValueError(f"unknown export kind: {kind}")
+    if export_format not in EXPORT_FORMATS:
+        raise ValueError(f"unknown export format: {export_format}")
+
+    records = iter_export_records(kind, data_dir, start_ts, end_ts)
+    if export_format == "csv":
+        chunks = csv_chunks(kind, records)
+    else:
+        chunks = ndjson_chunks(records)
+    return gzip_chunks(chunks) if gzip else chunks
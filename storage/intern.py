@@ -0,0 +1,110 @@
+import json
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+
+class InternTable:
+    """Persistent table mapping repeated strings to small integer ids.
+
+    App names, window titles and URLs repeat in every log line, status
+    entry and browser record. The table (data/strings.jsonl) holds one
+    JSON string per line and a string's id is its line number, so ids are
+    the same in every process. Processes append without coordinating: a
+    string appended twice keeps its first id and the later line is only
+    an alias for it.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._strings: List[str] = []
+        self._read_offset = 0
+
+    def _refresh_locked(self):
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._read_offset)
+                data = f.read()
+        except FileNotFoundError:
+            return
+
+        # Leave a torn trailing line for the next refresh
+        end = data.rfind(b"\n") + 1
+        for line in data[:end].splitlines():
+            try:
+                value = json.loads(line)
+            except json.JSONDecodeError:
+                value = None
+            if not isinstance(value, str):
+                value = ""  # keep line numbers and ids in step
+            self._ids.setdefault(value, len(self._strings))
+            self._strings.append(value)
+        self._read_offset += end
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._strings)
+
+    def find(self, value: str) -> Optional[int]:
+        """Return the id of an already interned string without adding it"""
+        with self._lock:
+            string_id = self._ids.get(value)
+            if string_id is None:
+                self._refresh_locked()
+                string_id = self._ids.get(value)
+            return string_id
+
+    def intern(self, value: str) -> int:
+        """Return the id for a string, adding it to the table if new"""
+        string_id = self._ids.get(value)
+        if string_id is not None:
+            return string_id
+
+        with self._lock:
+            self._refresh_locked()
+            if value not in self._ids:
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                # One write of a whole line, so concurrent appends never interleave
+                with open(self.path, "ab") as f:
+                    f.write((json.dumps(value) + "\n").encode("utf-8"))
+                # Learn the id from the file, in case another process added lines
+                self._refresh_locked()
+            return self._ids[value]
+
+    def lookup(self, string_id: int) -> str:
+        """Return the string behind an id"""
+        if 0 <= string_id < len(self._strings):
+            return self._strings[string_id]
+        with self._lock:
+            self._refresh_locked()
+            if 0 <= string_id < len(self._strings):
+                return self._strings[string_id]
+        raise KeyError(f"unknown string id {string_id}")
+
+    def decode(self, value):
+        """Turn an id back into its string; anything else passes through"""
+        if isinstance(value, int) and not isinstance(value, bool):
+            try:
+                return self.lookup(value)
+            except KeyError:
+                return value
+        return value
+
+    def encode_fields(self, record: Dict, fields: Iterable[str]) -> Dict:
+        """Copy of record with the string values of fields replaced by ids"""
+        encoded = dict(record)
+        for field in fields:
+            value = encoded.get(field)
+            if isinstance(value, str):
+                encoded[field] = self.intern(value)
+        return encoded
+
+    def decode_fields(self, record: Dict, fields: Iterable[str]) -> Dict:
+        """Copy of record with the ids in fields replaced by their strings"""
+        decoded = dict(record)
+        for field in fields:
+            if field in decoded:
+                decoded[field] = self.decode(decoded[field])
+        return decoded
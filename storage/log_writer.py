@@ -0,0 +1,140 @@
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+FSYNC_POLICIES = ("none", "interval", "batch")
+
+DEFAULT_WRITER_CONFIG = {
+    "batch_size": 10,  # records buffered before a write
+    "max_delay_sec": 30,  # oldest buffered record is written after this long
+    "fsync": "interval",  # "none", "interval" or "batch"
+    "fsync_interval_sec": 60,
+    "idle_close_sec": 300,  # close the segment handles after this long idle
+}
+
+
+class LogWriter:
+    """Group-commit writer in front of an activity log.
+
+    Records are buffered and written as one batch once ``batch_size`` of
+    them are waiting or the oldest has waited ``max_delay_sec``, through
+    segment handles the log keeps open. ``fsync`` decides when batches are
+    forced to disk: never (the OS decides), at most every
+    ``fsync_interval_sec``, or after every batch. A crash loses at most the
+    unwritten buffer (and, without fsync, what the OS hadn't flushed); a
+    record torn by the crash is cut off when the writer starts.
+
+    The time limits follow ``clock`` (the tracker's, so a replay with a
+    simulated clock flushes on simulated time).
+    """
+
+    def __init__(
+        self,
+        log,
+        config: Optional[Dict] = None,
+        clock: Callable[[], float] = time.time,
+    ):
+        config = {**DEFAULT_WRITER_CONFIG, **(config or {})}
+        if config["fsync"] not in FSYNC_POLICIES:
+            raise ValueError(f"unknown fsync policy: {config['fsync']}")
+
+        self.log = log
+        self.batch_size = max(1, int(config["batch_size"]))
+        self.max_delay = float(config["max_delay_sec"])
+        self.fsync = config["fsync"]
+        self.fsync_interval = float(config["fsync_interval_sec"])
+        self.idle_close = float(config["idle_close_sec"])
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self._buffer: List[Dict] = []
+        self._first_buffered = 0.0
+        self._last_write = clock()
+        self._last_sync = clock()
+        self._handles_open = False
+
+        if hasattr(log, "keep_open"):
+            log.keep_open = True
+        if hasattr(log, "recover_torn_tail"):
+            log.recover_torn_tail()
+
+    def set_clock(self, clock: Callable[[], float]) -> None:
+        """Follow another clock from now on (restarts the time limits)"""
+        with self._lock:
+            self.clock = clock
+            now = clock()
+            self._first_buffered = self._last_write = self._last_sync = now
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._buffer)
+
+    def append(self, entry: Dict) -> bool:
+        """Buffer a record; returns True if this caused a batch to be written"""
+        with self._lock:
+            if not self._buffer:
+                self._first_buffered = self.clock()
+            self._buffer.append(entry)
+            if len(self._buffer) >= self.batch_size:
+                self._write_locked()
+                return True
+        return False
+
+    def flush(self, force: bool = False) -> bool:
+        """Write the buffer if a batch is due (or always with force).
+
+        Returns True if records were written. Call it regularly: the elapsed
+        time limit and the idle close are only checked here.
+        """
+        now = self.clock()
+        with self._lock:
+            due = now - self._first_buffered >= self.max_delay
+            if self._buffer and (force or due):
+                self._write_locked()
+                return True
+
+            if self._handles_open and now - self._last_write >= self.idle_close:
+                # Don't hold a closed day's segment open (rotation compresses it)
+                self._sync_locked()
+                if hasattr(self.log, "close"):
+                    self.log.close()
+                self._handles_open = False
+            elif (
+                self.fsync == "interval"
+                and now - self._last_sync >= self.fsync_interval
+            ):
+                self._sync_locked()
+        return False
+
+    def close(self) -> None:
+        """Write everything, sync and release the log's handles"""
+        with self._lock:
+            if self._buffer:
+                self._write_locked()
+            self._sync_locked()
+            if hasattr(self.log, "close"):
+                self.log.close()
+            self._handles_open = False
+
+    def _write_locked(self) -> None:
+        batch = self._buffer
+        self._buffer = []
+        try:
+            self.log.append_many(batch)
+        except Exception:
+            # Keep the records for the next attempt
+            self._buffer = batch + self._buffer
+            raise
+        self._last_write = self.clock()
+        self._handles_open = True
+
+        if self.fsync == "batch" or (
+            self.fsync == "interval"
+            and self._last_write - self._last_sync >= self.fsync_interval
+        ):
+            self._sync_locked()
+
+    def _sync_locked(self) -> None:
+        if self.fsync != "none" and hasattr(self.log, "sync"):
+            self.log.sync()
+        self._last_sync = self.clock()
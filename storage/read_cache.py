@@ -0,0 +1,77 @@
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable
+
+from .versions import file_version
+
+
+class ReadCache:
+    """Cache of parsed data files keyed on their data version.
+
+    ``read_json`` keys an entry on the file's path and only re-parses it
+    when its (mtime_ns, size) changes; ``get`` does the same for anything
+    with its own version (e.g. a record store). Cached objects are shared
+    between callers and threads, so they must be treated as read-only;
+    copy one before changing it.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries: Dict[Hashable, tuple] = {}  # key -> (version, value)
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, version: Hashable, load: Callable[[], Any]) -> Any:
+        """Return the cached value for key, calling load() if version changed"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        # Parse outside the lock; a concurrent miss for the same key only
+        # means the file is parsed twice.
+        value = load()
+        with self._lock:
+            self._entries[key] = (version, value)
+        return value
+
+    def read_json(self, path, default: Any = None) -> Any:
+        """Parsed contents of a JSON file, or default if it doesn't exist"""
+        version = file_version(path)
+        if version == (0, 0):
+            return default
+
+        def load():
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+
+        return self.get(("file", str(path)), version, load)
+
+    def invalidate(self, key: Hashable = None) -> None:
+        """Drop one entry, or every entry when key is None"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for monitoring"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+            }
+
+
+_read_cache = ReadCache()
+
+
+def get_read_cache() -> ReadCache:
+    """Get the process-wide read cache"""
+    return _read_cache
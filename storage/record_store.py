@@ -0,0 +1,252 @@
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .segmented_log import entry_timestamp
+from .tail import tail_records
+from .versions import file_version
+
+# A rewrite's temporary file this old was left behind by a crash
+STALE_TMP_SECONDS = 60
+
+
+class RecordStore:
+    """Append-only JSON-lines store with cheap access to the newest records.
+
+    Appending costs the same no matter how much history exists, and
+    ``latest()`` / ``tail(n)`` only read the end of the file. When
+    ``max_records`` is set, old records are dropped in an occasional
+    compaction once the file holds twice that many, which keeps the
+    amortised write cost constant.
+
+    A legacy JSON array file (the previous format) is converted on first use.
+    """
+
+    def __init__(self, path, legacy_file=None, max_records: Optional[int] = None):
+        self.path = Path(path)
+        self.legacy_file = Path(legacy_file) if legacy_file else None
+        self.max_records = max_records
+
+        self._lock = threading.Lock()
+        self._migrated = False
+        self._counted_size = 0
+        self._count = 0
+
+    # ------------------------------------------------------------------
+    # Migration
+    # ------------------------------------------------------------------
+
+    def _ensure_migrated(self) -> bool:
+        """Convert the legacy file if needed; False while it is still unconverted"""
+        if self._migrated:
+            return True
+        if not self.legacy_file or not self.legacy_file.exists():
+            self._migrated = True
+            return True
+        if self.path.exists():
+            self._migrated = True
+            return True
+
+        try:
+            with open(self.legacy_file, "r", encoding="utf-8") as f:
+                records = json.load(f)
+            if not isinstance(records, list):
+                records = [records]
+
+            # The tracker and the web app may both start converting it
+            self._write_all(records, exclusive=True)
+            migrated_path = self.legacy_file.with_name(
+                self.legacy_file.name + ".migrated"
+            )
+            os.replace(self.legacy_file, migrated_path)
+        except FileExistsError:
+            # Another process is converting it right now
+            self._remove_stale_tmp()
+            return False
+        except Exception as e:
+            if self.path.exists() and not self.legacy_file.exists():
+                # Another process finished converting it first
+                self._migrated = True
+                return True
+            print(f"[Storage] Error migrating {self.legacy_file}: {e}")
+            return False
+
+        self._migrated = True
+        print(
+            f"[Storage] Migrated {len(records)} records from {self.legacy_file} to {self.path}"
+        )
+        return True
+
+    def _tmp_path(self) -> Path:
+        return self.path.with_name(self.path.name + ".tmp")
+
+    def _remove_stale_tmp(self):
+        """Remove a temporary file left behind by a crash during a rewrite"""
+        tmp_path = self._tmp_path()
+        try:
+            if time.time() - tmp_path.stat().st_mtime > STALE_TMP_SECONDS:
+                os.remove(tmp_path)
+        except FileNotFoundError:
+            pass
+
+    def _write_all(self, records: List[Dict], exclusive: bool = False):
+        """Atomically replace the store contents.
+
+        With ``exclusive``, raises FileExistsError if another writer's
+        temporary file is in the way instead of sharing it.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self._tmp_path()
+        try:
+            with open(tmp_path, "x" if exclusive else "w", encoding="utf-8") as f:
+                for record in records:
+                    f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            os.replace(tmp_path, self.path)
+        except FileExistsError:
+            raise
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+        self._counted_size = 0
+        self._count = 0
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, record: Dict) -> None:
+        """Append one record"""
+        with self._lock:
+            if not self._ensure_migrated():
+                # Creating the new file now would orphan the legacy one
+                raise RuntimeError(f"{self.legacy_file} has not been migrated yet")
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+            if self.max_records and self._count_locked() > 2 * self.max_records:
+                self._write_all(self._read_all_locked()[-self.max_records :])
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _count_locked(self) -> int:
+        """Count records, only scanning bytes appended since the last count"""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            self._counted_size = 0
+            self._count = 0
+            return 0
+
+        if size < self._counted_size:
+            # File was compacted or replaced by another process
+            self._counted_size = 0
+            self._count = 0
+
+        if size > self._counted_size:
+            with open(self.path, "rb") as f:
+                f.seek(self._counted_size)
+                while True:
+                    chunk = f.read(1024 * 1024)
+                    if not chunk:
+                        break
+                    self._count += chunk.count(b"\n")
+            self._counted_size = size
+
+        return self._count
+
+    def count(self) -> int:
+        """Number of records in the store"""
+        with self._lock:
+            self._ensure_migrated()
+            count = self._count_locked()
+        if self.max_records:
+            count = min(count, self.max_records)
+        return count
+
+    def version(self) -> Tuple:
+        """Cheap data version that changes whenever the store is written"""
+        return file_version(self.path) + file_version(self.legacy_file)
+
+    def latest(self) -> Optional[Dict]:
+        """Return the newest record, or None when the store is empty"""
+        records = self.tail(1)
+        return records[0] if records else None
+
+    def tail(self, n: int) -> List[Dict]:
+        """Return the newest n records, oldest first"""
+        with self._lock:
+            self._ensure_migrated()
+        if self.max_records:
+            n = min(n, self.max_records)
+        return tail_records(self.path, n)
+
+    def _read_all_locked(self) -> List[Dict]:
+        records = []
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        records.append(json.loads(line))
+                    except json.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            pass
+        return records
+
+    def read_range(
+        self,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+        time_field: str = "start",
+    ) -> Iterator[Dict]:
+        """Stream the records with start_ts <= timestamp < end_ts, oldest first"""
+        with self._lock:
+            self._ensure_migrated()
+            skip = 0
+            if self.max_records:
+                skip = max(0, self._count_locked() - self.max_records)
+
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    if skip:
+                        skip -= 1
+                        continue
+                    ts = entry_timestamp(record, time_field)
+                    if ts is None:
+                        continue
+                    if start_ts is not None and ts < start_ts:
+                        continue
+                    if end_ts is not None and ts >= end_ts:
+                        continue
+                    yield record
+        except FileNotFoundError:
+            return
+
+    def read_all(self) -> List[Dict]:
+        """Return every record, oldest first"""
+        with self._lock:
+            self._ensure_migrated()
+            records = self._read_all_locked()
+        if self.max_records:
+            records = records[-self.max_records :]
+        return records
@@ -0,0 +1,318 @@
+import argparse
+import copy
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .segmented_log import entry_timestamp
+from .versions import file_version
+
+TOTALS_FILE = "totals.json"
+
+# Activity runs at least this long are kept per app as possibly idle windows
+LONG_RUN_SECONDS = 1800
+
+
+def _day_key(ts: float) -> str:
+    return datetime.fromtimestamp(ts).strftime("%Y%m%d")
+
+
+def _empty_day(day: str) -> Dict:
+    return {
+        "day": day,
+        "total_time": 0.0,
+        "entries": 0,
+        "sessions": 0,
+        "session_time": 0.0,
+        # app -> {"time": seconds, "count": entries}
+        "apps": {},
+        # app -> {"HH": [seconds, entries]}
+        "hours": {},
+        # app -> [durations of runs >= LONG_RUN_SECONDS]
+        "long_runs": {},
+    }
+
+
+def _split_by_hour(start_ts: float, end_ts: float):
+    """Yield (hour start, seconds) for each clock hour a run overlaps"""
+    hour = datetime.fromtimestamp(start_ts).replace(minute=0, second=0, microsecond=0)
+    current = start_ts
+    while current < end_ts:
+        next_hour = (hour + timedelta(hours=1)).timestamp()
+        yield hour, min(end_ts, next_hour) - current
+        current = next_hour
+        hour += timedelta(hours=1)
+
+
+class UsageRollups:
+    """Usage totals maintained as activity happens (data/rollups/).
+
+    The tracker adds every finished app run and session, so stats and the
+    analyzer read precomputed totals instead of rescanning the logs:
+
+    - ``YYYYMMDD.json``: per-app and per-app-per-hour time for one day
+    - ``totals.json``: per-day totals (active time, sessions, session time)
+
+    Only the tracker writes; changes are kept in memory and written out by
+    ``flush()``. Files are replaced atomically so readers never see a
+    partial one.
+    """
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self._lock = threading.Lock()
+        self._days: Dict[str, Dict] = {}  # day documents touched by this process
+        self._dirty = set()
+        self._totals: Optional[Dict] = None
+        self._totals_dirty = False
+        self._read_cache: Dict[str, tuple] = {}  # path -> (version, data)
+
+    # ------------------------------------------------------------------
+    # Files
+    # ------------------------------------------------------------------
+
+    def path_for(self, day: str) -> Path:
+        return self.directory / f"{day}.json"
+
+    @property
+    def totals_path(self) -> Path:
+        return self.directory / TOTALS_FILE
+
+    def _read(self, path: Path) -> Optional[Dict]:
+        version = file_version(path)
+        if version == (0, 0):
+            return None
+        cached = self._read_cache.get(str(path))
+        if cached and cached[0] == version:
+            return cached[1]
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError) as e:
+            print(f"[Storage] Error reading rollup {path}: {e}")
+            return None
+        self._read_cache[str(path)] = (version, data)
+        return data
+
+    def _write(self, path: Path, data: Dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+
+    @property
+    def built(self) -> bool:
+        """Whether rollups exist (history has been rolled up at least once)"""
+        return self.totals_path.exists()
+
+    # ------------------------------------------------------------------
+    # Updating (tracker)
+    # ------------------------------------------------------------------
+
+    def _day_locked(self, day: str) -> Dict:
+        if day not in self._days:
+            stored = self._read(self.path_for(day))
+            # Copy: the parsed file is shared with readers through _read_cache
+            self._days[day] = copy.deepcopy(stored) if stored else _empty_day(day)
+        return self._days[day]
+
+    def _totals_locked(self) -> Dict:
+        if self._totals is None:
+            stored = self._read(self.totals_path)
+            self._totals = copy.deepcopy(stored["days"]) if stored else {}
+        return self._totals
+
+    def _day_totals_locked(self, day: str) -> Dict:
+        totals = self._totals_locked()
+        if day not in totals:
+            totals[day] = {"total_time": 0.0, "sessions": 0, "session_time": 0.0}
+        self._totals_dirty = True
+        return totals[day]
+
+    def add_activity(self, app: str, start_ts: float, end_ts: float) -> None:
+        """Add one finished app run, split over the hours and days it spans"""
+        if end_ts <= start_ts:
+            return
+        app = app or "Unknown"
+        duration = end_ts - start_ts
+
+        with self._lock:
+            first = True
+            for hour, seconds in _split_by_hour(start_ts, end_ts):
+                day = hour.strftime("%Y%m%d")
+                doc = self._day_locked(day)
+                doc["total_time"] += seconds
+
+                app_totals = doc["apps"].setdefault(app, {"time": 0.0, "count": 0})
+                app_totals["time"] += seconds
+                bucket = doc["hours"].setdefault(app, {}).setdefault(
+                    hour.strftime("%H"), [0.0, 0]
+                )
+                bucket[0] += seconds
+                if first:
+                    # The run counts once, where it started
+                    doc["entries"] += 1
+                    app_totals["count"] += 1
+                    bucket[1] += 1
+                    if duration >= LONG_RUN_SECONDS:
+                        runs = doc["long_runs"].setdefault(app, [])
+                        runs.append(round(duration, 2))
+                    first = False
+
+                self._day_totals_locked(day)["total_time"] += seconds
+                self._dirty.add(day)
+
+    def add_entry(self, entry: Dict) -> None:
+        """Add an activity log entry ({"app", "start", "end", "duration_sec"})"""
+        start_ts = entry_timestamp(entry, "start")
+        if start_ts is None:
+            return
+        end_ts = entry_timestamp(entry, "end")
+        if end_ts is None:
+            end_ts = start_ts + (entry.get("duration_sec") or 0)
+        self.add_activity(entry.get("app"), start_ts, end_ts)
+
+    def add_session(self, session: Dict) -> None:
+        """Add a finished session to the day it started on"""
+        start_ts = entry_timestamp(session, "start")
+        if start_ts is None:
+            return
+        day = _day_key(start_ts)
+        duration = session.get("duration_sec", 0) or 0
+        with self._lock:
+            doc = self._day_locked(day)
+            doc["sessions"] += 1
+            doc["session_time"] += duration
+            totals = self._day_totals_locked(day)
+            totals["sessions"] += 1
+            totals["session_time"] += duration
+            self._dirty.add(day)
+
+    def flush(self) -> None:
+        """Write changed days and the per-day totals"""
+        with self._lock:
+            for day in sorted(self._dirty):
+                self._write(self.path_for(day), self._days[day])
+            self._dirty.clear()
+            # Only today's document keeps changing; drop the rest
+            today = _day_key(time.time())
+            self._days = {day: doc for day, doc in self._days.items() if day >= today}
+
+            if self._totals_dirty or not self.totals_path.exists():
+                self._write(
+                    self.totals_path,
+                    {"updated_at": time.time(), "days": self._totals_locked()},
+                )
+                self._totals_dirty = False
+
+    def rebuild(self, activity_log, sessions: Iterable[Dict]) -> Dict:
+        """Recompute every rollup from the activity log and the sessions"""
+        with self._lock:
+            self._days = {}
+            self._dirty = set()
+            self._totals = {}
+            self._totals_dirty = True
+            if self.directory.exists():
+                for name in os.listdir(self.directory):
+                    if name.endswith(".json"):
+                        os.remove(self.directory / name)
+
+        entries = 0
+        for entry in activity_log.iter_all():
+            self.add_entry(entry)
+            entries += 1
+        session_count = 0
+        for session in sessions:
+            self.add_session(session)
+            session_count += 1
+        self.flush()
+        return {"entries": entries, "sessions": session_count}
+
+    # ------------------------------------------------------------------
+    # Reading (stats and analysis)
+    # ------------------------------------------------------------------
+
+    def version(self):
+        return file_version(self.totals_path)
+
+    def day_totals(self) -> Dict[str, Dict]:
+        """Per-day totals {day: {total_time, sessions, session_time}}"""
+        with self._lock:
+            if self._totals is not None:
+                return {day: dict(t) for day, t in self._totals.items()}
+        stored = self._read(self.totals_path)
+        return stored["days"] if stored else {}
+
+    def load_day(self, day: str) -> Dict:
+        """Per-app and per-hour rollup of one day"""
+        with self._lock:
+            if day in self._days:
+                return copy.deepcopy(self._days[day])
+        return self._read(self.path_for(day)) or _empty_day(day)
+
+    def days(self) -> List[str]:
+        """List the days that have rollups, oldest first"""
+        return sorted(self.day_totals())
+
+    def app_usage(
+        self, start_ts: float, end_ts: Optional[float] = None
+    ) -> Dict[str, Dict]:
+        """Per-app {"total_time", "sessions"} for the hours in [start_ts, end_ts)"""
+        end_ts = end_ts or time.time()
+        start_hour = datetime.fromtimestamp(start_ts).replace(
+            minute=0, second=0, microsecond=0
+        )
+        usage = {}
+        day = start_hour.replace(hour=0)
+        while day.timestamp() < end_ts:
+            doc = self.load_day(day.strftime("%Y%m%d"))
+            for app, hours in doc["hours"].items():
+                for hour_key, (seconds, count) in hours.items():
+                    hour = day.replace(hour=int(hour_key))
+                    if hour < start_hour or hour.timestamp() >= end_ts:
+                        continue
+                    totals = usage.setdefault(app, {"total_time": 0.0, "sessions": 0})
+                    totals["total_time"] += seconds
+                    totals["sessions"] += count
+            day += timedelta(days=1)
+        return usage
+
+    def long_runs(self, start_ts: float, end_ts: Optional[float] = None) -> Dict:
+        """Per-app durations of long runs recorded on the days in the window"""
+        end_ts = end_ts or time.time()
+        runs = {}
+        day = datetime.fromtimestamp(start_ts).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        while day.timestamp() < end_ts:
+            for app, durations in self.load_day(day.strftime("%Y%m%d"))[
+                "long_runs"
+            ].items():
+                runs.setdefault(app, []).extend(durations)
+            day += timedelta(days=1)
+        return runs
+
+
+def main():
+    from .backend import get_activity_log, get_session_store, get_usage_rollups
+
+    parser = argparse.ArgumentParser(description="Rebuild SnapAlert usage rollups")
+    parser.add_argument("--data-dir", default="data")
+    args = parser.parse_args()
+
+    counts = get_usage_rollups(args.data_dir).rebuild(
+        get_activity_log(args.data_dir), get_session_store(args.data_dir).read_all()
+    )
+    print(
+        f"[Storage] Rolled up {counts['entries']} log entries and "
+        f"{counts['sessions']} sessions"
+    )
+
+
+if __name__ == "__main__":
+    main()
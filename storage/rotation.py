@@ -0,0 +1,90 @@
+import argparse
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+
+from .backend import (
+    get_activity_log,
+    get_analysis_log,
+    get_browser_log,
+    get_sqlite_store,
+    load_storage_config,
+)
+from .browser_events import BrowserEventLog
+
+
+def _retention_cutoff(keep_days: int, now: float) -> float:
+    day = datetime.fromtimestamp(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    return (day - timedelta(days=keep_days)).timestamp()
+
+
+def rotate(data_dir="data", now: Optional[float] = None) -> Dict:
+    """Compress closed day partitions and apply the retention limits.
+
+    Covers the activity log, the browser log and the AI analysis log; the
+    browser log's tab_closed runs are merged first. With
+    the SQLite backend, activity and browser rows older than the retention
+    limit are deleted instead (SQLite has nothing to compress).
+    """
+    now = now or time.time()
+    config = load_storage_config(data_dir)
+    retention = config.get("retention_days") or {}
+    store = get_sqlite_store(data_dir)
+
+    logs = {"ai_analysis_log": get_analysis_log(data_dir)}
+    if store is None:
+        logs["browser_logs"] = get_browser_log(data_dir)
+        logs["logs"] = get_activity_log(data_dir)
+
+    result = {}
+    for name, log in logs.items():
+        removed = 0
+        if retention.get(name):
+            removed = log.apply_retention(retention[name], now)
+
+        merged = 0
+        if isinstance(log, BrowserEventLog):
+            # Merge redundant tab_closed runs before the day is compressed
+            merged = log.compact_closed(now)
+
+        compressed = []
+        if config.get("compress_closed_days", True):
+            compressed = log.compress_closed(now)
+
+        result[name] = {
+            "compressed": len(compressed),
+            "removed": removed,
+            "merged": merged,
+        }
+
+    if store is not None:
+        for name, table, column in (
+            ("logs", "activity_logs", "start_ts"),
+            ("browser_logs", "browser_events", "ts"),
+        ):
+            if retention.get(name):
+                removed = store.delete_before(
+                    table, column, _retention_cutoff(retention[name], now)
+                )
+                result.setdefault(name, {"compressed": 0, "removed": 0, "merged": 0})
+                result[name]["removed"] += removed
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compress closed days and apply retention to SnapAlert logs"
+    )
+    parser.add_argument("--data-dir", default="data")
+    args = parser.parse_args()
+
+    for name, counts in rotate(args.data_dir).items():
+        print(
+            f"[Storage] {name}: compressed {counts['compressed']} segment(s), "
+            f"removed {counts['removed']}, merged {counts['merged']} event(s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,961 @@
+import bisect
+import json
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .compression import PresetDictionary
+from .intern import InternTable
+from .tail import tail_records
+from .versions import file_version
+
+# Segments are rolled once they reach this size or when the day changes
+DEFAULT_MAX_SEGMENT_BYTES = 8 * 1024 * 1024
+
+# Write one sparse index entry every N records
+DEFAULT_INDEX_INTERVAL = 64
+
+SEGMENT_SUFFIX = ".jsonl"
+COMPRESSED_SUFFIX = ".jsonl.z"
+INDEX_SUFFIX = ".idx"
+POSTING_SUFFIX = ".post"
+
+# Closed days are only compressed this long after midnight, so late records
+# buffered by the tracker have been flushed first.
+CLOSE_GRACE_SECONDS = 3600
+
+# Records sampled from closed segments to build the preset dictionary
+DICTIONARY_SAMPLE_RECORDS = 2000
+
+
+def entry_timestamp(entry: Dict, time_field: str = "start") -> Optional[float]:
+    """Return the epoch timestamp of a log entry, or None if it has none"""
+    value = entry.get(time_field) or entry.get("timestamp")
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class SegmentedLog:
+    """Append-only JSON-lines log split into day/size-rolled segments.
+
+    Each segment ``YYYYMMDD-NNNN.jsonl`` has a sparse ``.idx`` sidecar holding
+    ``<timestamp> <byte offset>`` lines, so time-range reads seek straight to
+    the right place instead of parsing the whole history.
+
+    Segments are day partitions: once a day has closed its segments can be
+    compressed (``.jsonl.z``, zlib with a shared preset dictionary) and
+    segments older than the retention limit dropped.
+
+    With an intern table, the string values of ``interned_fields`` are
+    stored as integer ids and turned back into strings when read.
+
+    With a ``posting_field``, each segment also gets a ``.post`` sidecar of
+    ``<value> <byte offset>`` lines, one per record, so queries for a single
+    value (e.g. one app) only read the records that match.
+    """
+
+    def __init__(
+        self,
+        directory,
+        time_field: str = "start",
+        max_segment_bytes: int = DEFAULT_MAX_SEGMENT_BYTES,
+        index_interval: int = DEFAULT_INDEX_INTERVAL,
+        legacy_file=None,
+        keep_open: bool = False,
+        strings: Optional[InternTable] = None,
+        interned_fields: Tuple[str, ...] = (),
+        posting_field: Optional[str] = None,
+    ):
+        self.directory = Path(directory)
+        self.time_field = time_field
+        self.max_segment_bytes = max_segment_bytes
+        self.index_interval = index_interval
+        self.legacy_file = Path(legacy_file) if legacy_file else None
+        # Keep the active segment's handles open between appends (single writer)
+        self.keep_open = keep_open
+        self.strings = strings
+        self.interned_fields = interned_fields if strings is not None else ()
+        self.posting_field = posting_field
+
+        self._lock = threading.Lock()
+        self._active = None  # base path of the segment being appended to
+        self._active_day = None
+        self._records_since_index = 0
+        self._handles = None  # (segment, data, index, posting) kept open
+        self._index_cache = {}  # base path -> (idx size, [(ts, offset)], [ts])
+        self._posting_cache = {}  # base path -> (post size, {value: [offset]})
+        self._decompressed = None  # (base path, bytes) of the last compressed read
+        self.dictionary = PresetDictionary(self.directory)
+
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    # ------------------------------------------------------------------
+    # Segment bookkeeping
+    # ------------------------------------------------------------------
+
+    def segments(self) -> List[Path]:
+        """List segment base paths (without suffix), oldest first"""
+        try:
+            names = set()
+            for name in os.listdir(self.directory):
+                if name.endswith(SEGMENT_SUFFIX):
+                    names.add(name[: -len(SEGMENT_SUFFIX)])
+                elif name.endswith(COMPRESSED_SUFFIX):
+                    names.add(name[: -len(COMPRESSED_SUFFIX)])
+        except FileNotFoundError:
+            return []
+        return [self.directory / name for name in sorted(names)]
+
+    @staticmethod
+    def is_compressed(segment: Path) -> bool:
+        return segment.with_name(segment.name + COMPRESSED_SUFFIX).exists()
+
+    @staticmethod
+    def data_file(segment: Path) -> Path:
+        """The file holding a segment's records (compressed or plain)"""
+        compressed = segment.with_name(segment.name + COMPRESSED_SUFFIX)
+        if compressed.exists():
+            return compressed
+        return segment.with_suffix(SEGMENT_SUFFIX)
+
+    def version(self) -> Tuple:
+        """Cheap data version that changes whenever records are added or removed"""
+        segments = self.segments()
+        if not segments:
+            return ("legacy",) + file_version(self.legacy_file)
+        newest = self.data_file(segments[-1])
+        return (len(segments), segments[0].name, newest.name) + file_version(newest)
+
+    def days(self) -> List[str]:
+        """List the days (YYYYMMDD) that have segments, oldest first"""
+        return sorted({self.segment_day(segment) for segment in self.segments()})
+
+    @staticmethod
+    def segment_day(segment: Path) -> str:
+        """Return the YYYYMMDD day a segment belongs to"""
+        return segment.name.split("-", 1)[0]
+
+    def _new_segment(self, day: str) -> Path:
+        existing = [s for s in self.segments() if self.segment_day(s) == day]
+        seq = 0
+        if existing:
+            seq = int(existing[-1].name.split("-", 1)[1]) + 1
+        return self.directory / f"{day}-{seq:04d}"
+
+    def _segment_for(self, ts: float) -> Path:
+        """Pick (or roll) the segment that a record with timestamp ts goes to"""
+        day = datetime.fromtimestamp(ts).strftime("%Y%m%d")
+
+        if self._active is None:
+            segments = self.segments()
+            if segments:
+                self._active = segments[-1]
+                self._active_day = self.segment_day(self._active)
+                # Force an index entry for the first record we add
+                self._records_since_index = self.index_interval
+
+        if self._active is not None and self.is_compressed(self._active):
+            # The active segment was closed and compressed; start a fresh one
+            self._active = None
+            self._active_day = None
+
+        if self._active is not None and self._active_day == day:
+            if self._segment_size(self._active) < self.max_segment_bytes:
+                return self._active
+        elif self._active is not None and self._active_day > day:
+            # Late record for an older day: readers expect every segment to
+            # hold a single day in time order, so it goes to that day's
+            # newest segment (or a new one if that was compressed or is full)
+            return self._late_segment(day)
+
+        self._active = self._new_segment(day)
+        self._active_day = day
+        self._records_since_index = self.index_interval
+        return self._active
+
+    def _segment_size(self, segment: Path) -> int:
+        if self._handles and self._handles[0] == segment:
+            # Appends may still be in the write buffer
+            return self._handles[1].tell()
+        try:
+            return segment.with_suffix(SEGMENT_SUFFIX).stat().st_size
+        except FileNotFoundError:
+            return 0
+
+    def _late_segment(self, day: str) -> Path:
+        existing = [s for s in self.segments() if self.segment_day(s) == day]
+        if (
+            existing
+            and not self.is_compressed(existing[-1])
+            and self._segment_size(existing[-1]) < self.max_segment_bytes
+        ):
+            return existing[-1]
+        return self._new_segment(day)
+
+    # ------------------------------------------------------------------
+    # Interning
+    # ------------------------------------------------------------------
+
+    def _encode(self, entry: Dict) -> Dict:
+        if not self.interned_fields:
+            return entry
+        return self.strings.encode_fields(entry, self.interned_fields)
+
+    def _decode(self, entries: Iterable[Dict]) -> Iterator[Dict]:
+        if not self.interned_fields:
+            yield from entries
+            return
+        for entry in entries:
+            yield self.strings.decode_fields(entry, self.interned_fields)
+
+    # ------------------------------------------------------------------
+    # Writing
+    # ------------------------------------------------------------------
+
+    def append(self, entry: Dict) -> None:
+        """Append a single record"""
+        self.append_many([entry])
+
+    def append_many(self, entries: List[Dict]) -> None:
+        """Append records in order, rolling segments and indexing as needed"""
+        if not entries:
+            return
+
+        with self._lock:
+            # Segment -> sizes of its data, index and posting files before
+            # this batch, to take a failed batch back out again
+            written = {}
+            try:
+                for entry in entries:
+                    ts = entry_timestamp(entry, self.time_field)
+                    if ts is None:
+                        ts = datetime.now().timestamp()
+
+                    target = self._segment_for(ts)
+                    _, handle, index_handle, posting_handle = self._open_handles_locked(
+                        target
+                    )
+                    if target not in written:
+                        written[target] = (
+                            handle.tell(),
+                            index_handle.tell(),
+                            posting_handle.tell() if posting_handle else 0,
+                        )
+
+                    encoded = self._encode(entry)
+                    line = (json.dumps(encoded) + "\n").encode("utf-8")
+                    offset = handle.tell()
+                    handle.write(line)
+                    if posting_handle:
+                        posting_handle.write(
+                            f"{self._posting_key(encoded.get(self.posting_field))} "
+                            f"{offset}\n"
+                        )
+
+                    if self._records_since_index >= self.index_interval or not offset:
+                        index_handle.write(f"{ts!r} {offset}\n")
+                        self._records_since_index = 0
+                    self._records_since_index += 1
+            except BaseException:
+                # Callers retry the whole batch (LogWriter keeps it buffered)
+                self._undo_batch_locked(written)
+                raise
+            finally:
+                if self.keep_open:
+                    # Readers in other processes must see whole batches
+                    self._flush_handles_locked()
+                else:
+                    self._close_handles_locked()
+
+    def _undo_batch_locked(self, written: Dict[Path, Tuple[int, int, int]]) -> None:
+        """Cut the records of a failed batch off the segments it wrote to"""
+        self._close_handles_locked()
+        for segment, sizes in written.items():
+            suffixes = (SEGMENT_SUFFIX, INDEX_SUFFIX, POSTING_SUFFIX)
+            for suffix, size in zip(suffixes, sizes):
+                path = segment.with_suffix(suffix)
+                try:
+                    if size:
+                        os.truncate(path, size)
+                    elif path.exists():
+                        # The batch created this segment
+                        path.unlink()
+                except OSError as e:
+                    print(f"[Storage] Could not undo a failed write to {path}: {e}")
+        # Find the active segment again on the next append
+        self._active = None
+        self._active_day = None
+
+    def _open_handles_locked(self, segment: Path) -> Tuple:
+        """(segment, data, index, posting) handles for appending to a segment"""
+        if self._handles and self._handles[0] == segment:
+            return self._handles
+        self._close_handles_locked()
+        posting_handle = None
+        if self.posting_field:
+            posting_handle = open(
+                segment.with_suffix(POSTING_SUFFIX), "a", encoding="utf-8"
+            )
+        self._handles = (
+            segment,
+            open(segment.with_suffix(SEGMENT_SUFFIX), "ab"),
+            open(segment.with_suffix(INDEX_SUFFIX), "a", encoding="utf-8"),
+            posting_handle,
+        )
+        return self._handles
+
+    def _flush_handles_locked(self) -> None:
+        if self._handles:
+            for handle in self._handles[1:]:
+                if handle:
+                    handle.flush()
+
+    def _close_handles_locked(self) -> None:
+        if self._handles:
+            for handle in self._handles[1:]:
+                if handle:
+                    handle.close()
+            self._handles = None
+
+    def sync(self) -> None:
+        """fsync the open segment so appended records survive a power loss"""
+        with self._lock:
+            if not self._handles:
+                return
+            self._flush_handles_locked()
+            for handle in self._handles[1:]:
+                if handle:
+                    os.fsync(handle.fileno())
+
+    def close(self) -> None:
+        """Close the handles kept open for appending"""
+        with self._lock:
+            self._close_handles_locked()
+
+    def recover_torn_tail(self) -> int:
+        """Cut a torn final record (from a crash mid-write) off the newest segment.
+
+        Returns the number of bytes removed.
+        """
+        with self._lock:
+            segments = self.segments()
+            if not segments or self.is_compressed(segments[-1]):
+                return 0
+            data_path = segments[-1].with_suffix(SEGMENT_SUFFIX)
+            try:
+                size = data_path.stat().st_size
+            except FileNotFoundError:
+                return 0
+            if size == 0:
+                return 0
+
+            self._close_handles_locked()
+            with open(data_path, "r+b") as f:
+                block = 64 * 1024
+                end = size
+                while end > 0:
+                    start = max(0, end - block)
+                    f.seek(start)
+                    chunk = f.read(end - start)
+                    if end == size and chunk.endswith(b"\n"):
+                        return 0
+                    newline = chunk.rfind(b"\n")
+                    if newline >= 0:
+                        keep = start + newline + 1
+                        break
+                    end = start
+                else:
+                    keep = 0
+                f.truncate(keep)
+
+        print(
+            f"[Storage] Removed a torn {size - keep}-byte record from the end of "
+            f"{data_path}"
+        )
+        return size - keep
+
+    def migrate_legacy(self) -> int:
+        """Import a flat legacy log file into segments, once"""
+        if not self.legacy_file or not self.legacy_file.exists():
+            return 0
+        if self.segments():
+            return 0
+
+        imported = 0
+        batch = []
+        with open(self.legacy_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    batch.append(json.loads(line))
+                except json.JSONDecodeError:
+                    continue
+                if len(batch) >= 1000:
+                    self.append_many(batch)
+                    imported += len(batch)
+                    batch = []
+        if batch:
+            self.append_many(batch)
+            imported += len(batch)
+
+        migrated_path = self.legacy_file.with_name(self.legacy_file.name + ".migrated")
+        os.replace(self.legacy_file, migrated_path)
+        print(
+            f"[Storage] Migrated {imported} entries from {self.legacy_file} into {self.directory}"
+        )
+        return imported
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+
+    def _load_index(self, segment: Path) -> List[Tuple[float, int]]:
+        index_file = segment.with_suffix(INDEX_SUFFIX)
+        try:
+            size = index_file.stat().st_size
+        except FileNotFoundError:
+            return [(float("-inf"), 0)]
+
+        cached = self._index_cache.get(segment)
+        if cached and cached[0] == size:
+            return cached[1]
+
+        index = []
+        with open(index_file, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 2:
+                    continue  # torn trailing line
+                try:
+                    index.append((float(parts[0]), int(parts[1])))
+                except ValueError:
+                    continue
+        if not index:
+            index = [(float("-inf"), 0)]
+        self._index_cache[segment] = (size, index, [ts for ts, _ in index])
+        return index
+
+    def _index_offset(self, segment: Path, start_ts: float) -> int:
+        """Byte offset to start reading a segment from for records >= start_ts"""
+        index = self._load_index(segment)
+        cached = self._index_cache.get(segment)
+        keys = cached[2] if cached else [ts for ts, _ in index]
+        pos = bisect.bisect_right(keys, start_ts) - 1
+        return index[pos][1] if pos > 0 else 0
+
+    @staticmethod
+    def _posting_key(value) -> str:
+        # Values are ids or names; keep the key a single token
+        return json.dumps(value, separators=(",", ":")).replace(" ", "\\u0020")
+
+    def _load_postings(self, segment: Path) -> Optional[Dict[str, List[int]]]:
+        """value -> sorted record offsets for a segment, or None without a sidecar"""
+        posting_file = segment.with_suffix(POSTING_SUFFIX)
+        try:
+            size = posting_file.stat().st_size
+        except FileNotFoundError:
+            return None
+
+        cached = self._posting_cache.get(segment)
+        if cached and cached[0] == size:
+            return cached[1]
+
+        postings: Dict[str, List[int]] = {}
+        with open(posting_file, "r", encoding="utf-8") as f:
+            for line in f:
+                parts = line.split()
+                if len(parts) != 2:
+                    continue  # torn trailing line
+                try:
+                    postings.setdefault(parts[0], []).append(int(parts[1]))
+                except ValueError:
+                    continue
+        self._posting_cache[segment] = (size, postings)
+        return postings
+
+    def _iter_segment(self, segment: Path, offset: int = 0) -> Iterator[Dict]:
+        if self.is_compressed(segment):
+            yield from self._iter_compressed(segment, offset)
+            return
+        try:
+            with open(segment.with_suffix(SEGMENT_SUFFIX), "rb") as f:
+                f.seek(offset)
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue  # torn or partial record
+        except FileNotFoundError:
+            return
+
+    def _read_compressed(self, segment: Path) -> bytes:
+        # Compressed segments never change; keep the last one for paged queries
+        cached = self._decompressed
+        if cached and cached[0] == segment:
+            return cached[1]
+        try:
+            data = self.dictionary.read_file(self.data_file(segment))
+        except (FileNotFoundError, ValueError) as e:
+            print(f"[Storage] Error reading compressed segment {segment}: {e}")
+            return b""
+        self._decompressed = (segment, data)
+        return data
+
+    def _iter_compressed(self, segment: Path, offset: int = 0) -> Iterator[Dict]:
+        # Index offsets refer to the uncompressed bytes
+        for line in self._read_compressed(segment)[offset:].splitlines():
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+    def _tail_segment(self, segment: Path, n: int) -> List[Dict]:
+        if not self.is_compressed(segment):
+            return tail_records(segment.with_suffix(SEGMENT_SUFFIX), n)
+
+        records = []
+        for line in reversed(self._read_compressed(segment).splitlines()):
+            if len(records) >= n:
+                break
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+        records.reverse()
+        return records
+
+    def _iter_legacy(self) -> Iterator[Dict]:
+        if not self.legacy_file or not self.legacy_file.exists():
+            return
+        with open(self.legacy_file, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if line:
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+
+    def iter_all(self) -> Iterator[Dict]:
+        """Iterate over every record, oldest first"""
+        return self._decode(self._iter_all())
+
+    def _iter_all(self) -> Iterator[Dict]:
+        segments = self.segments()
+        if not segments:
+            yield from self._iter_legacy()
+            return
+        for segment in segments:
+            yield from self._iter_segment(segment)
+
+    def read_range(
+        self, start_ts: Optional[float] = None, end_ts: Optional[float] = None
+    ) -> Iterator[Dict]:
+        """Iterate over records with start_ts <= timestamp < end_ts"""
+        return self._decode(self._read_range(start_ts, end_ts))
+
+    def _segments_in_range(
+        self,
+        segments: List[Path],
+        start_ts: Optional[float],
+        end_ts: Optional[float],
+    ) -> Iterator[Path]:
+        """Segments that may hold records with start_ts <= timestamp < end_ts"""
+        start_day = (
+            datetime.fromtimestamp(start_ts).strftime("%Y%m%d") if start_ts else None
+        )
+        end_day = datetime.fromtimestamp(end_ts).strftime("%Y%m%d") if end_ts else None
+
+        for i, segment in enumerate(segments):
+            day = self.segment_day(segment)
+            if end_day and day > end_day:
+                return
+            # A segment can only hold records up to the first record of the next one
+            if start_day and i + 1 < len(segments):
+                if self.segment_day(segments[i + 1]) < start_day:
+                    continue
+
+            index = self._load_index(segment)
+            if end_ts is not None and index[0][0] >= end_ts:
+                return
+            if start_ts is not None and i + 1 < len(segments):
+                next_first = self._load_index(segments[i + 1])[0][0]
+                if next_first < start_ts:
+                    continue
+            yield segment
+
+    def _read_range(
+        self, start_ts: Optional[float], end_ts: Optional[float]
+    ) -> Iterator[Dict]:
+        segments = self.segments()
+        if not segments:
+            for entry in self._iter_legacy():
+                ts = entry_timestamp(entry, self.time_field)
+                if ts is None:
+                    continue
+                if (start_ts is None or ts >= start_ts) and (
+                    end_ts is None or ts < end_ts
+                ):
+                    yield entry
+            return
+
+        for segment in self._segments_in_range(segments, start_ts, end_ts):
+            offset = 0
+            if start_ts is not None:
+                offset = self._index_offset(segment, start_ts)
+
+            for entry in self._iter_segment(segment, offset):
+                ts = entry_timestamp(entry, self.time_field)
+                if ts is None:
+                    continue
+                if start_ts is not None and ts < start_ts:
+                    continue
+                if end_ts is not None and ts >= end_ts:
+                    return
+                yield entry
+
+    def _records_from(self, segment: Path, offset: int) -> Iterator[Tuple[int, Dict]]:
+        """Yield (offset of the next record, record) from a byte offset on"""
+        if self.is_compressed(segment):
+            data = self._read_compressed(segment)
+            while offset < len(data):
+                end = data.find(b"\n", offset)
+                end = len(data) if end < 0 else end + 1
+                line = data[offset:end].strip()
+                offset = end
+                if line:
+                    try:
+                        yield offset, json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+            return
+
+        try:
+            with open(segment.with_suffix(SEGMENT_SUFFIX), "rb") as f:
+                f.seek(offset)
+                while True:
+                    line = f.readline()
+                    if not line:
+                        return
+                    if not line.endswith(b"\n"):
+                        return  # torn trailing record, still being written
+                    line = line.strip()
+                    if line:
+                        try:
+                            yield f.tell(), json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+        except FileNotFoundError:
+            return
+
+    def _records_at(
+        self, segment: Path, offsets: List[int]
+    ) -> Iterator[Tuple[int, Dict]]:
+        """Yield (offset of the next record, record) for records at the given offsets"""
+        if self.is_compressed(segment):
+            data = self._read_compressed(segment)
+            for offset in offsets:
+                end = data.find(b"\n", offset)
+                end = len(data) if end < 0 else end + 1
+                try:
+                    yield end, json.loads(data[offset:end])
+                except json.JSONDecodeError:
+                    continue
+            return
+
+        try:
+            with open(segment.with_suffix(SEGMENT_SUFFIX), "rb") as f:
+                for offset in offsets:
+                    f.seek(offset)
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        return
+                    try:
+                        yield f.tell(), json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            return
+
+    def query(
+        self,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+        value=None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """Page through records with start_ts <= timestamp < end_ts, oldest first.
+
+        With ``value``, only records whose posting field equals it are
+        returned; segments with a posting sidecar are then read only at the
+        matching offsets. Returns the page and a cursor for the next page
+        (None once the range is exhausted).
+        """
+        if value is not None and not self.posting_field:
+            raise ValueError("this log has no posting field to filter on")
+
+        wanted = set()
+        if value is not None:
+            wanted.add(value)
+            if self.posting_field in self.interned_fields and isinstance(value, str):
+                string_id = self.strings.find(value)
+                if string_id is not None:
+                    wanted.add(string_id)
+
+        limit = max(1, limit)
+        segments = self.segments()
+        if not segments:
+            return self._query_legacy(start_ts, end_ts, wanted, limit, cursor)
+
+        cursor_segment, cursor_offset = None, 0
+        if cursor:
+            name, _, offset = cursor.rpartition(":")
+            cursor_segment, cursor_offset = name, int(offset)
+
+        records: List[Dict] = []
+        page_end = None
+        for segment in self._segments_in_range(segments, start_ts, end_ts):
+            if cursor_segment and segment.name < cursor_segment:
+                continue
+            if segment.name == cursor_segment:
+                offset = cursor_offset
+            elif start_ts is not None:
+                offset = self._index_offset(segment, start_ts)
+            else:
+                offset = 0
+
+            postings = self._load_postings(segment) if wanted else None
+            if postings is not None:
+                offsets = sorted(
+                    {
+                        o
+                        for v in wanted
+                        for o in postings.get(self._posting_key(v), ())
+                    }
+                )
+                positions = self._records_at(
+                    segment, offsets[bisect.bisect_left(offsets, offset) :]
+                )
+            else:
+                positions = self._records_from(segment, offset)
+
+            for next_offset, entry in positions:
+                if wanted and entry.get(self.posting_field) not in wanted:
+                    continue
+                ts = entry_timestamp(entry, self.time_field)
+                if ts is None:
+                    continue
+                if start_ts is not None and ts < start_ts:
+                    continue
+                if end_ts is not None and ts >= end_ts:
+                    return list(self._decode(records)), None
+                if len(records) == limit:
+                    # There is at least one more record: resume at this one
+                    return list(self._decode(records)), page_end
+                records.append(entry)
+                page_end = f"{segment.name}:{next_offset}"
+
+        return list(self._decode(records)), None
+
+    def _query_legacy(self, start_ts, end_ts, wanted, limit, cursor):
+        skip = int(cursor.rpartition(":")[2]) if cursor else 0
+        records = []
+        for position, entry in enumerate(self._read_range(start_ts, end_ts)):
+            if position < skip:
+                continue
+            if wanted and entry.get(self.posting_field) not in wanted:
+                continue
+            if len(records) == limit:
+                return list(self._decode(records)), f"legacy:{position}"
+            records.append(entry)
+        return list(self._decode(records)), None
+
+    def tail(self, n: int = 10) -> List[Dict]:
+        """Return the last n records, oldest first"""
+        return list(self._decode(self._tail(n)))
+
+    def _tail(self, n: int) -> List[Dict]:
+        if n <= 0:
+            return []
+
+        segments = self.segments()
+        if not segments:
+            if self.legacy_file:
+                return tail_records(self.legacy_file, n)
+            return []
+
+        # Read backwards from the newest segment, only touching the blocks
+        # that hold the requested records.
+        collected = []
+        for segment in reversed(segments):
+            needed = n - len(collected)
+            collected = self._tail_segment(segment, needed) + collected
+            if len(collected) >= n:
+                break
+        return collected
+
+    # ------------------------------------------------------------------
+    # Rotation
+    # ------------------------------------------------------------------
+
+    def closed_segments(self, now: float) -> List[Path]:
+        """Uncompressed segments whose day closed more than the grace period ago.
+
+        Segments written to within the grace period are left alone too: the
+        tracker may still hold them open for late records.
+        """
+        closed_before = datetime.fromtimestamp(now - CLOSE_GRACE_SECONDS).strftime(
+            "%Y%m%d"
+        )
+        closed = []
+        for segment in self.segments():
+            if self.segment_day(segment) >= closed_before:
+                break
+            if segment == self._active or self.is_compressed(segment):
+                continue
+            try:
+                modified = segment.with_suffix(SEGMENT_SUFFIX).stat().st_mtime
+            except FileNotFoundError:
+                continue
+            if now - modified >= CLOSE_GRACE_SECONDS:
+                closed.append(segment)
+        return closed
+
+    def iter_segment(self, segment: Path) -> Iterator[Dict]:
+        """Iterate over the records of one segment"""
+        return self._decode(self._iter_segment(segment))
+
+    def rewrite_segment(self, segment: Path, entries: List[Dict]) -> None:
+        """Atomically replace an uncompressed segment's records and sidecars"""
+        data_path = segment.with_suffix(SEGMENT_SUFFIX)
+        index_path = segment.with_suffix(INDEX_SUFFIX)
+        posting_path = segment.with_suffix(POSTING_SUFFIX)
+        data_tmp = data_path.with_name(data_path.name + ".tmp")
+        index_tmp = index_path.with_name(index_path.name + ".tmp")
+        posting_tmp = posting_path.with_name(posting_path.name + ".tmp")
+
+        with self._lock:
+            postings = []
+            with open(data_tmp, "wb") as handle, open(
+                index_tmp, "w", encoding="utf-8"
+            ) as index_handle:
+                for i, entry in enumerate(entries):
+                    if i % self.index_interval == 0:
+                        ts = entry_timestamp(entry, self.time_field)
+                        if ts is not None:
+                            index_handle.write(f"{ts!r} {handle.tell()}\n")
+                    encoded = self._encode(entry)
+                    if self.posting_field:
+                        key = self._posting_key(encoded.get(self.posting_field))
+                        postings.append(f"{key} {handle.tell()}\n")
+                    handle.write((json.dumps(encoded) + "\n").encode("utf-8"))
+
+            if self.posting_field:
+                with open(posting_tmp, "w", encoding="utf-8") as f:
+                    f.writelines(postings)
+                os.replace(posting_tmp, posting_path)
+            os.replace(index_tmp, index_path)
+            os.replace(data_tmp, data_path)
+            self._index_cache.pop(segment, None)
+            self._posting_cache.pop(segment, None)
+
+    def _dictionary_samples(self, segments: List[Path]) -> Iterator[bytes]:
+        count = 0
+        for segment in reversed(segments):
+            with open(segment.with_suffix(SEGMENT_SUFFIX), "rb") as f:
+                for line in f:
+                    yield line
+                    count += 1
+                    if count >= DICTIONARY_SAMPLE_RECORDS:
+                        return
+
+    def compress_closed(self, now: Optional[float] = None) -> List[Path]:
+        """Compress the segments of closed days with the shared preset dictionary"""
+        now = now or time.time()
+        with self._lock:
+            closed = self.closed_segments(now)
+            if not closed:
+                return []
+
+            dict_id = self.dictionary.ensure(self._dictionary_samples(closed))
+            compressed = []
+            for segment in closed:
+                plain = segment.with_suffix(SEGMENT_SUFFIX)
+                target = segment.with_name(segment.name + COMPRESSED_SUFFIX)
+                try:
+                    before = plain.stat()
+                    self.dictionary.compress_file(plain, target, dict_id)
+                    after = plain.stat()
+                    if (after.st_size, after.st_mtime) != (
+                        before.st_size,
+                        before.st_mtime,
+                    ):
+                        raise OSError("appended to while compressing")
+                    # Raises on Windows while another process has it open
+                    os.remove(plain)
+                except OSError as e:
+                    # Keep the plain segment; it is tried again next time
+                    print(f"[Storage] Could not compress {plain}: {e}")
+                    try:
+                        os.remove(target)
+                    except OSError:
+                        pass
+                    continue
+                compressed.append(segment)
+        return compressed
+
+    def apply_retention(self, keep_days: int, now: Optional[float] = None) -> int:
+        """Delete segments of days older than keep_days; returns how many went"""
+        now = now or time.time()
+        cutoff = (datetime.fromtimestamp(now) - timedelta(days=keep_days)).strftime(
+            "%Y%m%d"
+        )
+
+        removed = 0
+        with self._lock:
+            for segment in self.segments():
+                if self.segment_day(segment) >= cutoff:
+                    break
+                if self._handles and self._handles[0] == segment:
+                    self._close_handles_locked()
+                for suffix in (
+                    SEGMENT_SUFFIX,
+                    COMPRESSED_SUFFIX,
+                    INDEX_SUFFIX,
+                    POSTING_SUFFIX,
+                ):
+                    path = segment.with_name(segment.name + suffix)
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                self._index_cache.pop(segment, None)
+                self._posting_cache.pop(segment, None)
+                if self._decompressed and self._decompressed[0] == segment:
+                    self._decompressed = None
+                if segment == self._active:
+                    self._active = None
+                    self._active_day = None
+                removed += 1
+        return removed
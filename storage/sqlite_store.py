@@ -0,0 +1,573 @@
+import argparse
+import json
+import sqlite3
+import threading
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .intern import InternTable
+from .segmented_log import entry_timestamp
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS activity_logs (
+    id INTEGER PRIMARY KEY,
+    start_ts REAL NOT NULL,
+    end_ts REAL,
+    app TEXT,
+    title TEXT,
+    duration_sec REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_activity_start ON activity_logs (start_ts);
+CREATE INDEX IF NOT EXISTS idx_activity_app ON activity_logs (app, start_ts);
+
+CREATE TABLE IF NOT EXISTS sessions (
+    id INTEGER PRIMARY KEY,
+    start_ts REAL NOT NULL,
+    end_ts REAL,
+    duration_sec REAL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_start ON sessions (start_ts);
+
+CREATE TABLE IF NOT EXISTS browser_events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    action TEXT,
+    browser TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_browser_ts ON browser_events (ts);
+CREATE INDEX IF NOT EXISTS idx_browser_browser ON browser_events (browser, ts);
+
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+class SQLiteStore:
+    """SQLite (WAL mode) storage for activity logs, sessions and browser logs.
+
+    WAL lets the Flask process read while the tracker writes, and every
+    write is a row insert instead of a whole-file rewrite. Each thread gets
+    its own connection, since Flask serves requests from several threads.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._local = threading.local()
+
+        conn = self._connection()
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(str(self.db_path), timeout=10)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def close(self):
+        """Close this thread's connection"""
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+    def table_version(self, table: str) -> Tuple:
+        """Lowest and highest row id of a table.
+
+        Rows are only ever inserted at the end or pruned from the start, so
+        this changes on every write and costs two index lookups.
+        """
+        return self._connection().execute(
+            f"SELECT (SELECT MIN(id) FROM {table}), (SELECT MAX(id) FROM {table})"
+        ).fetchone()
+
+    def delete_before(self, table: str, column: str, ts: float) -> int:
+        """Delete rows older than ts (retention); returns the number deleted"""
+        if (table, column) not in (
+            ("activity_logs", "start_ts"),
+            ("browser_events", "ts"),
+            ("sessions", "start_ts"),
+        ):
+            raise ValueError(f"Unknown table/column: {table}.{column}")
+        conn = self._connection()
+        with conn:
+            cursor = conn.execute(f"DELETE FROM {table} WHERE {column} < ?", (ts,))
+        return cursor.rowcount
+
+    # ------------------------------------------------------------------
+    # Activity logs
+    # ------------------------------------------------------------------
+
+    def append_logs(self, entries: List[Dict]) -> None:
+        """Insert activity log entries"""
+        rows = []
+        for entry in entries:
+            start_ts = entry_timestamp(entry, "start")
+            if start_ts is None:
+                start_ts = datetime.now().timestamp()
+            rows.append(
+                (
+                    start_ts,
+                    entry_timestamp(entry, "end"),
+                    entry.get("app"),
+                    entry.get("title"),
+                    entry.get("duration_sec"),
+                    json.dumps(entry),
+                )
+            )
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO activity_logs (start_ts, end_ts, app, title, duration_sec, data) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+
+    def tail_logs(self, n: int = 10) -> List[Dict]:
+        """Return the last n activity log entries, oldest first"""
+        rows = self._connection().execute(
+            "SELECT data FROM activity_logs ORDER BY start_ts DESC, id DESC LIMIT ?",
+            (n,),
+        )
+        return [json.loads(data) for (data,) in rows][::-1]
+
+    def query_logs(
+        self,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+        app: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """One page of activity logs; the cursor is "<start_ts>:<id>" of the last row"""
+        query = "SELECT id, start_ts, data FROM activity_logs WHERE 1=1"
+        params = []
+        if start_ts is not None:
+            query += " AND start_ts >= ?"
+            params.append(start_ts)
+        if end_ts is not None:
+            query += " AND start_ts < ?"
+            params.append(end_ts)
+        if app is not None:
+            query += " AND app = ?"
+            params.append(app)
+        if cursor:
+            last_ts, _, last_id = cursor.partition(":")
+            query += " AND (start_ts > ? OR (start_ts = ? AND id > ?))"
+            params.extend([float(last_ts), float(last_ts), int(last_id)])
+        query += " ORDER BY start_ts, id LIMIT ?"
+        params.append(max(1, limit) + 1)
+
+        rows = self._connection().execute(query, params).fetchall()
+        page = rows[: max(1, limit)]
+        next_cursor = None
+        if len(rows) > len(page):
+            next_cursor = f"{page[-1][1]!r}:{page[-1][0]}"
+        return [json.loads(data) for _, _, data in page], next_cursor
+
+    def log_days(self) -> List[str]:
+        """Days (YYYYMMDD, local time) that have activity logs, oldest first"""
+        rows = self._connection().execute(
+            "SELECT DISTINCT strftime('%Y%m%d', start_ts, 'unixepoch', 'localtime') "
+            "FROM activity_logs ORDER BY 1"
+        )
+        return [day for (day,) in rows]
+
+    def read_logs_range(
+        self,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+        app: Optional[str] = None,
+    ) -> Iterator[Dict]:
+        """Iterate over activity logs in a time window, optionally for one app"""
+        query = "SELECT data FROM activity_logs WHERE 1=1"
+        params = []
+        if app:
+            query += " AND app = ?"
+            params.append(app)
+        if start_ts is not None:
+            query += " AND start_ts >= ?"
+            params.append(start_ts)
+        if end_ts is not None:
+            query += " AND start_ts < ?"
+            params.append(end_ts)
+        query += " ORDER BY start_ts, id"
+
+        for (data,) in self._connection().execute(query, params):
+            yield json.loads(data)
+
+    # ------------------------------------------------------------------
+    # Sessions
+    # ------------------------------------------------------------------
+
+    def append_session(self, session: Dict) -> None:
+        """Insert a finished session"""
+        start_ts = entry_timestamp(session, "start") or datetime.now().timestamp()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT INTO sessions (start_ts, end_ts, duration_sec, data) VALUES (?, ?, ?, ?)",
+                (
+                    start_ts,
+                    entry_timestamp(session, "end"),
+                    session.get("duration_sec"),
+                    json.dumps(session),
+                ),
+            )
+
+    def read_sessions(self) -> List[Dict]:
+        """Return all sessions, oldest first"""
+        rows = self._connection().execute(
+            "SELECT data FROM sessions ORDER BY start_ts, id"
+        )
+        return [json.loads(data) for (data,) in rows]
+
+    def read_sessions_range(
+        self, start_ts: Optional[float] = None, end_ts: Optional[float] = None
+    ) -> Iterator[Dict]:
+        """Iterate over sessions that started in a time window"""
+        query = "SELECT data FROM sessions WHERE 1=1"
+        params = []
+        if start_ts is not None:
+            query += " AND start_ts >= ?"
+            params.append(start_ts)
+        if end_ts is not None:
+            query += " AND start_ts < ?"
+            params.append(end_ts)
+        query += " ORDER BY start_ts, id"
+
+        for (data,) in self._connection().execute(query, params):
+            yield json.loads(data)
+
+    def tail_sessions(self, n: int) -> List[Dict]:
+        """Return the last n sessions, oldest first"""
+        rows = self._connection().execute(
+            "SELECT data FROM sessions ORDER BY start_ts DESC, id DESC LIMIT ?", (n,)
+        )
+        return [json.loads(data) for (data,) in rows][::-1]
+
+    def count_sessions(self) -> int:
+        """Number of stored sessions"""
+        return self._connection().execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+    # ------------------------------------------------------------------
+    # Browser logs
+    # ------------------------------------------------------------------
+
+    def append_browser_events(self, events: List[Dict]) -> None:
+        """Insert browser log events"""
+        rows = []
+        for event in events:
+            ts = entry_timestamp(event, "timestamp") or datetime.now().timestamp()
+            browser = (event.get("tab_data") or {}).get("browser")
+            rows.append((ts, event.get("action"), browser, json.dumps(event)))
+        conn = self._connection()
+        with conn:
+            conn.executemany(
+                "INSERT INTO browser_events (ts, action, browser, data) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def read_browser_events(
+        self, start_ts: Optional[float] = None, end_ts: Optional[float] = None
+    ) -> Iterator[Dict]:
+        """Iterate over browser events in a time window"""
+        query = "SELECT data FROM browser_events WHERE 1=1"
+        params = []
+        if start_ts is not None:
+            query += " AND ts >= ?"
+            params.append(start_ts)
+        if end_ts is not None:
+            query += " AND ts < ?"
+            params.append(end_ts)
+        query += " ORDER BY ts, id"
+
+        for (data,) in self._connection().execute(query, params):
+            yield json.loads(data)
+
+    def tail_browser_events(self, n: int) -> List[Dict]:
+        """Return the last n browser events, oldest first"""
+        rows = self._connection().execute(
+            "SELECT data FROM browser_events ORDER BY ts DESC, id DESC LIMIT ?", (n,)
+        )
+        return [json.loads(data) for (data,) in rows][::-1]
+
+    def browser_days(self) -> List[str]:
+        """Days (YYYYMMDD, local time) that have browser events, oldest first"""
+        rows = self._connection().execute(
+            "SELECT DISTINCT strftime('%Y%m%d', ts, 'unixepoch', 'localtime') "
+            "FROM browser_events ORDER BY 1"
+        )
+        return [day for (day,) in rows]
+
+    # ------------------------------------------------------------------
+    # One-shot import of the JSON files
+    # ------------------------------------------------------------------
+
+    def get_meta(self, key: str) -> Optional[str]:
+        row = self._connection().execute(
+            "SELECT value FROM meta WHERE key = ?", (key,)
+        ).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value)
+            )
+
+    def _not_stored(
+        self, table: str, column: str, time_field: str, records: List[Dict]
+    ) -> List[Dict]:
+        """Records without a row of the same timestamp and data (re-imports)"""
+        conn = self._connection()
+        missing = []
+        for record in records:
+            row = conn.execute(
+                f"SELECT 1 FROM {table} WHERE {column} = ? AND data = ? LIMIT 1",
+                (entry_timestamp(record, time_field), json.dumps(record)),
+            ).fetchone()
+            if row is None:
+                missing.append(record)
+        return missing
+
+    def import_json_data(self, data_dir="data", force: bool = False) -> Dict:
+        """Import existing logs, sessions and browser logs from the JSON files.
+
+        With force, records that were imported before are skipped, so only
+        what is new in the JSON files is added.
+        """
+        data_dir = Path(data_dir)
+        if self.get_meta("imported_at") and not force:
+            print(
+                f"[Storage] JSON data already imported at {self.get_meta('imported_at')}"
+            )
+            return {}
+
+        counts = {"logs": 0, "sessions": 0, "browser_events": 0}
+
+        # The JSON files are read through the shared file-backed logs, even
+        # when SQLite is the configured backend
+        from .backend import (
+            _get_record_store,
+            _segmented_activity_log,
+            _segmented_browser_log,
+        )
+
+        activity_log = _segmented_activity_log(data_dir)
+
+        def import_logs(batch):
+            if force:
+                batch = self._not_stored("activity_logs", "start_ts", "start", batch)
+            self.append_logs(batch)
+            counts["logs"] += len(batch)
+
+        batch = []
+        for entry in activity_log.iter_all():
+            batch.append(entry)
+            if len(batch) >= 1000:
+                import_logs(batch)
+                batch = []
+        if batch:
+            import_logs(batch)
+
+        try:
+            sessions = _get_record_store(data_dir, "sessions").read_all()
+            if force:
+                sessions = self._not_stored("sessions", "start_ts", "start", sessions)
+            for session in sessions:
+                self.append_session(session)
+            counts["sessions"] = len(sessions)
+        except Exception as e:
+            print(f"[Storage] Error importing sessions: {e}")
+
+        browser_log = _segmented_browser_log(data_dir)
+
+        def import_browser_events(batch):
+            if force:
+                batch = self._not_stored("browser_events", "ts", "timestamp", batch)
+            self.append_browser_events(batch)
+            counts["browser_events"] += len(batch)
+
+        batch = []
+        for event in browser_log.iter_all():
+            batch.append(event)
+            if len(batch) >= 1000:
+                import_browser_events(batch)
+                batch = []
+        if batch:
+            import_browser_events(batch)
+
+        self.set_meta("imported_at", datetime.now().isoformat())
+        print(f"[Storage] Imported into {self.db_path}: {counts}")
+        return counts
+
+
+class SQLiteActivityLog:
+    """Activity log view over SQLiteStore with the same interface as SegmentedLog.
+
+    Rows keep app and title as text so they stay queryable; entries holding
+    interned ids are decoded before they are inserted.
+    """
+
+    def __init__(self, store: SQLiteStore, strings: Optional[InternTable] = None):
+        self.store = store
+        self.strings = strings
+
+    def append(self, entry: Dict) -> None:
+        self.append_many([entry])
+
+    def append_many(self, entries: List[Dict]) -> None:
+        if not entries:
+            return
+        if self.strings is not None:
+            entries = [
+                self.strings.decode_fields(entry, ("app", "title"))
+                for entry in entries
+            ]
+        self.store.append_logs(entries)
+
+    def version(self) -> Tuple:
+        return ("sqlite",) + self.store.table_version("activity_logs")
+
+    def migrate_legacy(self) -> int:
+        # Legacy files are brought in with the one-shot importer instead
+        return 0
+
+    def days(self) -> List[str]:
+        return self.store.log_days()
+
+    def iter_all(self) -> Iterator[Dict]:
+        return self.store.read_logs_range()
+
+    def read_range(
+        self, start_ts: Optional[float] = None, end_ts: Optional[float] = None
+    ) -> Iterator[Dict]:
+        return self.store.read_logs_range(start_ts, end_ts)
+
+    def query(
+        self,
+        start_ts: Optional[float] = None,
+        end_ts: Optional[float] = None,
+        value: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        return self.store.query_logs(start_ts, end_ts, value, limit, cursor)
+
+    def tail(self, n: int = 10) -> List[Dict]:
+        if n <= 0:
+            return []
+        return self.store.tail_logs(n)
+
+
+class SQLiteBrowserLog:
+    """Browser event view over SQLiteStore with the same interface as BrowserEventLog.
+
+    Rows hold the full event; there is nothing to compact or compress, and
+    rotation applies retention to the table directly.
+    """
+
+    def __init__(self, store: SQLiteStore):
+        self.store = store
+
+    def append(self, event: Dict) -> None:
+        self.append_many([event])
+
+    def append_many(self, events: List[Dict]) -> None:
+        if events:
+            self.store.append_browser_events(events)
+
+    def version(self) -> Tuple:
+        return ("sqlite",) + self.store.table_version("browser_events")
+
+    def migrate_legacy(self) -> int:
+        # Legacy files are brought in with the one-shot importer instead
+        return 0
+
+    def days(self) -> List[str]:
+        return self.store.browser_days()
+
+    def iter_all(self) -> Iterator[Dict]:
+        return self.store.read_browser_events()
+
+    def read_range(
+        self, start_ts: Optional[float] = None, end_ts: Optional[float] = None
+    ) -> Iterator[Dict]:
+        return self.store.read_browser_events(start_ts, end_ts)
+
+    def tail(self, n: int = 10) -> List[Dict]:
+        if n <= 0:
+            return []
+        return self.store.tail_browser_events(n)
+
+
+class SQLiteSessionLog:
+    """Session view over SQLiteStore with the same interface as RecordStore"""
+
+    def __init__(self, store: SQLiteStore):
+        self.store = store
+
+    def append(self, record: Dict) -> None:
+        self.store.append_session(record)
+
+    def count(self) -> int:
+        return self.store.count_sessions()
+
+    def version(self) -> Tuple:
+        return ("sqlite",) + self.store.table_version("sessions")
+
+    def latest(self) -> Optional[Dict]:
+        records = self.store.tail_sessions(1)
+        return records[0] if records else None
+
+    def tail(self, n: int) -> List[Dict]:
+        if n <= 0:
+            return []
+        return self.store.tail_sessions(n)
+
+    def read_all(self) -> List[Dict]:
+        return self.store.read_sessions()
+
+    def read_range(
+        self, start_ts: Optional[float] = None, end_ts: Optional[float] = None
+    ) -> Iterator[Dict]:
+        return self.store.read_sessions_range(start_ts, end_ts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SnapAlert SQLite storage tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    import_parser = subparsers.add_parser(
+        "import", help="Import the existing JSON data files into SQLite"
+    )
+    import_parser.add_argument("--data-dir", default="data")
+    import_parser.add_argument(
+        "--db", default=None, help="Database path (default: <data-dir>/snapalert.db)"
+    )
+    import_parser.add_argument(
+        "--force", action="store_true", help="Import even if already imported"
+    )
+
+    args = parser.parse_args()
+
+    if args.command == "import":
+        db_path = args.db or Path(args.data_dir) / "snapalert.db"
+        store = SQLiteStore(db_path)
+        store.import_json_data(args.data_dir, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
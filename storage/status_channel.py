@@ -0,0 +1,204 @@
+import mmap
+import os
+import struct
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+STATUS_CHANNEL_FILE = "status.shm"
+
+MAGIC = b"SNAP"
+VERSION = 1
+MAX_APP_NAME_BYTES = 256
+
+# magic, version, reserved, sequence number
+HEADER = struct.Struct("<4sHHQ")
+SEQ_OFFSET = 8
+SEQ = struct.Struct("<Q")
+
+# last_updated, session_time, session_start_time, keystrokes,
+# open_app_count, enabled_alert_count, browser_tab_count, current_app length
+PAYLOAD = struct.Struct("<dddQIIIH")
+PAYLOAD_OFFSET = HEADER.size
+APP_NAME_OFFSET = PAYLOAD_OFFSET + PAYLOAD.size
+
+CHANNEL_SIZE = APP_NAME_OFFSET + MAX_APP_NAME_BYTES
+
+# Readers give up after this many torn reads and fall back to status.json
+MAX_READ_RETRIES = 100
+
+
+class StatusChannel:
+    """Memory-mapped live status shared between the tracker and its readers.
+
+    The tracker is the only writer. It publishes with a sequence lock: the
+    sequence number is made odd before the payload is written and even
+    again afterwards. A reader copies the payload and keeps it only if it
+    saw the same even sequence number before and after the copy. Readers
+    get a consistent snapshot without any file reads or JSON parsing.
+    """
+
+    def __init__(self, path, writer: bool = False):
+        self.path = Path(path)
+        self.writer = writer
+        self._lock = threading.Lock()
+        self._mm = None
+
+        if writer:
+            self._open_writer()
+
+    def _open_writer(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT)
+        try:
+            if os.fstat(fd).st_size != CHANNEL_SIZE:
+                os.ftruncate(fd, CHANNEL_SIZE)
+            self._mm = mmap.mmap(fd, CHANNEL_SIZE, access=mmap.ACCESS_WRITE)
+        finally:
+            os.close(fd)
+
+        magic, version, _, seq = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION or seq % 2:
+            HEADER.pack_into(self._mm, 0, MAGIC, VERSION, 0, 0)
+
+    def _open_reader(self) -> bool:
+        if self._mm is not None:
+            return True
+        try:
+            with open(self.path, "rb") as f:
+                if os.fstat(f.fileno()).st_size < CHANNEL_SIZE:
+                    return False
+                self._mm = mmap.mmap(f.fileno(), CHANNEL_SIZE, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, OSError, ValueError):
+            return False
+
+        magic, version, _, _ = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            return False
+        return True
+
+    def close(self):
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+
+    @property
+    def sequence(self) -> Optional[int]:
+        """Current sequence number (changes on every publish)"""
+        if not self.writer and not self._open_reader():
+            return None
+        return SEQ.unpack_from(self._mm, SEQ_OFFSET)[0]
+
+    def publish(
+        self,
+        session_time: float,
+        session_start_time: float,
+        keystrokes: int,
+        current_app: Optional[str],
+        open_app_count: int,
+        enabled_alert_count: int = 0,
+        browser_tab_count: int = 0,
+    ) -> None:
+        """Publish a new snapshot of the live counters"""
+        if not self.writer or self._mm is None:
+            return
+
+        app_bytes = (current_app or "").encode("utf-8")[:MAX_APP_NAME_BYTES]
+        # Don't cut a multi-byte character in half
+        app_bytes = app_bytes.decode("utf-8", "ignore").encode("utf-8")
+
+        with self._lock:
+            seq = SEQ.unpack_from(self._mm, SEQ_OFFSET)[0]
+            SEQ.pack_into(self._mm, SEQ_OFFSET, seq + 1)
+
+            PAYLOAD.pack_into(
+                self._mm,
+                PAYLOAD_OFFSET,
+                time.time(),
+                float(session_time),
+                float(session_start_time),
+                int(keystrokes),
+                int(open_app_count),
+                int(enabled_alert_count),
+                int(browser_tab_count),
+                len(app_bytes),
+            )
+            self._mm[APP_NAME_OFFSET : APP_NAME_OFFSET + len(app_bytes)] = app_bytes
+
+            SEQ.pack_into(self._mm, SEQ_OFFSET, seq + 2)
+
+    def read(self) -> Optional[Dict]:
+        """Read a consistent snapshot, or None if the channel is unavailable"""
+        if not self._open_reader():
+            return None
+
+        mm = self._mm
+        for _ in range(MAX_READ_RETRIES):
+            seq_before = SEQ.unpack_from(mm, SEQ_OFFSET)[0]
+            if seq_before % 2:
+                continue  # writer is mid-update
+
+            payload = mm[PAYLOAD_OFFSET:CHANNEL_SIZE]
+
+            seq_after = SEQ.unpack_from(mm, SEQ_OFFSET)[0]
+            if seq_before != seq_after:
+                continue
+            if seq_before == 0:
+                return None  # nothing published yet
+
+            (
+                last_updated,
+                session_time,
+                session_start_time,
+                keystrokes,
+                open_app_count,
+                enabled_alert_count,
+                browser_tab_count,
+                app_len,
+            ) = PAYLOAD.unpack_from(payload, 0)
+            app_start = PAYLOAD.size
+            current_app = payload[app_start : app_start + app_len].decode(
+                "utf-8", "replace"
+            )
+
+            return {
+                "sequence": seq_before,
+                "last_updated": last_updated,
+                "session_time": session_time,
+                "session_start_time": session_start_time,
+                "keystrokes": keystrokes,
+                "current_app": current_app or None,
+                "open_app_count": open_app_count,
+                "enabled_alert_count": enabled_alert_count,
+                "browser_tab_count": browser_tab_count,
+            }
+
+        return None
+
+
+_channels = {}
+_channels_lock = threading.Lock()
+
+
+def get_status_channel(data_dir="data", writer: bool = False) -> StatusChannel:
+    """Get the shared live status channel for a data directory"""
+    path = Path(data_dir) / STATUS_CHANNEL_FILE
+    key = (str(path), writer)
+    with _channels_lock:
+        if key not in _channels:
+            _channels[key] = StatusChannel(path, writer=writer)
+        return _channels[key]
+
+
+def read_live_status(data_dir="data", max_age: float = 30) -> Optional[Dict]:
+    """Read the live status snapshot if the tracker published one recently"""
+    try:
+        snapshot = get_status_channel(data_dir).read()
+    except Exception as e:
+        print(f"[Storage] Error reading live status: {e}")
+        return None
+    if snapshot is None or time.time() - snapshot["last_updated"] > max_age:
+        return None
+    return snapshot
@@ -0,0 +1,61 @@
+import json
+import os
+from typing import Dict, Iterator, List
+
+DEFAULT_BLOCK_SIZE = 8192
+
+
+def iter_lines_reversed(path, block_size: int = DEFAULT_BLOCK_SIZE) -> Iterator[bytes]:
+    """Yield the lines of a file newest first, reading backwards in blocks.
+
+    Only the blocks needed to produce the requested lines are read, so the
+    cost depends on how many lines the caller consumes, not on the file size.
+    Lines are yielded without their trailing newline; empty lines are skipped.
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+
+    with f:
+        f.seek(0, os.SEEK_END)
+        position = f.tell()
+        remainder = b""
+
+        while position > 0:
+            read_size = min(block_size, position)
+            position -= read_size
+            f.seek(position)
+            block = f.read(read_size) + remainder
+
+            lines = block.split(b"\n")
+            # The first piece may be the tail of a line that starts in an
+            # earlier block, so carry it over to the next read.
+            remainder = lines.pop(0)
+            for line in reversed(lines):
+                if line.strip():
+                    yield line
+
+        if remainder.strip():
+            yield remainder
+
+
+def tail_records(path, n: int, block_size: int = DEFAULT_BLOCK_SIZE) -> List[Dict]:
+    """Decode the last n JSON-lines records of a file, oldest first.
+
+    A partially written trailing line (or any other undecodable line) is
+    skipped rather than returned, so readers never see a torn record.
+    """
+    if n <= 0:
+        return []
+
+    records = []
+    for line in iter_lines_reversed(path, block_size):
+        try:
+            records.append(json.loads(line))
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            continue
+        if len(records) >= n:
+            break
+    records.reverse()
+    return records
@@ -0,0 +1,17 @@
+import os
+from typing import Tuple
+
+
+def file_version(path) -> Tuple[int, int]:
+    """Return (mtime_ns, size) for a file, or (0, 0) if it doesn't exist.
+
+    Appends and rewrites both change this pair, so it is a cheap stand-in
+    for the file's contents that only costs a stat() call.
+    """
+    if path is None:
+        return (0, 0)
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return (0, 0)
+    return (st.st_mtime_ns, st.st_size)
@@ -0,0 +1,124 @@
+import copy
+import json
+import threading
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+from .versions import file_version
+
+# Written by the app after it changes a config file, read by the tracker
+CHANGE_SIGNAL_FILE = "config_changes.signal"
+
+# The signal file is emptied once it grows past this
+MAX_SIGNAL_BYTES = 4096
+
+
+def signal_config_change(data_dir="data", name: str = "") -> None:
+    """Tell the tracker a config file in data_dir was changed.
+
+    The tracker notices changes on its own from the file's mtime and size;
+    the signal also covers a rewrite that keeps both (coarse timestamps).
+    Every signal changes the signal file's size, so one stat() sees it.
+    """
+    path = Path(data_dir) / CHANGE_SIGNAL_FILE
+    try:
+        mode = "w" if file_version(path)[1] > MAX_SIGNAL_BYTES else "a"
+        with open(path, mode, encoding="utf-8") as f:
+            f.write(f"{name}\n")
+    except OSError as e:
+        print(f"[Storage] Error signalling config change: {e}")
+
+
+class WatchedJSONFile:
+    """In-memory copy of a JSON file that is only re-read when it changes.
+
+    ``value`` is the authoritative copy for its owner (the tracker), which
+    may change it in place. ``refresh()`` costs a stat() or two: the file
+    is parsed again only if its (mtime_ns, size) or the change signal moved.
+    While the owner has changes of its own that haven't been written
+    (``mark_dirty()`` ... ``written()``), refresh keeps the in-memory copy.
+    """
+
+    def __init__(
+        self,
+        path,
+        default: Callable[[], Any],
+        signal_path=None,
+    ):
+        self.path = Path(path)
+        self.signal_path = Path(signal_path) if signal_path else None
+        self._default = default
+        self._lock = threading.Lock()
+        self._version = None
+        self._signal_version = file_version(self.signal_path)
+        self._generation = 0  # bumped by every local change
+        self._written_generation = 0
+        self.reloads = 0
+        self.value = None
+        self.refresh(force=True)
+
+    @property
+    def exists(self) -> bool:
+        return self._version not in (None, (0, 0))
+
+    @property
+    def dirty(self) -> bool:
+        """Local changes are waiting to be written"""
+        return self._written_generation < self._generation
+
+    def _load(self) -> Any:
+        version = file_version(self.path)
+        if version == (0, 0):
+            return version, self._default()
+        with open(self.path, "r", encoding="utf-8") as f:
+            return version, json.load(f)
+
+    def refresh(self, force: bool = False) -> bool:
+        """Re-read the file if it (or the change signal) changed; True if reloaded"""
+        with self._lock:
+            signal_version = file_version(self.signal_path)
+            signalled = signal_version != self._signal_version
+            if not force and not signalled:
+                if file_version(self.path) == self._version:
+                    return False
+            if not force and self.dirty:
+                # Ours is newer; the file is read again once it's written
+                return False
+            try:
+                self._version, value = self._load()
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"[Storage] Error reading {self.path}: {e}")
+                if self.value is None:
+                    self.value = self._default()
+                return False
+            self._signal_version = signal_version
+            self.value = value
+            self.reloads += 1
+            return True
+
+    def get(self) -> Any:
+        """The current value, re-read first if the file changed"""
+        self.refresh()
+        return self.value
+
+    def snapshot(self) -> Any:
+        """Deep copy of the current value, safe to hand to another thread"""
+        with self._lock:
+            return copy.deepcopy(self.value)
+
+    def mark_dirty(self) -> int:
+        """Record a local change; returns its generation for written()"""
+        with self._lock:
+            self._generation += 1
+            return self._generation
+
+    def written(self, generation: int) -> None:
+        """Record that the changes up to generation are on disk"""
+        with self._lock:
+            self._written_generation = max(self._written_generation, generation)
+
+    def write(self, value: Any, indent: Optional[int] = 2) -> None:
+        """Write value to the file (as a JSON document)"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(value, f, indent=indent)
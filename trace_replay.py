@@ -0,0 +1,429 @@
+"""
+Record and replay the tracker's input stream.
+
+The tracker records its inputs with ``python tracker.py --record-trace
+PATH``. This module replays such a trace through the real tracker loop on
+a simulated clock, on any platform, and reports where the CPU time went
+and how the outputs (activity log, sessions, notifications) differ from a
+previous run:
+
+    python trace_replay.py trace.jsonl --speed 1000 --output run.json
+    python trace_replay.py trace.jsonl --speed 0 --expected run.json
+
+Browser tracking reads the browsers' own history files, which aren't in
+the trace, so it is switched off during a replay.
+"""
+
+import argparse
+import contextlib
+import difflib
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# Mouse moves closer together than this are recorded once
+MOUSE_TRACE_INTERVAL = 0.5
+
+# Buffered trace records are written out at least this often (seconds)
+TRACE_FLUSH_INTERVAL = 1.0
+
+# Trace records that are inputs to the loop (the rest is bookkeeping)
+INPUT_EVENTS = ("fg", "windows", "key", "mouse")
+
+
+class TraceRecorder:
+    """Appends the tracker's inputs to a JSONL trace as they arrive.
+
+    Each record is {"t": timestamp, "e": kind, ...}: "start", "fg" (the
+    foreground app changed: app, title), "windows" (the open windows: app
+    -> [[hwnd, pid, title], ...]), "key" and "mouse" (input activity;
+    mouse moves at most one per MOUSE_TRACE_INTERVAL). Called from the
+    tracker loop and the input listener threads.
+    """
+
+    def __init__(self, path, clock=time.time):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._buffer: List[str] = []
+        self._last_flush = clock()
+        self._last_mouse = 0.0
+        self.records = 0
+        self._write({"t": clock(), "e": "start"})
+
+    def _write(self, record: Dict) -> None:
+        line = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            if self._file is None:
+                return
+            self._buffer.append(line)
+            self.records += 1
+            if record["t"] - self._last_flush >= TRACE_FLUSH_INTERVAL:
+                self._flush_locked(record["t"])
+
+    def _flush_locked(self, now: float) -> None:
+        if self._buffer:
+            self._file.write("\n".join(self._buffer) + "\n")
+            self._file.flush()
+            self._buffer.clear()
+        self._last_flush = now
+
+    def foreground(self, ts: float, app: Optional[str], title: Optional[str]) -> None:
+        self._write({"t": ts, "e": "fg", "app": app, "title": title})
+
+    def windows(self, ts: float, windows: Dict, strings) -> None:
+        """Record get_open_windows() output (app and title ids as strings)"""
+        self._write(
+            {
+                "t": ts,
+                "e": "windows",
+                "windows": {
+                    strings.lookup(app_id): [
+                        [
+                            instance.get("hwnd"),
+                            instance.get("pid"),
+                            strings.decode(instance.get("title")),
+                        ]
+                        for instance in info["instances"]
+                    ]
+                    for app_id, info in windows.items()
+                },
+            }
+        )
+
+    def key(self, ts: float) -> None:
+        self._write({"t": ts, "e": "key"})
+
+    def mouse(self, ts: float) -> None:
+        if ts - self._last_mouse < MOUSE_TRACE_INTERVAL:
+            return
+        self._last_mouse = ts
+        self._write({"t": ts, "e": "mouse"})
+
+    def close(self) -> None:
+        with self._lock:
+            if self._file is None:
+                return
+            self._flush_locked(self._last_flush)
+            self._file.close()
+            self._file = None
+
+
+def read_trace(path) -> Iterator[Dict]:
+    """Trace records, in the order they were written"""
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line:
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # A record torn by the tracker stopping mid-write
+                    continue
+
+
+class SimulatedClock:
+    """A clock that only moves when the replay moves it"""
+
+    def __init__(self, start: float):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance_to(self, ts: float) -> None:
+        if ts > self.now:
+            self.now = ts
+
+
+class ReplayedWindows:
+    """Stands in for get_open_windows(): the last window list in the trace"""
+
+    def __init__(self, strings):
+        self._strings = strings
+        self._windows: Dict = {}
+        self._ts = 0.0
+
+    def update(self, ts: float, windows: Dict) -> None:
+        self._ts = ts
+        self._windows = windows
+
+    def __call__(self) -> Dict:
+        intern = self._strings.intern
+        result = {}
+        for app, instances in self._windows.items():
+            result[intern(app)] = {
+                "instances": [
+                    {"hwnd": hwnd, "title": title, "pid": pid}
+                    for hwnd, pid, title in instances
+                ],
+                "count": len(instances),
+                "start_time": self._ts,
+            }
+        return result
+
+
+def replay(
+    trace_path,
+    work_dir=None,
+    speed: float = 1000.0,
+    seed: int = 0,
+    log_path=None,
+) -> Dict:
+    """Drive the tracker loop through a trace; returns {"outputs", "report"}.
+
+    The tracker runs in work_dir (a new temporary directory by default)
+    with its own empty data/ directory. speed is simulated seconds per
+    wall-clock second (0 runs as fast as possible). The tracker's console
+    output goes to log_path (work_dir/replay.log by default). The tracker
+    module is set up once per process, so replay once per process.
+    """
+    trace_path = Path(trace_path).resolve()
+    records = list(read_trace(trace_path))
+    if not records:
+        raise ValueError(f"{trace_path} has no records")
+    work_dir = Path(work_dir or tempfile.mkdtemp(prefix="snapalert-replay-"))
+    work_dir.mkdir(parents=True, exist_ok=True)
+    log_path = Path(log_path or work_dir / "replay.log").resolve()
+    inputs = [record for record in records if record["e"] in INPUT_EVENTS]
+    start, end = records[0]["t"], records[-1]["t"]
+
+    clock = SimulatedClock(start)
+    notifications = []
+    llm_requests = []
+
+    # The tracker keeps its files under ./data
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    os.chdir(work_dir)
+    with open(log_path, "w", encoding="utf-8") as log, contextlib.redirect_stdout(
+        log
+    ):
+        import tracker
+        from window_source import ScriptedWindowSource
+
+        def notify(title, message, duration=8):
+            notifications.append({"t": clock(), "title": title, "message": message})
+            return True
+
+        def suggest_timers():
+            llm_requests.append(clock())
+            return None
+
+        tracker.set_clock(clock)
+        tracker.load_current_session_state()
+        tracker.start_time = tracker.last_mouse_move_time = clock()
+        tracker.show_notification = notify
+        tracker.suggest_timers = suggest_timers
+        tracker.update_browser_tracking = lambda: None
+        windows = ReplayedWindows(tracker.strings)
+        tracker.get_open_windows = windows
+        tracker.window_source = ScriptedWindowSource(
+            (record["t"], record.get("app"), record.get("title"))
+            for record in inputs
+            if record["e"] == "fg"
+        )
+        duties = tracker.duties = tracker.build_duty_scheduler(random.Random(seed))
+
+        input_cpu = 0.0
+        wall_start = time.perf_counter()
+        process_start = time.process_time()
+        thread_start = time.thread_time()
+        position = 0
+        while True:
+            next_time = duties.next_deadline()
+            if position < len(inputs):
+                next_time = min(next_time, inputs[position]["t"])
+            if next_time > end:
+                break
+            if speed:
+                ahead = (next_time - start) / speed - (time.perf_counter() - wall_start)
+                if ahead > 0:
+                    time.sleep(ahead)
+            clock.advance_to(next_time)
+
+            started = time.thread_time()
+            while position < len(inputs) and inputs[position]["t"] <= clock.now:
+                record = inputs[position]
+                position += 1
+                kind = record["e"]
+                if kind == "key":
+                    tracker.on_key_press(None)
+                elif kind == "mouse":
+                    tracker.on_mouse_move(0, 0)
+                elif kind == "windows":
+                    windows.update(record["t"], record["windows"])
+                else:
+                    # What the hook source's wake() does
+                    duties.trigger("active_window")
+            input_cpu += time.thread_time() - started
+
+            duties.run_pending()
+
+        # The run in progress at the end of the trace is logged too
+        started = time.thread_time()
+        if tracker.current_app:
+            tracker.log_activity(
+                tracker.current_app,
+                tracker.current_app_id,
+                tracker.current_title_id,
+                tracker.start_time,
+                end,
+            )
+        tracker.save_log(force=True)
+        tracker.background_writer.drain(timeout=60)
+        flush_cpu = time.thread_time() - started
+
+        main_cpu = time.thread_time() - thread_start
+        process_cpu = time.process_time() - process_start
+        wall = time.perf_counter() - wall_start
+
+        outputs = {
+            "activity_log": list(tracker.activity_log.iter_all()),
+            "sessions": list(tracker.sessions),
+            "notifications": notifications,
+            "llm_requests": llm_requests,
+            "final": {
+                "keystrokes": tracker.keystroke_count,
+                "app_switches": tracker.app_switch_count,
+                "current_app": tracker.current_app,
+                "open_apps": sorted(
+                    tracker.strings.lookup(app_id) for app_id in tracker.open_apps
+                ),
+            },
+        }
+
+    phases = {
+        name: {
+            "runs": stats["runs"],
+            "errors": stats["errors"],
+            "cpu_ms": stats["total_cpu_ms"],
+            "avg_cpu_ms": stats["avg_cpu_ms"],
+            "max_ms": stats["max_ms"],
+        }
+        for name, stats in duties.stats().items()
+    }
+    phases["input"] = {"events": len(inputs), "cpu_ms": round(input_cpu * 1000, 3)}
+    phases["final_flush"] = {"cpu_ms": round(flush_cpu * 1000, 3)}
+    # Mostly the background writer's thread
+    phases["other_threads"] = {
+        "cpu_ms": round(max(0.0, process_cpu - main_cpu) * 1000, 3)
+    }
+    simulated = end - start
+    report = {
+        "trace": str(trace_path),
+        "records": len(records),
+        "simulated_sec": round(simulated, 3),
+        "wall_sec": round(wall, 3),
+        "speedup": round(simulated / wall, 1) if wall else None,
+        "cpu_sec": round(process_cpu, 3),
+        "phases": phases,
+        "writer": tracker.background_writer.stats(),
+        "work_dir": str(work_dir),
+        "log": str(log_path),
+    }
+    return {"outputs": outputs, "report": report}
+
+
+def diff_outputs(expected: Dict, actual: Dict, context: int = 2) -> List[str]:
+    """Unified diff of each output that changed (empty if they all match)"""
+    lines = []
+    for name in sorted(set(expected) | set(actual)):
+        before = json.dumps(
+            expected.get(name), indent=1, sort_keys=True, ensure_ascii=False
+        )
+        after = json.dumps(
+            actual.get(name), indent=1, sort_keys=True, ensure_ascii=False
+        )
+        if before != after:
+            lines.extend(
+                difflib.unified_diff(
+                    before.splitlines(),
+                    after.splitlines(),
+                    fromfile=f"expected/{name}",
+                    tofile=f"replay/{name}",
+                    n=context,
+                    lineterm="",
+                )
+            )
+    return lines
+
+
+def print_report(report: Dict) -> None:
+    print(
+        f"Replayed {report['records']} records: {report['simulated_sec']:.0f}s "
+        f"simulated in {report['wall_sec']:.2f}s ({report['speedup']}x), "
+        f"CPU {report['cpu_sec']:.3f}s"
+    )
+    print(f"{'phase':<20} {'runs':>8} {'cpu ms':>10} {'avg ms':>8} {'errors':>6}")
+    phases = sorted(
+        report["phases"].items(), key=lambda item: item[1]["cpu_ms"], reverse=True
+    )
+    for name, phase in phases:
+        runs = phase.get("runs", phase.get("events", ""))
+        print(
+            f"{name:<20} {runs:>8} {phase['cpu_ms']:>10.1f} "
+            f"{phase.get('avg_cpu_ms', ''):>8} {phase.get('errors', ''):>6}"
+        )
+    print(f"Tracker output: {report['log']}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Replay a recorded tracker trace on a simulated clock"
+    )
+    parser.add_argument("trace", help="trace file from tracker.py --record-trace")
+    parser.add_argument(
+        "--speed",
+        type=float,
+        default=1000.0,
+        help="simulated seconds per second (0 = as fast as possible)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="seed for duty jitter")
+    parser.add_argument("--work-dir", help="where the replayed data/ goes")
+    parser.add_argument("--output", help="write the replay's outputs here (JSON)")
+    parser.add_argument("--expected", help="outputs of an earlier run to diff against")
+    parser.add_argument("--report", help="write the CPU time report here (JSON)")
+    parser.add_argument(
+        "--max-diff-lines", type=int, default=200, help="diff lines to print"
+    )
+    args = parser.parse_args(argv)
+
+    for name in ("output", "expected", "report"):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+
+    result = replay(args.trace, args.work_dir, args.speed, args.seed)
+    print_report(result["report"])
+
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as f:
+            json.dump(result["report"], f, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(result["outputs"], f, indent=1)
+
+    if not args.expected:
+        return 0
+    with open(args.expected, "r", encoding="utf-8") as f:
+        expected = json.load(f)
+    diff = diff_outputs(expected, result["outputs"])
+    if not diff:
+        print("Outputs match the expected run")
+        return 0
+    print(f"Outputs differ from the expected run ({len(diff)} diff lines):")
+    for line in diff[: args.max_diff_lines]:
+        print(line)
+    if len(diff) > args.max_diff_lines:
+        print(f"... {len(diff) - args.max_diff_lines} more lines")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
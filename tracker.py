@@ -1,24 +1,59 @@
 # tracker.py - Optimized version
-import win32gui
-import win32process
+import argparse
 import psutil
 import time
 import json
 import threading
+import atexit
+import copy
 from datetime import datetime
-from pynput import keyboard, mouse
-import tkinter as tk
 import os
 import subprocess
-import winreg
 from pathlib import Path
-from win10toast import ToastNotifier
-from browser_tracker import update_browser_tracking, get_browser_status
-from insights import give_timer_suggestions
 
-LOG_FILE = "data/logs.json"
+# The Windows-only and GUI modules are optional so the tracker loop can be
+# replayed from a trace on any platform (see trace_replay.py)
+try:
+    import win32gui
+    import win32process
+except ImportError:  # pywin32 is Windows-only
+    win32gui = win32process = None
+try:
+    import winreg
+except ImportError:
+    winreg = None
+try:
+    from pynput import keyboard, mouse
+except ImportError:
+    keyboard = mouse = None
+try:
+    import tkinter as tk
+except ImportError:
+    tk = None
+try:
+    from win10toast import ToastNotifier
+except ImportError:
+    ToastNotifier = None
+
+from browser_tracker import update_browser_tracking, get_browser_status, browser_tracker
+from duty_scheduler import DutyScheduler
+from trace_replay import TraceRecorder
+from window_source import PollingWindowSource, create_window_source
+from alerts import RuleEngine
+from storage import (
+    get_activity_log,
+    get_alert_events_store,
+    get_background_writer,
+    get_intern_table,
+    get_log_writer,
+    get_session_insights_store,
+    get_session_store,
+    get_status_channel,
+    get_usage_rollups,
+)
+from storage.watched_file import CHANGE_SIGNAL_FILE, WatchedJSONFile
+
 STATUS_FILE = "data/status.json"
-SESSIONS_FILE = "data/sessions.json"
 ALERT_CONFIG_FILE = "data/alert_config.json"
 CUSTOM_ALERTS_FILE = "data/custom_alerts.json"
 
@@ -35,11 +70,31 @@ ALERT_LEVELS = [
 # Break reminder configuration
 BREAK_REMINDER_INTERVAL = 180  # 3 minutes in seconds
 
-# Performance optimization settings
+DEFAULT_ALERT_CONFIG = {
+    "enabled": True,
+    "whitelist": [],
+    "snooze_until": {},
+    "alert_levels_enabled": [True, True, True],
+    "show_resource_usage": True,
+    "smart_filtering": True,
+    "break_reminders_enabled": True,
+    "break_reminder_interval": 180,
+}
+
+# Performance optimization settings (periods of the tracker's duties)
 MAIN_LOOP_INTERVAL = 5  # Increased from 3 to 5 seconds for better performance
 WINDOW_ENUM_INTERVAL = 10  # Increased to 10 seconds
 RESOURCE_CHECK_INTERVAL = 60  # Increased to 60 seconds (1 minute)
 BROWSER_UPDATE_INTERVAL = 15  # Increased to 15 seconds
+ACTIVE_WINDOW_INTERVAL = MAIN_LOOP_INTERVAL
+IDLE_CHECK_INTERVAL = 15
+BREAK_CHECK_INTERVAL = 10
+PERFORMANCE_REPORT_INTERVAL = 100
+# Background duties are spread by up to this much so they don't line up
+DUTY_JITTER = 1.0
+# Foreground window changes: "hook" (pushed by Windows, exact switch times),
+# "poll" (checked every ACTIVE_WINDOW_INTERVAL) or "auto" (hook, else poll)
+WINDOW_SOURCE = "auto"
 
 # Apps to exclude from alerts (system apps, etc.)
 EXCLUDED_APPS = {
@@ -65,24 +120,32 @@ EXCLUDED_APPS = {
 }
 
 # Global variables
-log_buffer = []
 keystroke_count = 0
 session_start_time = time.time()
 current_app = None
-current_title = None
+current_app_id = None
+current_title_id = None
 start_time = time.time()
-open_apps = {}
+open_apps = {}  # keyed by interned app name id
 sessions = []
 notifier = None
 last_mouse_move_time = time.time()
 last_break_reminder_time = time.time()
 alert_config = {}
 last_activity_time = time.time()
+enabled_alert_count = 0
+alert_rules = None  # RuleEngine compiled from custom_alerts_file.value
+app_switch_count = 0
+session_ended_recently = False
+duties = None  # DutyScheduler running update_tracker's duties
+window_source = None  # WindowSource reporting foreground changes
+trace_recorder = None  # TraceRecorder capturing the inputs, when recording
+
+# Where the tracker reads the time (see set_clock)
+clock = time.time
 
 # Performance tracking
-last_window_enum_time = 0
 last_resource_check_time = 0
-last_browser_update_time = 0
 resource_usage_cache = {}
 keyboard_listener = None
 mouse_listener = None
@@ -90,8 +153,48 @@ mouse_listener = None
 # Ensure data directory exists
 os.makedirs("data", exist_ok=True)
 
+# App names and window titles are held as ids from the shared intern table
+# and only turned back into strings where they leave the tracker
+strings = get_intern_table("data")
+
+# Segmented, time-indexed activity log (replaces the flat data/logs.json)
+activity_log = get_activity_log("data")
+
+# Buffers finished app runs and writes them in batches through an open handle
+log_writer = get_log_writer("data")
+atexit.register(log_writer.close)
+session_store = get_session_store("data")
+alert_events = get_alert_events_store("data")
+
+# Per-app/hour, per-app/day and per-day totals, updated on every app switch
+rollups = get_usage_rollups("data")
+
+# All tracker writes run on one background thread, so a slow disk never
+# stretches the sampling loop. Closed before log_writer (atexit is LIFO)
+# so the entries it still holds reach the log writer first.
+background_writer = get_background_writer()
+atexit.register(background_writer.close)
+
+# Alert settings are kept in memory and only re-read when the app changes
+# the files (their mtime/size, or the app's change signal)
+alert_config_file = WatchedJSONFile(
+    ALERT_CONFIG_FILE,
+    default=lambda: copy.deepcopy(DEFAULT_ALERT_CONFIG),
+    signal_path=os.path.join("data", CHANGE_SIGNAL_FILE),
+)
+custom_alerts_file = WatchedJSONFile(
+    CUSTOM_ALERTS_FILE,
+    default=list,
+    signal_path=os.path.join("data", CHANGE_SIGNAL_FILE),
+)
+
+# Memory-mapped live status for the dashboard and widgets (status.json stays as fallback)
+status_channel = get_status_channel("data", writer=True)
+
 # Initialize notifier with error handling
 try:
+    if ToastNotifier is None:
+        raise ImportError("win10toast is not installed")
     notifier = ToastNotifier()
     print("[Tracker] Toast notifications initialized successfully")
 except Exception as e:
@@ -99,6 +202,24 @@ except Exception as e:
     notifier = None
 
 
+def set_clock(fn):
+    """Read the time from fn instead of time.time (replay uses a simulated clock)"""
+    global clock
+    clock = fn
+    browser_tracker.clock = fn
+    # Batch delays, fsync intervals and queue waits follow the same clock
+    log_writer.set_clock(fn)
+    background_writer.clock = fn
+
+
+def start_trace_recording(path):
+    """Record the tracker's inputs to path for trace_replay.py"""
+    global trace_recorder
+    trace_recorder = TraceRecorder(path, clock)
+    atexit.register(trace_recorder.close)
+    print(f"[Tracker] Recording input trace to {path}")
+
+
 def ensure_app_id_registered():
     """Automatically register SnapAlert app ID with Windows on startup"""
     try:
@@ -139,68 +260,66 @@ def ensure_app_id_registered():
 
 
 def load_alert_config():
-    """Load alert configuration from file"""
+    """Load alert configuration from file (it is then kept in memory)"""
     global alert_config
-    try:
-        if os.path.exists(ALERT_CONFIG_FILE):
-            with open(ALERT_CONFIG_FILE, "r") as f:
-                alert_config = json.load(f)
-        else:
-            alert_config = {
-                "enabled": True,
-                "whitelist": [],
-                "snooze_until": {},
-                "alert_levels_enabled": [True, True, True],
-                "show_resource_usage": True,
-                "smart_filtering": True,
-                "break_reminders_enabled": True,
-                "break_reminder_interval": 180,
-            }
-            save_alert_config()
-    except Exception as e:
-        print(f"Error loading alert config: {e}")
-        alert_config = {
-            "enabled": True,
-            "whitelist": [],
-            "snooze_until": {},
-            "alert_levels_enabled": [True, True, True],
-            "show_resource_usage": True,
-            "smart_filtering": True,
-            "break_reminders_enabled": True,
-            "break_reminder_interval": 180,
-        }
+    alert_config_file.refresh(force=True)
+    alert_config = alert_config_file.value
+    if not alert_config_file.exists:
+        save_alert_config()
 
 
-def save_alert_config():
-    """Save alert configuration to file"""
+def refresh_alert_settings():
+    """Pick up alert config and custom alert changes made by the app"""
+    global alert_config
+    if alert_config_file.refresh():
+        alert_config = alert_config_file.value
+        print("[Tracker] Alert config changed, reloaded")
+    if custom_alerts_file.refresh():
+        print("[Tracker] Custom alerts changed, reloaded")
+
+
+def _write_alert_config(config, generation):
     try:
-        with open(ALERT_CONFIG_FILE, "w") as f:
-            json.dump(alert_config, f, indent=2)
+        alert_config_file.write(config)
     except Exception as e:
         print(f"Error saving alert config: {e}")
+    finally:
+        alert_config_file.written(generation)
+
+
+def save_alert_config():
+    """Queue a write of the alert configuration (changes are coalesced)"""
+    generation = alert_config_file.mark_dirty()
+    background_writer.submit(
+        "alert_config",
+        _write_alert_config,
+        copy.deepcopy(alert_config),
+        generation,
+    )
 
 
 def load_custom_alerts():
-    """Load custom alerts from file"""
-    try:
-        if os.path.exists(CUSTOM_ALERTS_FILE):
-            with open(CUSTOM_ALERTS_FILE, "r") as f:
-                return json.load(f)
-        return []
-    except Exception as e:
-        print(f"Error loading custom alerts: {e}")
-        return []
+    """Custom alerts (in memory, re-read only when the file changes)"""
+    return custom_alerts_file.get()
 
 
-def save_custom_alerts(alerts):
-    """Save custom alerts to file"""
+def _write_custom_alerts(alerts, generation):
     try:
-        with open(CUSTOM_ALERTS_FILE, "w") as f:
-            json.dump(alerts, f, indent=2)
-        return True
+        custom_alerts_file.write(alerts)
     except Exception as e:
         print(f"Error saving custom alerts: {e}")
-        return False
+    finally:
+        custom_alerts_file.written(generation)
+
+
+def save_custom_alerts(alerts):
+    """Queue a write of the custom alerts (changes are coalesced)"""
+    custom_alerts_file.value = alerts
+    generation = custom_alerts_file.mark_dirty()
+    background_writer.submit(
+        "custom_alerts", _write_custom_alerts, copy.deepcopy(alerts), generation
+    )
+    return True
 
 
 def get_process_resource_usage_cached(app_name):
@@ -304,8 +423,29 @@ def show_notification_fallback(title, message, duration=8):
         return False
 
 
+def _append_alert_event(event):
+    try:
+        alert_events.append(event)
+    except Exception as e:
+        print(f"[Tracker] Error recording alert event: {e}")
+
+
+def record_alert_event(title, message):
+    """Record a fired alert so the dashboard's live stream can pick it up"""
+    background_writer.submit(
+        None,
+        _append_alert_event,
+        {
+            "timestamp": datetime.fromtimestamp(clock()).isoformat(),
+            "title": title,
+            "message": message,
+        },
+    )
+
+
 def show_notification(title, message, duration=8):
     """Improved Windows notification function with multiple fallback methods"""
+    record_alert_event(title, message)
     try:
         print(f"[Tracker] Attempting to show: {title}")
 
@@ -371,98 +511,65 @@ def show_notification(title, message, duration=8):
 
 def snooze_app_alerts(app_name, minutes=30):
     """Snooze alerts for an app for specified minutes"""
-    snooze_until = time.time() + (minutes * 60)
+    snooze_until = clock() + (minutes * 60)
     alert_config["snooze_until"][app_name] = snooze_until
     save_alert_config()
     print(f"[Alert] Snoozed alerts for {app_name} for {minutes} minutes")
 
 
+def alert_metrics(current_time):
+    """Values the custom alert types compare against, computed once per tick"""
+    app_info = open_apps.get(current_app_id) if current_app else None
+    metrics = {
+        "app": current_app,
+        "keystroke_count": keystroke_count,
+        "session_time": int((current_time - session_start_time) / 60),  # minutes
+        "app_time": None,
+        "idle_time": None,
+        # For alert expressions
+        "switch_count": app_switch_count,
+        "app_info": lambda name: open_apps.get(strings.find(name)),
+    }
+    if app_info is not None:
+        app_start_time = app_info.get("start_time", current_time)
+        last_used = app_info.get("last_used_time", current_time)
+        metrics["app_time"] = int((current_time - app_start_time) / 60)  # minutes
+        metrics["idle_time"] = int((current_time - last_used) / 60)  # minutes
+    return metrics
+
+
 def check_custom_alerts(current_time):
     """Check custom alerts and trigger them when conditions are met"""
-    global session_start_time, keystroke_count, current_app, open_apps
+    global alert_rules, enabled_alert_count
 
     try:
-        # Load custom alerts
-        custom_alerts = load_custom_alerts()
-        alerts_modified = False
+        # In memory; refresh_alert_settings() re-reads it when the app changes it
+        custom_alerts = custom_alerts_file.value
+        if alert_rules is None or alert_rules.source is not custom_alerts:
+            # Expression windows and holds carry over from the previous rules
+            alert_rules = RuleEngine(custom_alerts, previous=alert_rules)
+            enabled_alert_count = alert_rules.enabled_count
+            for name, error in alert_rules.errors:
+                print(f"[Custom Alert] Skipping '{name}': {error}")
 
-        for alert in custom_alerts:
-            # Skip disabled alerts
-            if not alert.get("enabled", True):
-                continue
+        alerts_modified = False
+        for rule, current_value in alert_rules.evaluate(
+            alert_metrics(current_time), current_time
+        ):
+            message = rule.format_message(current_value, current_app)
 
-            alert_type = alert.get("type", "")
-            condition = alert.get("condition", "greater_than")
-            threshold = alert.get("threshold", 0)
-            app_filter = alert.get("app_filter", "")
-
-            # Check if alert should be triggered
-            should_trigger = False
-            current_value = 0
-
-            if alert_type == "keystroke_count":
-                current_value = keystroke_count
-                should_trigger = evaluate_condition(current_value, condition, threshold)
-
-            elif alert_type == "session_time":
-                current_value = int((current_time - session_start_time) / 60)  # minutes
-                should_trigger = evaluate_condition(current_value, condition, threshold)
-
-            elif alert_type == "app_time":
-                if (
-                    app_filter
-                    and app_filter == current_app
-                    and current_app in open_apps
-                ):
-                    app_start_time = open_apps[current_app].get(
-                        "start_time", current_time
-                    )
-                    current_value = int((current_time - app_start_time) / 60)  # minutes
-                    should_trigger = evaluate_condition(
-                        current_value, condition, threshold
-                    )
+            # Show notification
+            success = show_notification(rule.name, message, duration=8)
 
-            elif alert_type == "idle_time":
-                if current_app and current_app in open_apps:
-                    last_used = open_apps[current_app].get(
-                        "last_used_time", current_time
-                    )
-                    current_value = int((current_time - last_used) / 60)  # minutes
-                    should_trigger = evaluate_condition(
-                        current_value, condition, threshold
-                    )
+            if success:
+                # Update alert statistics
+                rule.alert["last_triggered"] = current_time
+                rule.alert["trigger_count"] = rule.alert.get("trigger_count", 0) + 1
+                alerts_modified = True
 
-            # Trigger alert if conditions are met
-            if should_trigger:
-                # Check if alert was recently triggered (prevent spam)
-                last_triggered = alert.get("last_triggered")
-                if last_triggered:
-                    time_since_last = current_time - last_triggered
-                    # Don't trigger same alert within 5 minutes
-                    if time_since_last < 300:
-                        continue
-
-                # Format message with placeholders
-                message = alert.get("message", "Custom alert triggered")
-                message = message.replace("{threshold}", str(threshold))
-                message = message.replace(
-                    "{app}", app_filter or current_app or "application"
+                print(
+                    f"[Custom Alert] Triggered '{rule.name}' - {rule.type}: {current_value} {rule.condition} {rule.alert.get('threshold', 0)}"
                 )
-                message = message.replace("{value}", str(current_value))
-
-                # Show notification
-                alert_name = alert.get("name", "Custom Alert")
-                success = show_notification(alert_name, message, duration=8)
-
-                if success:
-                    # Update alert statistics
-                    alert["last_triggered"] = current_time
-                    alert["trigger_count"] = alert.get("trigger_count", 0) + 1
-                    alerts_modified = True
-
-                    print(
-                        f"[Custom Alert] Triggered '{alert_name}' - {alert_type}: {current_value} {condition} {threshold}"
-                    )
 
         # Save updated alerts if any were modified
         if alerts_modified:
@@ -472,17 +579,6 @@ def check_custom_alerts(current_time):
         print(f"[Custom Alert Error] {e}")
 
 
-def evaluate_condition(current_value, condition, threshold):
-    """Evaluate if current value meets the condition against threshold"""
-    if condition == "greater_than":
-        return current_value > threshold
-    elif condition == "less_than":
-        return current_value < threshold
-    elif condition == "equal_to":
-        return current_value == threshold
-    return False
-
-
 def check_break_reminder(current_time):
     """Check if it's time to send a break reminder"""
     global last_break_reminder_time
@@ -521,9 +617,11 @@ def on_key_press(key):
         last_activity_time
     try:
         keystroke_count += 1
-        current_time = time.time()
+        current_time = clock()
         last_mouse_move_time = current_time
         last_activity_time = current_time
+        if trace_recorder:
+            trace_recorder.key(current_time)
 
         # Debug logging for keystroke issues
         if keystroke_count % 100 == 0:  # Every 100 keystrokes
@@ -535,9 +633,11 @@ def on_key_press(key):
 def on_mouse_move(x, y):
     global last_mouse_move_time, last_break_reminder_time, last_activity_time
     try:
-        current_time = time.time()
+        current_time = clock()
         last_mouse_move_time = current_time
         last_activity_time = current_time
+        if trace_recorder:
+            trace_recorder.mouse(current_time)
 
         if current_time - last_break_reminder_time > 60:
             last_break_reminder_time = current_time
@@ -572,16 +672,14 @@ def start_input_listeners():
 
 
 def load_existing_sessions():
-    """Load existing sessions from file on startup"""
+    """Load existing sessions from the session store on startup"""
     global sessions
     try:
-        if os.path.exists(SESSIONS_FILE):
-            with open(SESSIONS_FILE, "r") as f:
-                sessions = json.load(f)
+        sessions = session_store.read_all()
+        if sessions:
             print(f"[Tracker] Loaded {len(sessions)} existing sessions")
         else:
-            sessions = []
-            print("[Tracker] No existing sessions file found, starting fresh")
+            print("[Tracker] No existing sessions found, starting fresh")
     except Exception as e:
         print(f"[Tracker] Error loading sessions: {e}")
         sessions = []
@@ -601,7 +699,9 @@ def load_current_session_state():
 
             if "last_updated" in status:
                 last_updated = datetime.fromisoformat(status["last_updated"])
-                time_since_update = (datetime.now() - last_updated).total_seconds()
+                time_since_update = (
+                    datetime.fromtimestamp(clock()) - last_updated
+                ).total_seconds()
 
                 if time_since_update < 600:  # 10 minutes
                     if "session_start_time" in status:
@@ -611,9 +711,9 @@ def load_current_session_state():
                         session_start_time = session_start_from_file.timestamp()
                         keystroke_count = status.get("keystrokes", 0)
                         last_break_reminder_time = session_start_time
-                        last_activity_time = time.time()
+                        last_activity_time = clock()
 
-                        resumed_duration = time.time() - session_start_time
+                        resumed_duration = clock() - session_start_time
                         print(
                             f"[Tracker] Resumed existing session (running for {resumed_duration:.0f} seconds)"
                         )
@@ -628,7 +728,7 @@ def load_current_session_state():
         print(f"[Tracker] Error loading session state: {e}")
 
     # Start fresh session
-    current_time = time.time()
+    current_time = clock()
     session_start_time = current_time
     keystroke_count = 0
     last_break_reminder_time = current_time
@@ -636,13 +736,9 @@ def load_current_session_state():
     return False
 
 
-def get_active_window():
-    """Get currently active window with better error handling"""
+def describe_window(hwnd):
+    """(process name, title) of a window"""
     try:
-        hwnd = win32gui.GetForegroundWindow()
-        if not hwnd:
-            return None, None
-
         _, pid = win32process.GetWindowThreadProcessId(hwnd)
         try:
             proc = psutil.Process(pid)
@@ -657,16 +753,19 @@ def get_active_window():
         return None, None
 
 
-def get_open_windows_cached():
-    """Cached version of window enumeration - only updates every 5 seconds"""
-    global last_window_enum_time
-    current_time = time.time()
+def get_active_window():
+    """Get currently active window with better error handling"""
+    try:
+        hwnd = win32gui.GetForegroundWindow()
+        if not hwnd:
+            return None, None
+        return describe_window(hwnd)
+    except Exception as e:
+        return None, None
 
-    # Only enumerate windows every 5 seconds
-    if current_time - last_window_enum_time < WINDOW_ENUM_INTERVAL:
-        return {}
 
-    last_window_enum_time = current_time
+def get_open_windows():
+    """Enumerate visible top-level windows (the open_windows duty's period sets how often)"""
     windows = {}
 
     def callback(hwnd, extra):
@@ -691,27 +790,31 @@ def get_open_windows_cached():
                 title = "Unknown"
 
             if name and title:
-                if name not in windows:
-                    windows[name] = {
+                # Only the app name is interned: titles are kept as strings
+                # and interned once they are logged, so titles seen in
+                # passing don't pile up in strings.jsonl
+                name_id = strings.intern(name)
+                if name_id not in windows:
+                    windows[name_id] = {
                         "instances": [],
                         "count": 0,
-                        "start_time": time.time(),
+                        "start_time": clock(),
                     }
 
                 window_exists = any(
                     instance["title"] == title and instance["hwnd"] == hwnd
-                    for instance in windows[name]["instances"]
+                    for instance in windows[name_id]["instances"]
                 )
 
                 if not window_exists:
-                    windows[name]["instances"].append(
+                    windows[name_id]["instances"].append(
                         {"hwnd": hwnd, "title": title, "pid": pid}
                     )
-                    windows[name]["count"] = len(windows[name]["instances"])
+                    windows[name_id]["count"] = len(windows[name_id]["instances"])
 
-                    if name in open_apps:
-                        windows[name]["start_time"] = open_apps[name].get(
-                            "start_time", time.time()
+                    if name_id in open_apps:
+                        windows[name_id]["start_time"] = open_apps[name_id].get(
+                            "start_time", clock()
                         )
         except Exception:
             # Silent failure for window enumeration errors
@@ -729,7 +832,8 @@ def check_idle_apps(current_time):
     """Enhanced idle app checking with performance optimization"""
     global last_resource_check_time
 
-    for app, info in list(open_apps.items()):
+    for app_id, info in list(open_apps.items()):
+        app = strings.lookup(app_id)
         if not should_alert_for_app(app, current_time):
             continue
 
@@ -773,7 +877,7 @@ def check_idle_apps(current_time):
                 )
 
                 alert_history.append(level["minutes"])
-                open_apps[app]["alert_history"] = alert_history
+                open_apps[app_id]["alert_history"] = alert_history
 
                 print(
                     f"[Alert] {level['title']} - {app} idle for {int(minutes_unused)} minutes"
@@ -789,58 +893,71 @@ def check_idle_apps(current_time):
         last_resource_check_time = current_time
 
 
-def save_log():
-    """Save log buffer to file"""
+def _append_log_entry(entry, app, start_ts, end_ts):
+    wrote_batch = False
     try:
-        with open(LOG_FILE, "a") as f:
-            for entry in log_buffer:
-                f.write(json.dumps(entry) + "\n")
-        log_buffer.clear()
+        wrote_batch = log_writer.append(entry)
     except Exception as e:
+        # The entry stays buffered and goes out with a later batch
         print(f"[Log Save Error] {e}")
+    try:
+        rollups.add_activity(app, start_ts, end_ts)
+        if wrote_batch:
+            rollups.flush()
+    except Exception as e:
+        print(f"[Log Save Error] {e}")
+
 
+def log_activity(app, app_id, title_id, start_ts, end_ts):
+    """Queue a finished app run for the activity log and the rollups"""
+    entry = {
+        "app": app_id,
+        "title": title_id,
+        "start": datetime.fromtimestamp(start_ts).isoformat(),
+        "end": datetime.fromtimestamp(end_ts).isoformat(),
+        "duration_sec": round(end_ts - start_ts, 2),
+    }
+    background_writer.submit(None, _append_log_entry, entry, app, start_ts, end_ts)
 
-def save_sessions():
-    """Save sessions to file"""
+
+def _flush_log(force):
     try:
-        with open(SESSIONS_FILE, "w") as f:
-            json.dump(sessions, f, indent=2)
-        print(f"[Tracker] Saved {len(sessions)} sessions to file")
+        if log_writer.flush(force):
+            rollups.flush()
     except Exception as e:
-        print(f"[Tracker] Error saving sessions: {e}")
+        print(f"[Log Save Error] {e}")
 
-def save_insights(insights):
-        """Save insights to insights.json"""
-        try:
-            script_dir = Path(__file__).parent.absolute()
-            insights_file = script_dir / "data" / "session_insights.json"
 
-            # Load existing insights
-            existing_insights = []
-            if insights_file.exists():
-                try:
-                    with open(insights_file, "r", encoding="utf-8") as f:
-                        existing_insights = json.load(f)
-                except:
-                    existing_insights = []
+def save_log(force=False):
+    """Queue a write of the buffered log entries once due (or now, with force)"""
+    background_writer.submit(("log_flush", force), _flush_log, force)
 
-            # Add new insight
-            existing_insights.append(insights)
 
-            # Keep only last 100 insights
-            if len(existing_insights) > 100:
-                existing_insights = existing_insights[-100:]
+def _write_session(new_session, total):
+    try:
+        session_store.append(new_session)
+        rollups.add_session(new_session)
+        rollups.flush()
+        print(f"[Tracker] Saved session ({total} total)")
+    except Exception as e:
+        print(f"[Tracker] Error saving session: {e}")
 
-            # Save back to file
-            with open(insights_file, "w", encoding="utf-8") as f:
-                json.dump(existing_insights, f, indent=2, ensure_ascii=False)
 
-            print(f"[AI Analysis] Insights saved to {insights_file}")
-            return True
+def save_session(new_session):
+    """Queue a finished session for the session store"""
+    background_writer.submit(None, _write_session, dict(new_session), len(sessions))
 
-        except Exception as e:
-            print(f"[AI Analysis] Error saving insights: {e}")
-            return False
+def _write_insights(insights):
+    try:
+        get_session_insights_store("data").append(insights)
+        print("[AI Analysis] Session insights saved")
+    except Exception as e:
+        print(f"[AI Analysis] Error saving insights: {e}")
+
+def save_insights(insights):
+        """Queue insights for session_insights.jsonl"""
+        background_writer.submit(None, _write_insights, insights)
+        return True
 
 def update_alerts(llm_suggestion):
     print(llm_suggestion)
@@ -855,13 +972,39 @@ def update_alerts(llm_suggestion):
 
     save_insights(parsed_suggestions)
 
+def publish_live_status(now=None):
+    """Publish live counters to the shared-memory status channel"""
+    try:
+        now = now or clock()
+        status_channel.publish(
+            session_time=round(now - session_start_time, 2),
+            session_start_time=session_start_time,
+            keystrokes=keystroke_count,
+            current_app=current_app,
+            open_app_count=len(open_apps),
+            enabled_alert_count=enabled_alert_count,
+            browser_tab_count=len(browser_tracker.active_tabs),
+        )
+    except Exception as e:
+        print(f"[Live Status Error] {e}")
+
+
+def _write_status_file(status_data):
+    try:
+        with open(STATUS_FILE, "w") as f:
+            json.dump(status_data, f, indent=2)
+    except Exception as e:
+        print(f"[Status Update Error] {e}")
+
+
 def update_status_file(session_time, keystrokes):
     """Update status file with current data"""
     try:
         open_apps_details = {}
-        current_time = time.time()
+        current_time = clock()
 
-        for app_name, app_info in open_apps.items():
+        for app_id, app_info in open_apps.items():
+            app_name = strings.lookup(app_id)
             start_time = app_info.get("start_time", current_time)
             last_used = app_info.get("last_used_time", start_time)
             duration_open = current_time - start_time
@@ -871,15 +1014,18 @@ def update_status_file(session_time, keystrokes):
             resource_usage = None
 
             open_apps_details[app_name] = {
-                "title": app_info.get("title", ""),
+                "title": strings.decode(app_info.get("title", "")),
                 "start_time": datetime.fromtimestamp(start_time).isoformat(),
                 "duration_open_sec": round(duration_open, 2),
                 "last_used_time": datetime.fromtimestamp(last_used).isoformat(),
                 "duration_since_used_sec": round(duration_since_used, 2),
-                "alert_history": app_info.get("alert_history", []),
+                "alert_history": list(app_info.get("alert_history", [])),
                 "is_current": app_name == current_app,
                 "instance_count": app_info.get("instance_count", 1),
-                "instances": app_info.get("instances", []),
+                "instances": [
+                    strings.decode_fields(instance, ("title",))
+                    for instance in app_info.get("instances", [])
+                ],
                 "resource_usage": resource_usage,
             }
 
@@ -897,18 +1043,20 @@ def update_status_file(session_time, keystrokes):
                 session_start_time
             ).isoformat(),
             "keystrokes": keystrokes,
-            "last_updated": datetime.now().isoformat(),
-            "open_apps": list(open_apps.keys()),
+            "last_updated": datetime.fromtimestamp(clock()).isoformat(),
+            "open_apps": list(open_apps_details.keys()),
             "open_apps_details": open_apps_details,
             "current_app": current_app,
             "sessions": sessions[-5:],
             "browser_data": browser_data,
-            "alert_config": alert_config,
-            "custom_alerts": load_custom_alerts(),
+            "alert_config": copy.deepcopy(alert_config),
+            "custom_alerts": custom_alerts_file.snapshot(),
+            "persistence": background_writer.stats(),
+            "duties": duties.stats() if duties else {},
+            "window_source": window_source.stats() if window_source else {},
         }
 
-        with open(STATUS_FILE, "w") as f:
-            json.dump(status_data, f, indent=2)
+        background_writer.submit("status_file", _write_status_file, status_data)
 
         print(f"[Status Debug] Session time: {session_time}s, Keystrokes: {keystrokes}")
 
@@ -916,194 +1064,243 @@ def update_status_file(session_time, keystrokes):
         print(f"[Status Update Error] {e}")
 
 
-def update_tracker():
-    """Optimized main tracking loop with reduced system load"""
+def report_performance(now):
+    """Print a summary of the session, the write queue and the busiest duty"""
+    writer_stats = background_writer.stats()
+    busiest = max(
+        duties.duties.values(), key=lambda duty: duty.total_ms, default=None
+    )
+    print(
+        f"[Performance] Session: {(now - session_start_time) / 60:.1f}min, "
+        f"Keys: {keystroke_count}, Apps: {len(open_apps)}, "
+        f"Write queue: {writer_stats['depth']} "
+        f"(p99 write {writer_stats['write_ms']['p99']:.0f}ms)"
+        + (
+            f", Busiest duty: {busiest.name} "
+            f"({busiest.runs} runs, max {busiest.max_ms:.0f}ms)"
+            if busiest
+            else ""
+        )
+    )
+
+
+def suggest_timers():
+    """Ask the local LLM for new break/idle thresholds (JSON text)"""
+    # Imported here: insights pulls in the Flask app
+    from insights import give_timer_suggestions
+
+    return give_timer_suggestions()
+
+
+def check_session_end(now):
+    """End the session after 10 minutes of inactivity"""
     global \
-        current_app, \
-        current_title, \
-        start_time, \
-        open_apps, \
         session_start_time, \
+        start_time, \
         keystroke_count, \
         last_activity_time, \
-        last_browser_update_time
+        session_ended_recently
+
+    time_since_last_activity = now - last_activity_time
+    session_duration = now - session_start_time
+
+    if (
+        time_since_last_activity > 600
+        and session_duration > 60
+        and not session_ended_recently
+    ):
+        new_session = {
+            "start": datetime.fromtimestamp(session_start_time).isoformat(),
+            "end": datetime.fromtimestamp(now).isoformat(),
+            "duration_sec": round(session_duration, 2),
+        }
+        sessions.append(new_session)
+        save_session(new_session)
 
-    try:
-        session_ended_recently = False
-        loop_count = 0
+        print(
+            f"[Tracker] Session ended after {time_since_last_activity / 60:.1f} minutes of inactivity"
+        )
 
-        print("[Tracker] Starting main tracking loop...")
+        show_notification(
+            "Session Ended",
+            f"No activity for {int(time_since_last_activity / 60)} minutes. "
+            f"Session recorded ({session_duration / 60:.1f} min). Total sessions: {len(sessions)}",
+            duration=5,
+        )
+        save_log(force=True)
+
+        # Start new session
+        session_start_time = now
+        start_time = now
+        keystroke_count = 0
+        last_activity_time = now
+        session_ended_recently = True
+
+        def reset_session_flag():
+            global session_ended_recently
+            time.sleep(30)
+            session_ended_recently = False
 
-        while True:
-            loop_start_time = time.time()
-            now = time.time()
+        llm_suggestions = suggest_timers()
+        if llm_suggestions:
+            update_alerts(llm_suggestions)
 
-            # Performance monitoring every 20 loops (now ~100 seconds)
-            if loop_count % 20 == 0:
-                print(
-                    f"[Performance] Loop {loop_count}, Session: {(now - session_start_time) / 60:.1f}min, "
-                    f"Keys: {keystroke_count}, Apps: {len(open_apps)}"
-                )
+        threading.Thread(target=reset_session_flag, daemon=True).start()
+        return
 
-            # Session management
-            time_since_last_activity = now - last_activity_time
-            session_duration = now - session_start_time
+    session_ended_recently = False
 
-            # End session after 10 minutes of inactivity
-            if (
-                time_since_last_activity > 600
-                and session_duration > 60
-                and not session_ended_recently
-            ):
-                new_session = {
-                    "start": datetime.fromtimestamp(session_start_time).isoformat(),
-                    "end": datetime.fromtimestamp(now).isoformat(),
-                    "duration_sec": round(session_duration, 2),
-                }
-                sessions.append(new_session)
-                save_sessions()
 
-                print(
-                    f"[Tracker] Session ended after {time_since_last_activity / 60:.1f} minutes of inactivity"
-                )
+def update_open_windows(now):
+    """Merge the current top-level windows into open_apps"""
+    open_windows = get_open_windows()
+    if trace_recorder:
+        trace_recorder.windows(now, open_windows, strings)
+    for app in open_windows:
+        if app not in open_apps:
+            main_title = (
+                open_windows[app]["instances"][0]["title"]
+                if open_windows[app]["instances"]
+                else "No title"
+            )
+            open_apps[app] = {
+                "title": main_title,
+                "start_time": now,
+                "last_used_time": now,
+                "alerted": False,
+                "instance_count": open_windows[app]["count"],
+                "instances": open_windows[app]["instances"],
+            }
+        else:
+            open_apps[app]["instance_count"] = open_windows[app]["count"]
+            open_apps[app]["instances"] = open_windows[app]["instances"]
 
-                show_notification(
-                    "Session Ended",
-                    f"No activity for {int(time_since_last_activity / 60)} minutes. "
-                    f"Session recorded ({session_duration / 60:.1f} min). Total sessions: {len(sessions)}",
-                    duration=5,
-                )
-                save_log()
 
-                # Start new session
-                session_start_time = now
-                start_time = now
-                keystroke_count = 0
-                last_break_reminder_time = now
-                last_activity_time = now
-                session_ended_recently = True
+def switch_window(ts, app, title):
+    """Log the finished run and switch apps if the foreground app changed at ts"""
+    global \
+        current_app, \
+        current_app_id, \
+        current_title_id, \
+        start_time, \
+        last_activity_time, \
+        app_switch_count
 
-                def reset_session_flag():
-                    global session_ended_recently
-                    time.sleep(30)
-                    session_ended_recently = False
+    if app == current_app:
+        return
+    if current_app:
+        log_activity(
+            current_app,
+            current_app_id,
+            current_title_id,
+            start_time,
+            ts,
+        )
 
-                llm_suggestions = give_timer_suggestions()
-                update_alerts(llm_suggestions)
+    app_id = strings.intern(app) if app else None
 
-                threading.Thread(target=reset_session_flag, daemon=True).start()
-                continue
+    # Update app usage
+    if app and app_id in open_apps:
+        open_apps[app_id]["last_used_time"] = ts
+        open_apps[app_id]["alert_history"] = []
+        if app in alert_config.get("snooze_until", {}):
+            del alert_config["snooze_until"][app]
+            save_alert_config()
 
-            session_ended_recently = False
+    current_app, current_app_id = app, app_id
+    app_switch_count += 1
+    current_title_id = strings.intern(title) if title else title
+    start_time = ts
+    last_activity_time = max(last_activity_time, ts)
 
-            # Update open windows (cached - only every 10 seconds now)
-            try:
-                open_windows = get_open_windows_cached()
-                for app in open_windows:
-                    if app not in open_apps:
-                        main_title = (
-                            open_windows[app]["instances"][0]["title"]
-                            if open_windows[app]["instances"]
-                            else "No title"
-                        )
-                        open_apps[app] = {
-                            "title": main_title,
-                            "start_time": now,
-                            "last_used_time": now,
-                            "alerted": False,
-                            "instance_count": open_windows[app]["count"],
-                            "instances": open_windows[app]["instances"],
-                        }
-                    else:
-                        open_apps[app]["instance_count"] = open_windows[app]["count"]
-                        open_apps[app]["instances"] = open_windows[app]["instances"]
-            except Exception as e:
-                print(f"[Window Update Error] {e}")
-
-            # Check idle apps (less frequently)
-            try:
-                if loop_count % 3 == 0:  # Every 3rd loop (~15 seconds)
-                    check_idle_apps(now)
-            except Exception as e:
-                print(f"[Idle Check Error] {e}")
 
-            # Check break reminders (less frequently)
-            try:
-                if loop_count % 2 == 0:  # Every 2nd loop (~10 seconds)
-                    check_break_reminder(now)
-            except Exception as e:
-                print(f"[Break Reminder Error] {e}")
+def track_active_window(now):
+    """Apply the foreground changes the window source saw since the last call"""
+    for ts, app, title in window_source.poll(now):
+        if trace_recorder:
+            trace_recorder.foreground(ts, app, title)
+        switch_window(ts, app, title)
 
-            # Check custom alerts (every loop to ensure responsiveness)
-            try:
-                check_custom_alerts(now)
-            except Exception as e:
-                print(f"[Custom Alert Error] {e}")
 
-            # Update browser tracking (even less frequently)
-            if now - last_browser_update_time >= BROWSER_UPDATE_INTERVAL:
-                try:
-                    update_browser_tracking()
-                    last_browser_update_time = now
-                except Exception as e:
-                    print(f"Browser tracking error: {e}")
-                    # Continue without browser tracking if it fails
+def wake_active_window():
+    """Called by the window source (any thread) when the foreground changes"""
+    if duties is not None:
+        duties.trigger("active_window")
 
-            # Track active window
-            try:
-                app, title = get_active_window()
-                if app != current_app:
-                    end_time = now
-                    if current_app:
-                        duration = round(end_time - start_time, 2)
-                        log_buffer.append(
-                            {
-                                "app": current_app,
-                                "title": current_title,
-                                "start": datetime.fromtimestamp(start_time).isoformat(),
-                                "end": datetime.fromtimestamp(end_time).isoformat(),
-                                "duration_sec": duration,
-                            }
-                        )
-                        if len(log_buffer) >= 10:
-                            save_log()
-
-                    # Update app usage
-                    if app and app in open_apps:
-                        open_apps[app]["last_used_time"] = now
-                        open_apps[app]["alert_history"] = []
-                        if app in alert_config.get("snooze_until", {}):
-                            del alert_config["snooze_until"][app]
-                            save_alert_config()
-
-                    current_app, current_title = app, title
-                    start_time = now
-                    last_activity_time = now
-            except Exception as e:
-                print(f"[Active Window Error] {e}")
-
-            # Performance control - ensure we don't exceed our target interval
-            loop_duration = time.time() - loop_start_time
-            sleep_time = max(
-                1.0, MAIN_LOOP_INTERVAL - loop_duration
-            )  # Minimum 1 second sleep
-
-            if loop_duration > MAIN_LOOP_INTERVAL:
-                print(
-                    f"[Performance Warning] Loop took {loop_duration:.2f}s (target: {MAIN_LOOP_INTERVAL}s)"
-                )
 
-            time.sleep(sleep_time)
-            loop_count += 1
+def start_window_source():
+    """Watch the foreground window with the WINDOW_SOURCE backend"""
+    global window_source
+
+    window_source = create_window_source(
+        WINDOW_SOURCE,
+        describe_window,
+        get_active_window,
+        wake_active_window,
+        # Looked up on each call, so a later set_clock() applies too
+        clock=lambda: clock(),
+    )
+    print(f"[Tracker] Foreground window source: {window_source.name}")
+
+
+def build_duty_scheduler(rng=None):
+    """Register the tracker's duties, each with its own period and jitter.
+
+    Duties due at the same moment run in the order they're added here.
+    Pass a seeded rng for a reproducible schedule (replay).
+    """
+    scheduler = DutyScheduler(clock=clock, rng=rng)
+    scheduler.add(
+        "performance_report", report_performance, PERFORMANCE_REPORT_INTERVAL
+    )
+    scheduler.add("session", check_session_end, MAIN_LOOP_INTERVAL)
+    scheduler.add(
+        "open_windows", update_open_windows, WINDOW_ENUM_INTERVAL, DUTY_JITTER
+    )
+    # Pick up alert settings changed from the dashboard (a stat per file)
+    scheduler.add(
+        "alert_settings", lambda now: refresh_alert_settings(), MAIN_LOOP_INTERVAL
+    )
+    scheduler.add("idle_apps", check_idle_apps, IDLE_CHECK_INTERVAL, DUTY_JITTER)
+    scheduler.add(
+        "break_reminder", check_break_reminder, BREAK_CHECK_INTERVAL, DUTY_JITTER
+    )
+    scheduler.add("custom_alerts", check_custom_alerts, MAIN_LOOP_INTERVAL)
+    scheduler.add(
+        "browser",
+        lambda now: update_browser_tracking(),
+        BROWSER_UPDATE_INTERVAL,
+        DUTY_JITTER,
+    )
+    scheduler.add("active_window", track_active_window, ACTIVE_WINDOW_INTERVAL)
+    scheduler.add("live_status", publish_live_status, MAIN_LOOP_INTERVAL)
+    # Writes the log batch once it's old enough, and fsyncs per policy
+    # (on the background writer, like every other write)
+    scheduler.add("save_log", lambda now: save_log(), MAIN_LOOP_INTERVAL)
+    return scheduler
+
+
+def update_tracker():
+    """Main tracking loop: sleeps until the next duty is due and runs it"""
+    global duties, window_source
+
+    try:
+        print("[Tracker] Starting main tracking loop...")
+        if window_source is None:
+            window_source = PollingWindowSource(get_active_window)
+        duties = build_duty_scheduler()
+        duties.run_forever()
 
     except KeyboardInterrupt:
         print("\n[Tracker] Stopping and saving log...")
-        save_log()
+        save_log(force=True)
     except Exception as e:
         print(f"[Tracker Error] {e}")
         import traceback
 
         traceback.print_exc()
+        # Don't lose the buffered entries if the restart fails too
+        save_log(force=True)
         # Try to restart after error with longer delay
         print("[Tracker] Restarting in 15 seconds...")
         time.sleep(15)
@@ -1119,7 +1316,7 @@ def run_dashboard():
 
     def update_ui():
         try:
-            now = time.time()
+            now = clock()
             session_time = round(now - session_start_time, 2)
 
             # Update labels
@@ -1128,6 +1325,8 @@ def run_dashboard():
             label_open_apps.config(text=f"Open Apps: {len(open_apps)}")
             label_sessions.config(text=f"Sessions Tracked: {len(sessions)}")
 
+            publish_live_status(now)
+
             # Update status file much less frequently to reduce load
             if int(now) % 30 == 0:  # Only every 30 seconds
                 update_status_file(session_time, keystroke_count)
@@ -1171,12 +1370,29 @@ def run_dashboard():
 
 
 # Initialize everything
+activity_log.migrate_legacy()
+if not rollups.built:
+    # First run with rollups: roll up the existing history once
+    counts = rollups.rebuild(activity_log, session_store.read_all())
+    print(
+        f"[Tracker] Rolled up {counts['entries']} log entries and "
+        f"{counts['sessions']} sessions"
+    )
 load_alert_config()
 load_existing_sessions()
 load_current_session_state()
 
 # Run tracker and dashboard concurrently
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="SnapAlert productivity tracker")
+    parser.add_argument(
+        "--record-trace",
+        metavar="PATH",
+        help="record foreground changes, window lists and input activity "
+        "to PATH (replay with trace_replay.py)",
+    )
+    args = parser.parse_args()
+
     print("🔺 Starting SnapAlert Tracker...")
 
     # Register SnapAlert app ID with Windows automatically
@@ -1189,12 +1405,17 @@ if __name__ == "__main__":
     print(f"  - Resource checking: every {RESOURCE_CHECK_INTERVAL}s")
     print(f"  - Browser updates: every {BROWSER_UPDATE_INTERVAL}s")
 
+    if args.record_trace:
+        start_trace_recording(args.record_trace)
+
     # Start input listeners
     if not start_input_listeners():
         print(
             "[Tracker] Warning: Input listeners failed to start. Keystroke tracking may not work."
         )
 
+    start_window_source()
+
     # Start tracker thread
     tracker_thread = threading.Thread(target=update_tracker)
     tracker_thread.daemon = True
@@ -1211,14 +1432,10 @@ import json
 
 OLLAMA_URL = "http://localhost:11434/api/generate"
 MODEL = "mistral"
-LOG_FILE = "data/logs.json"
 
 
 def read_recent_logs(n=20):
-    with open(LOG_FILE, "r") as f:
-        lines = f.readlines()
-    logs = [json.loads(line) for line in lines[-n:]]
-    return logs
+    return get_activity_log("data").tail(n)
 
 
 def generate_prompt(log_data):
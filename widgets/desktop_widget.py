@@ -7,6 +7,13 @@ from datetime import datetime
 import os
 import sys
 
+# The storage package lives in the project root, one level up
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+try:
+    from storage import read_live_status
+except ImportError:
+    read_live_status = None
+
 
 class SnapAlertWidget:
     def __init__(self):
@@ -417,8 +424,29 @@ class SnapAlertWidget:
         self.title.bind("<Button-1>", start_drag)
         self.title.bind("<B1-Motion>", drag)
 
+    def load_live_status(self):
+        """Read live counters from the tracker's shared-memory status channel"""
+        if read_live_status is None:
+            return None
+
+        data_dirs = [
+            "data",
+            "../data",
+            os.path.join(os.path.dirname(os.path.dirname(__file__)), "data"),
+        ]
+        for data_dir in data_dirs:
+            snapshot = read_live_status(data_dir)
+            if snapshot:
+                return snapshot
+        return None
+
     def load_status_data(self):
         """Load current status from SnapAlert tracker"""
+        # Live channel first: no file read or JSON parse on every refresh
+        live = self.load_live_status()
+        if live:
+            return live
+
         try:
             # Check in current directory first, then parent directory
             status_files = [
@@ -477,24 +505,32 @@ class SnapAlertWidget:
                     label.config(text=current_app)
 
                 elif field_key == "open_apps":
-                    open_apps = status.get("open_apps", [])
-                    label.config(text=f"{len(open_apps)} active")
+                    open_app_count = status.get(
+                        "open_app_count", len(status.get("open_apps", []))
+                    )
+                    label.config(text=f"{open_app_count} active")
 
                 elif field_key == "alerts":
-                    custom_alerts = status.get("custom_alerts", [])
-                    enabled_alerts = [
-                        a for a in custom_alerts if a.get("enabled", True)
-                    ]
-                    alert_count = len(enabled_alerts)
+                    if "enabled_alert_count" in status:
+                        alert_count = status["enabled_alert_count"]
+                    else:
+                        custom_alerts = status.get("custom_alerts", [])
+                        enabled_alerts = [
+                            a for a in custom_alerts if a.get("enabled", True)
+                        ]
+                        alert_count = len(enabled_alerts)
                     if alert_count > 0:
                         label.config(text=f"{alert_count} active")
                     else:
                         label.config(text="None active")
 
                 elif field_key == "browser_tabs":
-                    browser_data = status.get("browser_data", {})
-                    stats = browser_data.get("stats", {})
-                    tab_count = stats.get("total_tabs", 0)
+                    if "browser_tab_count" in status:
+                        tab_count = status["browser_tab_count"]
+                    else:
+                        browser_data = status.get("browser_data", {})
+                        stats = browser_data.get("stats", {})
+                        tab_count = stats.get("total_tabs", 0)
                     label.config(text=f"{tab_count} tabs")
 
                 elif field_key == "cpu_usage":
@@ -0,0 +1,270 @@
+import bisect
+import json
+import threading
+import time
+from collections import deque
+from typing import Callable, Iterable, List, Optional, Tuple
+
+# (timestamp, app, title) of a foreground window change
+WindowEvent = Tuple[float, Optional[str], Optional[str]]
+
+# Win32 constants for the foreground hook
+EVENT_SYSTEM_FOREGROUND = 0x0003
+WINEVENT_OUTOFCONTEXT = 0x0000
+WM_QUIT = 0x0012
+
+# Changes the hook queues between two polls before the oldest are dropped
+MAX_PENDING_EVENTS = 1024
+
+
+class WindowSource:
+    """Tells the tracker which app is in the foreground.
+
+    ``poll(now)`` returns the changes since the last poll, oldest first, as
+    (timestamp, app, title). Sources that see changes as they happen call
+    ``wake()`` (passed to ``start``) so the tracker polls right away.
+    """
+
+    name = "base"
+    exact = False  # timestamps are when the switch happened, not when polled
+
+    def start(self, wake: Optional[Callable[[], None]] = None) -> bool:
+        """Begin watching; False if this source can't run here"""
+        return True
+
+    def poll(self, now: float) -> List[WindowEvent]:
+        raise NotImplementedError
+
+    def stop(self) -> None:
+        pass
+
+    def stats(self) -> dict:
+        return {"source": self.name, "exact": self.exact}
+
+
+class PollingWindowSource(WindowSource):
+    """Asks for the foreground window on every poll (the original behaviour).
+
+    A switch is seen at the next poll, so its timestamp is off by up to the
+    polling period.
+    """
+
+    name = "poll"
+
+    def __init__(self, get_window: Callable[[], Tuple[Optional[str], Optional[str]]]):
+        self._get_window = get_window
+        self._last_app = self  # never an app name: the first poll reports
+        self.polls = 0
+        self.changes = 0
+
+    def poll(self, now: float) -> List[WindowEvent]:
+        self.polls += 1
+        app, title = self._get_window()
+        if app == self._last_app:
+            return []
+        self._last_app = app
+        self.changes += 1
+        return [(now, app, title)]
+
+    def stats(self) -> dict:
+        return {**super().stats(), "polls": self.polls, "changes": self.changes}
+
+
+class ForegroundHookSource(WindowSource):
+    """Foreground changes pushed by Windows (SetWinEventHook).
+
+    A thread with its own message loop receives EVENT_SYSTEM_FOREGROUND and
+    queues (time, app, title) as it happens; ``poll`` only drains the queue,
+    so no process lookups are made while the user stays in one window.
+    ``describe(hwnd)`` turns a window handle into (app, title) and
+    ``get_window()`` gives the window in the foreground at start. Changes
+    are stamped with ``clock()``, the tracker's time source.
+    """
+
+    name = "hook"
+    exact = True
+
+    def __init__(
+        self,
+        describe: Callable[[int], Tuple[Optional[str], Optional[str]]],
+        get_window: Callable[[], Tuple[Optional[str], Optional[str]]],
+        clock: Callable[[], float] = time.time,
+    ):
+        self.clock = clock
+        self._describe = describe
+        self._get_window = get_window
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._wake = None
+        self._thread = None
+        self._thread_id = None
+        self._ready = threading.Event()
+        self._installed = False
+        self.events = 0
+        self.dropped = 0
+
+    def _push(self, ts: float, app: Optional[str], title: Optional[str]) -> None:
+        with self._lock:
+            if len(self._pending) >= MAX_PENDING_EVENTS:
+                self._pending.popleft()
+                self.dropped += 1
+            self._pending.append((ts, app, title))
+            self.events += 1
+        if self._wake:
+            self._wake()
+
+    def start(self, wake: Optional[Callable[[], None]] = None) -> bool:
+        self._wake = wake
+        self._push(self.clock(), *self._get_window())
+        self._thread = threading.Thread(
+            target=self._run, name="ForegroundHook", daemon=True
+        )
+        self._thread.start()
+        self._ready.wait(5)
+        return self._installed
+
+    def _run(self) -> None:
+        try:
+            import ctypes
+            from ctypes import wintypes
+
+            user32 = ctypes.windll.user32
+            kernel32 = ctypes.windll.kernel32
+        except (ImportError, AttributeError, OSError) as e:
+            print(f"[Tracker] Foreground hook unavailable: {e}")
+            self._ready.set()
+            return
+
+        WinEventProc = ctypes.WINFUNCTYPE(
+            None,
+            wintypes.HANDLE,
+            wintypes.DWORD,
+            wintypes.HWND,
+            wintypes.LONG,
+            wintypes.LONG,
+            wintypes.DWORD,
+            wintypes.DWORD,
+        )
+
+        def on_foreground(hook, event, hwnd, id_object, id_child, thread, ms):
+            if not hwnd:
+                return
+            try:
+                self._push(self.clock(), *self._describe(hwnd))
+            except Exception as e:
+                print(f"[Tracker] Foreground hook error: {e}")
+
+        # Must stay referenced for as long as the hook is installed
+        callback = WinEventProc(on_foreground)
+        user32.SetWinEventHook.restype = wintypes.HANDLE
+        hook = user32.SetWinEventHook(
+            EVENT_SYSTEM_FOREGROUND,
+            EVENT_SYSTEM_FOREGROUND,
+            0,
+            callback,
+            0,
+            0,
+            WINEVENT_OUTOFCONTEXT,
+        )
+        if not hook:
+            print("[Tracker] Foreground hook could not be installed")
+            self._ready.set()
+            return
+
+        self._thread_id = kernel32.GetCurrentThreadId()
+        self._installed = True
+        self._ready.set()
+
+        # Out-of-context hooks are delivered through this thread's messages
+        msg = wintypes.MSG()
+        while user32.GetMessageW(ctypes.byref(msg), 0, 0, 0) > 0:
+            user32.TranslateMessage(ctypes.byref(msg))
+            user32.DispatchMessageW(ctypes.byref(msg))
+        user32.UnhookWinEvent(hook)
+
+    def poll(self, now: float) -> List[WindowEvent]:
+        with self._lock:
+            events = list(self._pending)
+            self._pending.clear()
+        return events
+
+    def stop(self) -> None:
+        if self._thread_id is not None:
+            import ctypes
+
+            ctypes.windll.user32.PostThreadMessageW(self._thread_id, WM_QUIT, 0, 0)
+            self._thread_id = None
+
+    def stats(self) -> dict:
+        return {**super().stats(), "events": self.events, "dropped": self.dropped}
+
+
+class ScriptedWindowSource(WindowSource):
+    """Replays a fixed list of foreground changes, for tests and benchmarks.
+
+    ``poll(now)`` returns the changes with a timestamp up to now, so the
+    switch handling can be driven on any platform with a simulated clock.
+    """
+
+    name = "scripted"
+    exact = True
+
+    def __init__(self, events: Iterable[WindowEvent]):
+        self._events = sorted(events, key=lambda event: event[0])
+        self._times = [event[0] for event in self._events]
+        self._position = 0
+
+    @classmethod
+    def from_jsonl(cls, path) -> "ScriptedWindowSource":
+        """Load {"ts", "app", "title"} records, one per line"""
+        events = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    events.append(
+                        (record["ts"], record.get("app"), record.get("title"))
+                    )
+        return cls(events)
+
+    @property
+    def exhausted(self) -> bool:
+        return self._position >= len(self._events)
+
+    def next_time(self) -> Optional[float]:
+        """Timestamp of the next change not yet returned"""
+        if self.exhausted:
+            return None
+        return self._times[self._position]
+
+    def poll(self, now: float) -> List[WindowEvent]:
+        end = bisect.bisect_right(self._times, now, lo=self._position)
+        events = self._events[self._position : end]
+        self._position = end
+        return events
+
+    def stats(self) -> dict:
+        return {
+            **super().stats(),
+            "replayed": self._position,
+            "remaining": len(self._events) - self._position,
+        }
+
+
+def create_window_source(
+    kind: str,
+    describe: Callable[[int], Tuple[Optional[str], Optional[str]]],
+    get_window: Callable[[], Tuple[Optional[str], Optional[str]]],
+    wake: Optional[Callable[[], None]] = None,
+    clock: Callable[[], float] = time.time,
+) -> WindowSource:
+    """Start the "hook" or "poll" source; "auto" tries the hook first"""
+    if kind in ("auto", "hook"):
+        source = ForegroundHookSource(describe, get_window, clock)
+        if source.start(wake):
+            return source
+        source.stop()
+        print("[Tracker] Falling back to polling the foreground window")
+    source = PollingWindowSource(get_window)
+    source.start(wake)
+    return source